@@ -18,7 +18,11 @@ class Settings(BaseSettings):
     pu_ff_grafana_integration_enable: bool = True
     pu_ff_datapipe_enable: bool = True
     pu_ff_datapipe_default_last_value_enable: bool = True
+    pu_ff_datapipe_rollup_enable: bool = True
+    pu_ff_datasource_cache_enable: bool = True
     pu_ff_prometheus_enable: bool = True
+    # False keeps the platform links to compiled firmware for devices
+    pu_ff_release_asset_mirror_enable: bool = True
 
     pu_log_format: str = "json"
     pu_min_log_level: str = "INFO"
@@ -33,6 +37,20 @@ class Settings(BaseSettings):
 
     pu_auth_token_expiration: int = 2678400
     pu_save_repo_path: str = "repo_cache"
+    # partial clone, for example blob:limit=1m, blobs are fetched on read
+    pu_git_clone_filter: str | None = None
+    pu_git_artifact_cache_size: int = 16_777_216
+    pu_unit_schema_cache_size: int = 4096
+    pu_firmware_cache_path: str = "tmp/firmware_cache"
+    pu_firmware_cache_size: int = 1_073_741_824
+    pu_firmware_compress_workers: int = 4
+    pu_firmware_build_workers: int = 4
+    pu_firmware_build_queue_size: int = 64
+    pu_firmware_build_queue_timeout: float = 30.0
+    pu_firmware_compress_block_size: int = 131_072
+    pu_release_asset_cache_path: str = "tmp/release_assets"
+    pu_release_asset_cache_size: int = 2_147_483_648
+    pu_release_asset_max_size: int = 268_435_456
 
     pu_sqlalchemy_database_url: str
     pu_clickhouse_database_url: str
@@ -42,13 +60,25 @@ class Settings(BaseSettings):
     pu_static_salt: str
 
     pu_min_interval_sync_repository: int = 10
+    pu_sync_repository_workers: int = 4
+
+    # units per second sent to update by one rollout
+    pu_firmware_rollout_rate: float = 10.0
+    pu_firmware_rollout_workers: int = 4
+    pu_firmware_rollout_batch_size: int = 50
 
     pu_state_send_interval: int = 60
     pu_max_external_repo_size: int = 50
     pu_max_cipher_length: int = 1_000_000
 
     pu_min_topic_update_time: int = 30
+    # quiet period before SCHEMA_UPDATE of a Unit with changed edges
+    pu_schema_update_delay: float = 2.0
+    pu_schema_update_max_delay: float = 30.0
     pu_unit_log_expiration: int = 86400
+    pu_unit_log_stream_backfill_size: int = 100
+    pu_unit_log_stream_queue_size: int = 256
+    pu_unit_log_stream_heartbeat: int = 15
 
     pu_max_pagination_size: int = 500
 
@@ -101,10 +131,17 @@ class Settings(BaseSettings):
 
     pu_github_token_name: str = ""
     pu_github_token_pat: str = ""
+    pu_git_platform_timeout: float = 10.0
+    pu_git_platform_page_workers: int = 4
 
     pu_grafana_admin_user: str = ""
     pu_grafana_admin_password: str = ""
     pu_grafana_limit_unit_node_per_one_panel: int = 10
+    pu_grafana_max_data_points: int = 1000
+    pu_datasource_cache_size: int = 1024
+    pu_datasource_cache_min_ttl: int = 5
+    pu_datasource_cache_max_ttl: int = 300
+    pu_datasource_cache_lock_timeout: int = 10
 
     pu_test_integration_clear_data: bool = True
     pu_test_integration_private_repo_json: str = ""
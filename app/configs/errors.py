@@ -188,6 +188,26 @@ class FeatureFlagError(CustomException):
         )
 
 
+class RepositorySyncingError(CustomException):
+    def __init__(self, message):
+        super().__init__(
+            message,
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            message_template="Repository Syncing: {}",
+            error_code=17,
+        )
+
+
+class FirmwareBuildError(CustomException):
+    def __init__(self, message):
+        super().__init__(
+            message,
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            message_template="Firmware Build Error: {}",
+            error_code=18,
+        )
+
+
 class ReadmeGenerationError(CustomException):
     def __init__(self, message):
         super().__init__(
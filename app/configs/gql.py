@@ -82,8 +82,9 @@ def get_grafana_service_gql(info: Info) -> GrafanaService:
 
 def get_metrics_service_gql(info: Info) -> MetricsService:
     db = info.context.get("db")
+    clickhouse_client = info.context.get("clickhouse_client")
     jwt_token = info.context["jwt_token"]
-    return get_metrics_service(db, jwt_token)
+    return get_metrics_service(db, clickhouse_client, jwt_token)
 
 
 def get_permission_service_gql(info: Info) -> PermissionService:
@@ -2,6 +2,7 @@ import enum
 import json
 from collections.abc import AsyncIterator
 
+import redis
 from redis.asyncio import Redis, from_url
 
 from app import settings
@@ -13,6 +14,36 @@ class DataPipeConfigAction(str, enum.Enum):
     DELETE = "Delete"
 
 
+_redis_client: Redis | None = None
+
+
+def get_redis_client() -> Redis:
+    """
+    Shared client with a connection pool for hot paths of this worker
+    """
+    global _redis_client  # noqa: PLW0603
+    if _redis_client is None:
+        _redis_client = from_url(
+            settings.pu_redis_url, encoding="utf-8", decode_responses=True
+        )
+    return _redis_client
+
+
+_sync_redis_client: redis.Redis | None = None
+
+
+def get_sync_redis_client() -> redis.Redis:
+    """
+    Shared client for sync services running in threads
+    """
+    global _sync_redis_client  # noqa: PLW0603
+    if _sync_redis_client is None:
+        _sync_redis_client = redis.from_url(
+            settings.pu_redis_url, encoding="utf-8", decode_responses=True
+        )
+    return _sync_redis_client
+
+
 async def get_redis_session() -> AsyncIterator[Redis]:
     session = from_url(
         settings.pu_redis_url, encoding="utf-8", decode_responses=True
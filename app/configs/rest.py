@@ -11,6 +11,10 @@ from app.repositories.dashboard_panel_repository import (
 )
 from app.repositories.dashboard_repository import DashboardRepository
 from app.repositories.data_pipe_repository import DataPipeRepository
+from app.repositories.delete_queue_repository import DeleteQueueRepository
+from app.repositories.firmware_rollout_repository import (
+    FirmwareRolloutRepository,
+)
 from app.repositories.panels_unit_nodes_repository import (
     PanelsUnitNodesRepository,
 )
@@ -63,9 +67,13 @@ class ServiceFactory:
         self.data_pipe_repository = (
             DataPipeRepository(client, db) if client else None
         )
+        self.delete_queue_repository = (
+            DeleteQueueRepository(client) if client else None
+        )
         self.dashboard_repository = DashboardRepository(db)
         self.dashboard_panel_repository = DashboardPanelRepository(db)
         self.panels_unit_nodes_repository = PanelsUnitNodesRepository(db)
+        self.firmware_rollout_repository = FirmwareRolloutRepository(db)
 
         # Initialize services
         self.access_service = AccessService(
@@ -112,6 +120,7 @@ class ServiceFactory:
             ),
             permission_service=self.permission_service,
             access_service=self.access_service,
+            firmware_rollout_repository=self.firmware_rollout_repository,
         )
 
     def get_unit_service(self) -> UnitService:
@@ -162,6 +171,7 @@ class ServiceFactory:
             unit_node_repository=self.unit_node_repository,
             unit_node_edge_repository=self.unit_node_edge_repository,
             user_repository=self.user_repository,
+            delete_queue_repository=self.delete_queue_repository,
             access_service=self.access_service,
         )
 
@@ -230,9 +240,10 @@ def get_grafana_service(
 
 def get_metrics_service(
     db: Session = Depends(get_session),
+    client: Client = Depends(get_clickhouse_client),
     jwt_token: str | None = Depends(token_depends),
 ) -> MetricsService:
-    return create_service_factory(db, None, jwt_token).get_metrics_service()
+    return create_service_factory(db, client, jwt_token).get_metrics_service()
 
 
 def get_permission_service(
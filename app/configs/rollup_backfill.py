@@ -0,0 +1,19 @@
+import argparse
+
+from app.configs.clickhouse import get_hand_clickhouse_client
+from app.repositories.data_pipe_repository import DataPipeRepository
+
+
+def main():
+    argparse.ArgumentParser(
+        description="Rebuild data pipe rollup tables from raw ClickHouse rows"
+    ).parse_args()
+
+    with get_hand_clickhouse_client() as client:
+        DataPipeRepository(client=client, db=None).rebuild_rollups()
+
+    print("Rollup backfill finished")
+
+
+if __name__ == "__main__":
+    main()
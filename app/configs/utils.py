@@ -3,7 +3,6 @@ import fcntl
 import os
 import shutil
 import time
-from pathlib import Path
 
 from app import settings
 
@@ -14,13 +13,6 @@ def get_emqx_link():
     return f"{settings.pu_mqtt_http_type}://{settings.pu_mqtt_host}:{settings.pu_mqtt_api_port}"
 
 
-def get_directory_size(directory: str) -> int:
-    # analog du -sb
-    return sum(
-        f.stat().st_size for f in Path(directory).rglob("*") if f.is_file()
-    )
-
-
 def acquire_file_lock(file_lock: str):
     lock_fd = open(file_lock, "w")
     try:
@@ -0,0 +1,59 @@
+import uuid as uuid_pkg
+from datetime import datetime
+
+from sqlalchemy import Column, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlmodel import Field, SQLModel
+
+
+class FirmwareRollout(SQLModel, table=True):
+    """
+    Update of the auto updated Units of one Repo to its target version
+    """
+
+    __tablename__ = "firmware_rollouts"
+    __table_args__ = (
+        # one running rollout per Repo
+        Index(
+            "ix_firmware_rollouts_running_repo_uuid",
+            "repo_uuid",
+            unique=True,
+            postgresql_where=text("status = 'Running'"),
+        ),
+    )
+
+    uuid: uuid_pkg.UUID = Field(
+        primary_key=True,
+        nullable=False,
+        index=True,
+        default_factory=uuid_pkg.uuid4,
+    )
+
+    # Running, Completed or Error
+    status: str = Field(nullable=False)
+    # error that stopped the rollout
+    error: str = Field(nullable=True)
+
+    # version the units are updated to
+    target_commit: str = Field(nullable=True)
+    target_tag: str = Field(nullable=True)
+    # units per second sent to update
+    rate: float = Field(nullable=False)
+
+    count_total: int = Field(nullable=False, default=0)
+    count_success_update: int = Field(nullable=False, default=0)
+    count_error_update: int = Field(nullable=False, default=0)
+
+    create_datetime: datetime = Field(nullable=False)
+    last_update_datetime: datetime = Field(nullable=False)
+    finish_datetime: datetime = Field(nullable=True)
+
+    # to Repo link
+    repo_uuid: uuid_pkg.UUID = Field(
+        sa_column=Column(
+            UUID(as_uuid=True),
+            ForeignKey("repos.uuid", ondelete="CASCADE"),
+            nullable=False,
+            index=True,
+        )
+    )
@@ -22,6 +22,16 @@ class ClickhouseOrm:
             [item.to_dict() for item in data],
         )
 
+    def insert_columnar(self, table_name: str, data: dict[str, list]) -> int:
+        if len(data) == 0 or len(next(iter(data.values()))) == 0:
+            return 0
+
+        return self.client.execute(
+            f"INSERT INTO {table_name} ({', '.join(data.keys())}) VALUES",
+            list(data.values()),
+            columnar=True,
+        )
+
     def get(self, query: str, params: dict, result_model: type[T]) -> T | None:
         data = self.client.execute(query, params, with_column_types=True)
         return (
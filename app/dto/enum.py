@@ -174,6 +174,7 @@ class StaticRepoFileName(str, enum.Enum):
     SCHEMA = "schema.json"
     ENV_EXAMPLE = "env_example.json"
     ENV = "env.json"
+    DELTA_MANIFEST = "delta_manifest.json"
 
 
 @strawberry.enum
@@ -364,6 +365,24 @@ class DatasourceFormat(str, enum.Enum):
     TIME_SERIES = "timeseries"
 
 
+@strawberry.enum
+class DatasourceDownsampling(str, enum.Enum):
+    AVG = "avg"
+    MIN = "min"
+    MAX = "max"
+    LTTB = "lttb"
+    LAST = "last"
+
+
+class DeleteQueueEntity(str, enum.Enum):
+    """
+    Owner of ClickHouse rows waiting for deferred deletion
+    """
+
+    DATA_PIPE = "DataPipe"
+    UNIT_LOG = "UnitLog"
+
+
 @strawberry.enum
 class RepositoryRegistryStatus(str, enum.Enum):
     """
@@ -485,3 +504,24 @@ class DashboardStatus(str, enum.Enum):
     SUCCESS = "Success"
     PROCESSING = "Processing"
     ERROR = "Error"
+
+
+class FirmwareArchiveFormat(str, enum.Enum):
+    """
+    Firmware archive formats
+    """
+
+    ZIP = "zip"
+    TAR = "tar"
+    TGZ = "tgz"
+
+
+@strawberry.enum
+class FirmwareRolloutStatus(str, enum.Enum):
+    """
+    Types of state FirmwareRollout
+    """
+
+    RUNNING = "Running"
+    COMPLETED = "Completed"
+    ERROR = "Error"
@@ -34,6 +34,9 @@ from app.configs.utils import (
 )
 from app.dto.agent.abc import AgentBackend
 from app.dto.enum import GlobalPrefixTopic
+from app.repositories.firmware_rollout_repository import (
+    FirmwareRolloutRepository,
+)
 from app.repositories.grafana_repository import GrafanaRepository
 from app.routers.v1.endpoints import api_router
 from app.schemas.bot.dashboard_bot_router import DashboardBotRouter
@@ -51,6 +54,7 @@ from app.schemas.gql.mutation import Mutation
 from app.schemas.gql.query import Query
 from app.schemas.mqtt.topic import mqtt
 from app.schemas.pydantic.shared import Root
+from app.services.schema_update_notifier import schema_update_notifier
 from app.utils.utils import logo_to_console
 
 setup_logging()
@@ -161,6 +165,7 @@ async def run_webhook_bot(dp, bot):
 # Global variables to store tasks for proper cleanup
 _bot_tasks = []
 _mqtt_task = None
+_sync_future = None
 
 
 async def init_telegram_bot(dp, bot):
@@ -189,6 +194,23 @@ def sync_local_repository():
         repository_registry_service.sync_local_repository_storage()
 
 
+def log_sync_local_repository_error(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception():
+        logging.error(
+            "Sync of local repositories failed", exc_info=future.exception()
+        )
+
+
+def fail_interrupted_firmware_rollouts():
+    # rollouts run in threads of the backend, none survives a restart
+    with get_hand_session() as db:
+        count = FirmwareRolloutRepository(db).fail_running(
+            "Interrupted by backend restart"
+        )
+    if count:
+        logging.warning(f"Firmware rollouts interrupted by restart: {count}")
+
+
 async def run_mqtt_client(mqtt, redis_client):
     logging.info(
         f"Connect to mqtt server: {settings.pu_mqtt_host}:{settings.pu_mqtt_port}"
@@ -224,9 +246,19 @@ async def _lifespan(_app: FastAPI):
                 GrafanaRepository.configure_admin_dashboard_permissions,
             )
         await setup_backend_acl(redis)
+        # before the other workers start serving and launch new rollouts
+        await asyncio.get_running_loop().run_in_executor(
+            None, fail_interrupted_firmware_rollouts
+        )
         if settings.pu_ff_telegram_bot_enable:
             await init_telegram_bot(dp, bot)
-        sync_local_repository()
+        # registries are cloned in background, requests to the ones not
+        # ready yet get a syncing error
+        global _sync_future
+        _sync_future = asyncio.get_running_loop().run_in_executor(
+            None, sync_local_repository
+        )
+        _sync_future.add_done_callback(log_sync_local_repository_error)
 
         mqtt_run_lock.close()
 
@@ -259,6 +291,11 @@ async def _lifespan(_app: FastAPI):
     if init_lock:
         init_lock.close()
 
+    # pending schema updates are sent before the broker goes
+    await asyncio.get_running_loop().run_in_executor(
+        None, schema_update_notifier.flush
+    )
+
     await mqtt.mqtt_shutdown()
 
 
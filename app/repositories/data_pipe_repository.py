@@ -1,6 +1,8 @@
 import builtins
 import csv
+import math
 import os
+import time
 import uuid
 import zipfile
 from datetime import UTC, datetime
@@ -12,6 +14,7 @@ from fastapi.params import Query
 from pydantic import BaseModel
 from sqlmodel import Session
 
+from app import settings
 from app.configs.clickhouse import get_clickhouse_client
 from app.configs.db import get_session
 from app.configs.errors import DataPipeError
@@ -21,8 +24,33 @@ from app.dto.clickhouse.last_value import LastValue
 from app.dto.clickhouse.n_records import NRecords
 from app.dto.clickhouse.orm import ClickhouseOrm
 from app.dto.clickhouse.time_window import TimeWindow
-from app.dto.enum import ProcessingPolicyType
+from app.dto.enum import (
+    DatasourceDownsampling,
+    DeleteQueueEntity,
+    OrderByDate,
+    ProcessingPolicyType,
+)
+from app.repositories.delete_queue_repository import (
+    DeleteQueueRepository,
+    get_deleted_before_condition,
+)
 from app.schemas.pydantic.unit_node import DataPipeFilter
+from app.utils.utils import (
+    ensure_timezone_aware,
+    largest_triangle_three_buckets,
+)
+from app.validators.data_pipe import MAX_N_RECORDS_COUNT
+
+# 1d, 1h, 1m - from the coarsest one, see clickhouse/migrations/005
+ROLLUP_SIZES = (86400, 3600, 60)
+
+# a raw insert is expected to take less, see rebuild_rollups
+ROLLUP_REBUILD_MARGIN_MS = 5000
+
+
+def get_rollup_table_name(source_table: str, size: int) -> str:
+    suffix = {60: "1m", 3600: "1h", 86400: "1d"}[size]
+    return f"{source_table}_rollup_{suffix}"
 
 
 class DataPipeRepository:
@@ -36,8 +64,18 @@ class DataPipeRepository:
         self.client = client
         self.db = db
         self.orm = ClickhouseOrm(client)
+        self.delete_queue_repository = DeleteQueueRepository(client)
 
     def bulk_create(self, policy: ProcessingPolicyType, data: list[BaseModel]):
+        self.orm.insert(self._get_bulk_table_name(policy), data)
+
+    def bulk_create_columnar(
+        self, policy: ProcessingPolicyType, data: dict[str, builtins.list]
+    ):
+        self.orm.insert_columnar(self._get_bulk_table_name(policy), data)
+
+    @staticmethod
+    def _get_bulk_table_name(policy: ProcessingPolicyType) -> str:
         if policy == ProcessingPolicyType.LAST_VALUE:
             msg = "Bulk create for LastValue not available"
             raise DataPipeError(msg)
@@ -48,7 +86,7 @@ class DataPipeRepository:
             ProcessingPolicyType.TIME_WINDOW: "window_entry",
         }
 
-        self.orm.insert(table_names[policy], data)
+        return table_names[policy]
 
     @staticmethod
     def _get_type(policy: ProcessingPolicyType):
@@ -84,43 +122,15 @@ class DataPipeRepository:
     def list(
         self, filters: DataPipeFilter
     ) -> tuple[int, list[NRecords | TimeWindow | Aggregation | LastValue]]:
-        query = ""
-        match filters.type:
-            case ProcessingPolicyType.LAST_VALUE:
-                return self.list_postgres(filters=filters)
-            case ProcessingPolicyType.N_RECORDS:
-                query = """
-                    SELECT
-                        *
-                    FROM
-                    (
-                        SELECT
-                            *,
-                            row_number() OVER (PARTITION BY unit_node_uuid ORDER BY create_datetime ASC) AS id
-                        FROM
-                            n_last_entry
-                        WHERE
-                            unit_node_uuid = %(uuid)s
-                    ) AS numbered_entries
-                    WHERE
-                        unit_node_uuid = %(uuid)s
-                """
-
-            case ProcessingPolicyType.TIME_WINDOW:
-                query = f"select {TimeWindow.get_keys()} from window_entry where unit_node_uuid = %(uuid)s"
-            case ProcessingPolicyType.AGGREGATION:
-                query = f"select {Aggregation.get_keys()} from aggregation_entry where unit_node_uuid = %(uuid)s"
-
-        if filters.type == ProcessingPolicyType.AGGREGATION:
-            filters.aggregation_type = (
-                []
-                if filters.aggregation_type is None
-                else filters.aggregation_type
-            )
-
-            query = self._apply_aggregation_filters(query, filters)
-
-        query = self._apply_common_filters(query, filters)
+        if filters.type == ProcessingPolicyType.LAST_VALUE:
+            return self.list_postgres(filters=filters)
+
+        query = self._get_list_query(
+            filters,
+            self.delete_queue_repository.get_deleted_before(
+                DeleteQueueEntity.DATA_PIPE, filters.uuid
+            ),
+        )
 
         count = len(
             self.client.execute(
@@ -158,6 +168,422 @@ class DataPipeRepository:
 
         return count, unit_logs
 
+    def list_downsampled(
+        self,
+        filters: DataPipeFilter,
+        downsampling: DatasourceDownsampling,
+        max_data_points: int,
+        interval_ms: int | None = None,
+    ) -> builtins.list[tuple[int, str | float]]:
+        if filters.type == ProcessingPolicyType.LAST_VALUE:
+            msg = "Downsampling for LastValue not available"
+            raise DataPipeError(msg)
+
+        deleted_before = self.delete_queue_repository.get_deleted_before(
+            DeleteQueueEntity.DATA_PIPE, filters.uuid
+        )
+        query = self._get_list_query(filters, deleted_before)
+        params = {
+            "uuid": filters.uuid,
+            "search_string": f"%{filters.search_string}%",
+        }
+
+        time_column = (
+            "end_window_datetime"
+            if filters.type == ProcessingPolicyType.AGGREGATION
+            else "create_datetime"
+        )
+        value_column = (
+            "state"
+            if filters.type == ProcessingPolicyType.AGGREGATION
+            else "toFloat64OrNull(state)"
+        )
+
+        start_datetime, end_datetime = self._get_requested_range(filters)
+        if start_datetime is None:
+            count, min_time, max_time = self.client.execute(
+                f"""
+                    SELECT
+                        count(),
+                        toUnixTimestamp64Milli(min({time_column})),
+                        toUnixTimestamp64Milli(max({time_column}))
+                    FROM ({query})
+                """,
+                params,
+            )[0]
+            if count == 0:
+                return []
+            span_ms = max_time - min_time
+        else:
+            span_ms = (end_datetime - start_datetime).total_seconds() * 1000
+
+        bucket_seconds = max(
+            1,
+            math.ceil(span_ms / max_data_points / 1000),
+            math.ceil((interval_ms or 0) / 1000),
+        )
+
+        rollup_size = self._get_rollup_size(
+            filters, downsampling, bucket_seconds
+        )
+        # rollups still hold the rows waiting in the delete queue and the
+        # deleted ones until the next rebuild
+        if (
+            rollup_size
+            and deleted_before is None
+            and not self.is_rollup_stale(filters.uuid)
+        ):
+            return self._list_rollup(
+                filters,
+                downsampling,
+                rollup_size=rollup_size,
+                bucket_seconds=math.ceil(bucket_seconds / rollup_size)
+                * rollup_size,
+                start_datetime=start_datetime,
+                end_datetime=end_datetime,
+            )
+
+        bucket = f"toStartOfInterval({time_column}, INTERVAL {bucket_seconds} second)"
+
+        if downsampling == DatasourceDownsampling.LTTB:
+            return self._list_lttb(
+                query,
+                params,
+                bucket=bucket,
+                time_column=time_column,
+                value_column=value_column,
+                max_data_points=max_data_points,
+                is_desc=filters.order_by_create_date == OrderByDate.desc,
+            )
+
+        aggregate = {
+            DatasourceDownsampling.AVG: f"avg({value_column})",
+            DatasourceDownsampling.MIN: f"min({value_column})",
+            DatasourceDownsampling.MAX: f"max({value_column})",
+            DatasourceDownsampling.LAST: f"argMax(state, {time_column})",
+        }[downsampling]
+
+        query = f"""
+            SELECT
+                toUnixTimestamp({bucket}) * 1000 AS bucket_time,
+                {aggregate} AS value
+            FROM ({query})
+            GROUP BY bucket_time
+            HAVING value IS NOT NULL
+            ORDER BY bucket_time {(filters.order_by_create_date or OrderByDate.asc).value}
+        """
+        if filters.limit:
+            query += " LIMIT %(limit)s"
+            params["limit"] = filters.limit
+
+        return [tuple(row) for row in self.client.execute(query, params)]
+
+    @staticmethod
+    def _get_requested_range(
+        filters: DataPipeFilter,
+    ) -> tuple[datetime | None, datetime]:
+        now = datetime.now(UTC)
+        starts = [
+            ensure_timezone_aware(item)
+            for item in (
+                filters.start_create_datetime,
+                filters.start_agg_window_datetime,
+            )
+            if item
+        ]
+        if filters.relative_interval:
+            starts.append(now - filters.relative_interval)
+
+        ends = [
+            ensure_timezone_aware(item)
+            for item in (
+                filters.end_create_datetime,
+                filters.end_agg_window_datetime,
+            )
+            if item
+        ]
+
+        return (max(starts) if starts else None), min([now, *ends])
+
+    @staticmethod
+    def _get_rollup_size(
+        filters: DataPipeFilter,
+        downsampling: DatasourceDownsampling,
+        bucket_seconds: int,
+    ) -> int | None:
+        if (
+            not settings.pu_ff_datapipe_rollup_enable
+            or downsampling == DatasourceDownsampling.LTTB
+            or filters.type
+            not in (
+                ProcessingPolicyType.TIME_WINDOW,
+                ProcessingPolicyType.AGGREGATION,
+            )
+            # state ILIKE is not available on pre-aggregated rows
+            or (
+                filters.search_string
+                and filters.type != ProcessingPolicyType.AGGREGATION
+            )
+        ):
+            return None
+
+        for size in ROLLUP_SIZES:
+            if bucket_seconds >= size:
+                return size
+
+        return None
+
+    def _list_rollup(
+        self,
+        filters: DataPipeFilter,
+        downsampling: DatasourceDownsampling,
+        *,
+        rollup_size: int,
+        bucket_seconds: int,
+        start_datetime: datetime | None,
+        end_datetime: datetime,
+    ) -> builtins.list[tuple[int, str | float]]:
+        source_table = (
+            "aggregation_entry"
+            if filters.type == ProcessingPolicyType.AGGREGATION
+            else "window_entry"
+        )
+        aggregate = {
+            DatasourceDownsampling.AVG: "avgMerge(state_avg)",
+            DatasourceDownsampling.MIN: "min(state_min)",
+            DatasourceDownsampling.MAX: "max(state_max)",
+            DatasourceDownsampling.LAST: "argMaxMerge(state_last)",
+        }[downsampling]
+
+        query = f"""
+            SELECT
+                toUnixTimestamp(toStartOfInterval(bucket_datetime, INTERVAL {bucket_seconds} second)) * 1000 AS bucket_time,
+                {aggregate} AS value
+            FROM {get_rollup_table_name(source_table, rollup_size)}
+            WHERE unit_node_uuid = %(uuid)s AND bucket_datetime <= %(end)s
+        """
+        params = {
+            "uuid": filters.uuid,
+            "end": end_datetime.astimezone(UTC).replace(tzinfo=None),
+            "limit": filters.limit,
+        }
+
+        if start_datetime:
+            # the first rollup bucket may start before the requested range
+            query += f" AND bucket_datetime >= toStartOfInterval(toDateTime(%(start)s), INTERVAL {rollup_size} second)"
+            params["start"] = start_datetime.astimezone(UTC).replace(
+                tzinfo=None
+            )
+
+        if filters.type == ProcessingPolicyType.AGGREGATION:
+            aggregation_type = filters.aggregation_type
+            if isinstance(aggregation_type, Query):
+                aggregation_type = aggregation_type.default
+            if aggregation_type is not None:
+                if not aggregation_type:
+                    return []
+                query += " AND aggregation_type IN %(aggregation_type)s"
+                params["aggregation_type"] = tuple(aggregation_type)
+
+            if filters.time_window_size is not None:
+                query += " AND time_window_size = %(time_window_size)s"
+                params["time_window_size"] = filters.time_window_size
+
+        query += f"""
+            GROUP BY bucket_time
+            HAVING value IS NOT NULL
+            ORDER BY bucket_time {(filters.order_by_create_date or OrderByDate.asc).value}
+        """
+        if filters.limit:
+            query += " LIMIT %(limit)s"
+
+        return [tuple(row) for row in self.client.execute(query, params)]
+
+    def rebuild_rollups(self) -> None:
+        """
+        Rebuild of every rollup from raw rows in a shadow table swapped in
+        with REPLACE PARTITION. While a shadow is filled a second view writes
+        the rows inserted from its cutoff on into it, the raw rows before the
+        cutoff are re-inserted. Rows of an insert that races the swap itself
+        can still be lost or counted twice
+        """
+        rollups = []
+        for source_table in ("window_entry", "aggregation_entry"):
+            for size in ROLLUP_SIZES:
+                table_name = get_rollup_table_name(source_table, size)
+                view_query = self.client.execute(
+                    "SELECT as_select FROM system.tables WHERE database = currentDatabase() AND name = %(name)s",
+                    {"name": f"{table_name}_mv"},
+                )[0][0]
+                select, _, group_by = view_query.rpartition(" GROUP BY ")
+
+                # leftovers of an interrupted rebuild
+                self.client.execute(
+                    f"DROP VIEW IF EXISTS {table_name}_rebuild_mv"
+                )
+                self.client.execute(
+                    f"DROP TABLE IF EXISTS {table_name}_rebuild"
+                )
+                self.client.execute(
+                    f"CREATE TABLE {table_name}_rebuild AS {table_name}"
+                )
+
+                # the view exists well before the cutoff it starts from
+                cutoff = self._get_server_time() + ROLLUP_REBUILD_MARGIN_MS
+                self.client.execute(
+                    f"CREATE MATERIALIZED VIEW {table_name}_rebuild_mv TO {table_name}_rebuild AS"
+                    f" {select} WHERE toUnixTimestamp64Milli(insert_datetime) >= {cutoff}"
+                    f" GROUP BY {group_by}"
+                )
+                rollups.append((source_table, table_name, view_query, cutoff))
+
+        # raw inserts before the last cutoff are finished by then
+        time.sleep(
+            max(
+                rollups[-1][3]
+                + ROLLUP_REBUILD_MARGIN_MS
+                - self._get_server_time(),
+                0,
+            )
+            / 1000
+        )
+
+        for source_table, table_name, view_query, cutoff in rollups:
+            # the filter is applied to the raw table inside the view query
+            source_filter = (
+                f"toUnixTimestamp64Milli(insert_datetime) < {cutoff}"
+            )
+            self.client.execute(
+                f"INSERT INTO {table_name}_rebuild {view_query}"
+                " SETTINGS additional_table_filters = "
+                f"{{'{source_table}': '{source_filter}'}}"
+            )
+            self.client.execute(
+                f"ALTER TABLE {table_name} REPLACE PARTITION tuple() FROM {table_name}_rebuild"
+            )
+            self.client.execute(f"DROP VIEW {table_name}_rebuild_mv")
+            self.client.execute(f"DROP TABLE {table_name}_rebuild")
+
+        # rollups of the nodes deleted before the first cutoff are rebuilt
+        # without the deleted rows
+        self.client.execute(
+            f"DELETE FROM rollup_stale_node WHERE toUnixTimestamp64Milli(stale_datetime) < {rollups[0][3]}"
+        )
+
+    def _get_server_time(self) -> int:
+        return self.client.execute("SELECT toUnixTimestamp64Milli(now64(3))")[
+            0
+        ][0]
+
+    def _list_lttb(
+        self,
+        query: str,
+        params: dict,
+        *,
+        bucket: str,
+        time_column: str,
+        value_column: str,
+        max_data_points: int,
+        is_desc: bool,
+    ) -> builtins.list[tuple[int, float]]:
+        # M4 inside ClickHouse: first, last, min and max point of every bucket,
+        # then LTTB over at most 4 * max_data_points points
+        rows = self.client.execute(
+            f"""
+                SELECT
+                    min(point_time), argMin(point_value, point_time),
+                    max(point_time), argMax(point_value, point_time),
+                    argMin(point_time, point_value), min(point_value),
+                    argMax(point_time, point_value), max(point_value)
+                FROM
+                (
+                    SELECT
+                        toUnixTimestamp64Milli({time_column}) AS point_time,
+                        {value_column} AS point_value,
+                        {bucket} AS bucket
+                    FROM ({query})
+                )
+                WHERE point_value IS NOT NULL
+                GROUP BY bucket
+            """,
+            params,
+        )
+
+        points = sorted(
+            {
+                (row[index], row[index + 1])
+                for row in rows
+                for index in range(0, len(row), 2)
+            }
+        )
+        points = largest_triangle_three_buckets(points, max_data_points)
+
+        return points[::-1] if is_desc else points
+
+    def _get_list_query(
+        self, filters: DataPipeFilter, deleted_before: int | None = None
+    ) -> str:
+        hidden_rows = (
+            ""
+            if deleted_before is None
+            else f" AND toUnixTimestamp64Milli(insert_datetime) >= {deleted_before}"
+        )
+
+        query = ""
+        match filters.type:
+            case ProcessingPolicyType.N_RECORDS:
+                # reads at most MAX_N_RECORDS_COUNT rows backwards by the
+                # primary key, keeps max_count of the newest row and numbers
+                # the kept rows from 1
+                query = f"""
+                    SELECT
+                        *
+                    FROM
+                    (
+                        SELECT
+                            *,
+                            row_number() OVER (ORDER BY create_datetime ASC) AS id
+                        FROM
+                        (
+                            SELECT
+                                *,
+                                row_number() OVER (ORDER BY create_datetime DESC) AS position,
+                                argMax(max_count, create_datetime) OVER () AS current_max_count
+                            FROM
+                            (
+                                SELECT
+                                    {NRecords.get_keys()}
+                                FROM
+                                    n_last_entry
+                                WHERE
+                                    unit_node_uuid = %(uuid)s{hidden_rows}
+                                ORDER BY create_datetime DESC
+                                LIMIT {MAX_N_RECORDS_COUNT} BY unit_node_uuid
+                            )
+                        )
+                        WHERE
+                            position <= current_max_count
+                    ) AS numbered_entries
+                    WHERE
+                        unit_node_uuid = %(uuid)s
+                """
+
+            case ProcessingPolicyType.TIME_WINDOW:
+                query = f"select {TimeWindow.get_keys()} from window_entry where unit_node_uuid = %(uuid)s{hidden_rows}"
+            case ProcessingPolicyType.AGGREGATION:
+                query = f"select {Aggregation.get_keys()} from aggregation_entry where unit_node_uuid = %(uuid)s{hidden_rows}"
+
+        if filters.type == ProcessingPolicyType.AGGREGATION:
+            filters.aggregation_type = (
+                []
+                if filters.aggregation_type is None
+                else filters.aggregation_type
+            )
+
+            query = self._apply_aggregation_filters(query, filters)
+
+        return self._apply_common_filters(query, filters)
+
     def _apply_aggregation_filters(
         self, query: str, filters: DataPipeFilter
     ) -> str:
@@ -244,12 +670,87 @@ class DataPipeRepository:
 
         return query
 
-    def bulk_delete(self, uuids: builtins.list[str]) -> None:
-        tables = ["n_last_entry", "window_entry", "aggregation_entry"]
-        uuid_list = ", ".join([f"'{uuid}'" for uuid in uuids])
-        for table_name in tables:
-            query = f"ALTER TABLE {table_name} DELETE WHERE unit_node_uuid IN ({uuid_list})"
-            self.client.execute(query)
+    def trim_n_records(self) -> int:
+        # create_datetime of the oldest row to keep for every overflowed node
+        boundaries = self.client.execute(
+            """
+                WITH overflowed AS (
+                    SELECT
+                        unit_node_uuid,
+                        argMax(max_count, create_datetime) AS current_max_count
+                    FROM
+                        n_last_entry
+                    GROUP BY unit_node_uuid
+                    HAVING count() > current_max_count
+                )
+                SELECT
+                    entry.unit_node_uuid,
+                    toUnixTimestamp64Milli(entry.create_datetime)
+                FROM
+                (
+                    SELECT
+                        unit_node_uuid,
+                        create_datetime,
+                        row_number() OVER (
+                            PARTITION BY unit_node_uuid
+                            ORDER BY create_datetime DESC
+                        ) AS position
+                    FROM
+                        n_last_entry
+                    WHERE
+                        unit_node_uuid IN (
+                            SELECT unit_node_uuid FROM overflowed
+                        )
+                ) AS entry
+                INNER JOIN overflowed USING unit_node_uuid
+                WHERE
+                    entry.position = overflowed.current_max_count
+            """
+        )
+        if not boundaries:
+            return 0
+
+        # one lightweight delete for all nodes, rows equal to the boundary stay
+        condition = get_deleted_before_condition(
+            "unit_node_uuid",
+            dict(boundaries),
+            "create_datetime",
+        )
+        self.client.execute(f"DELETE FROM n_last_entry WHERE {condition}")
+
+        return len(boundaries)
+
+    def bulk_delete(self, uuids: builtins.list[uuid.UUID]) -> None:
+        self.delete_queue_repository.enqueue(
+            DeleteQueueEntity.DATA_PIPE, uuids
+        )
+
+    def delete_queued(self, cutoffs: dict[uuid.UUID, int]) -> None:
+        """
+        One lightweight delete per table for a batch of the delete queue
+        """
+        condition = get_deleted_before_condition("unit_node_uuid", cutoffs)
+        for table_name in (
+            "n_last_entry",
+            "window_entry",
+            "aggregation_entry",
+        ):
+            self.client.execute(f"DELETE FROM {table_name} WHERE {condition}")
+
+        # rollups are not rebuilt per node, reads of these nodes use the raw
+        # rows until the next full rebuild
+        self.client.execute(
+            "INSERT INTO rollup_stale_node (unit_node_uuid) VALUES",
+            [{"unit_node_uuid": uuid} for uuid in cutoffs],
+        )
+
+    def is_rollup_stale(self, unit_node_uuid: uuid.UUID) -> bool:
+        return bool(
+            self.client.execute(
+                "SELECT 1 FROM rollup_stale_node WHERE unit_node_uuid = %(uuid)s LIMIT 1",
+                {"uuid": unit_node_uuid},
+            )
+        )
 
     @staticmethod
     def models_to_csv(
@@ -0,0 +1,130 @@
+import uuid as uuid_pkg
+
+from clickhouse_driver import Client
+from fastapi import Depends
+
+from app.configs.clickhouse import get_clickhouse_client
+from app.dto.enum import DeleteQueueEntity
+
+DELETE_QUEUE_BATCH_SIZE = 1000
+
+
+def get_deleted_before_condition(
+    uuid_column: str,
+    cutoffs: dict[uuid_pkg.UUID, int],
+    datetime_column: str = "insert_datetime",
+    inclusive: bool = False,
+) -> str:
+    """
+    Rows inserted before their uuid was queued, cutoffs are unix milliseconds.
+    Rows of the same millisecond as the cutoff stay unless inclusive, a
+    re-insert right after the enqueue is not lost
+    """
+    keys = ", ".join(f"'{uuid}'" for uuid in cutoffs)
+    values = ", ".join(str(cutoff) for cutoff in cutoffs.values())
+
+    return (
+        f"{uuid_column} IN ({keys}) AND toUnixTimestamp64Milli({datetime_column})"
+        f" {'<=' if inclusive else '<'} transform(toString({uuid_column}), [{keys}], [{values}], 0)"
+    )
+
+
+class DeleteQueueRepository:
+    client: Client
+
+    def __init__(
+        self, client: Client = Depends(get_clickhouse_client)
+    ) -> None:
+        self.client = client
+
+    def enqueue(
+        self, entity: DeleteQueueEntity, uuids: list[uuid_pkg.UUID]
+    ) -> int:
+        if not uuids:
+            return 0
+
+        return self.client.execute(
+            "INSERT INTO delete_queue (entity, uuid) VALUES",
+            [{"entity": entity.value, "uuid": uuid} for uuid in uuids],
+        )
+
+    def get_deleted_before(
+        self, entity: DeleteQueueEntity, uuid: uuid_pkg.UUID
+    ) -> int | None:
+        rows = self.client.execute(
+            """
+                SELECT
+                    toUnixTimestamp64Milli(max(queued_datetime))
+                FROM
+                    delete_queue
+                WHERE
+                    entity = %(entity)s AND uuid = %(uuid)s
+                HAVING count() > 0
+            """,
+            {"entity": entity.value, "uuid": uuid},
+        )
+
+        return rows[0][0] if rows else None
+
+    def list_pending(
+        self, limit: int = DELETE_QUEUE_BATCH_SIZE
+    ) -> dict[DeleteQueueEntity, dict[uuid_pkg.UUID, int]]:
+        rows = self.client.execute(
+            """
+                SELECT
+                    entity,
+                    uuid,
+                    toUnixTimestamp64Milli(max(queued_datetime)) AS cutoff
+                FROM
+                    delete_queue
+                GROUP BY entity, uuid
+                ORDER BY min(queued_datetime)
+                LIMIT %(limit)s
+            """,
+            {"limit": limit},
+        )
+
+        pending = {}
+        for entity, uuid, cutoff in rows:
+            pending.setdefault(DeleteQueueEntity(entity), {})[uuid] = cutoff
+
+        return pending
+
+    def remove(
+        self, entity: DeleteQueueEntity, cutoffs: dict[uuid_pkg.UUID, int]
+    ) -> None:
+        # entries queued while the batch was processed stay in the queue
+        condition = get_deleted_before_condition(
+            "uuid", cutoffs, "queued_datetime", inclusive=True
+        )
+        self.client.execute(
+            f"DELETE FROM delete_queue WHERE entity = %(entity)s AND {condition}",
+            {"entity": entity.value},
+        )
+
+    def get_stats(self) -> tuple[int, int, int, int]:
+        """
+        Queue depth, queue lag, pending mutations and mutation lag in seconds
+        """
+        queue_depth, queue_lag = self.client.execute(
+            """
+                SELECT
+                    uniqExact(entity, uuid),
+                    if(count() = 0, 0, dateDiff('second', min(queued_datetime), now64(3)))
+                FROM
+                    delete_queue
+            """
+        )[0]
+        mutation_count, mutation_lag = self.client.execute(
+            """
+                SELECT
+                    count(),
+                    if(count() = 0, 0, dateDiff('second', min(create_time), now()))
+                FROM
+                    system.mutations
+                WHERE
+                    database = currentDatabase() AND NOT is_done
+            """
+        )[0]
+
+        return queue_depth, queue_lag, mutation_count, mutation_lag
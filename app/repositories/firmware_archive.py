@@ -0,0 +1,444 @@
+import contextlib
+import fcntl
+import hashlib
+import io
+import itertools
+import json
+import os
+import struct
+import tarfile
+import time
+import uuid as uuid_pkg
+import zipfile
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import BinaryIO
+
+from prometheus_client import Counter, Gauge
+
+from app import settings
+from app.dto.enum import FirmwareArchiveFormat
+from app.utils.parallel_deflate import ParallelDeflate, get_window_bits
+
+# bump when the content of base archives changes
+ARCHIVE_VERSION = 3
+
+CHUNK_SIZE = 2**16
+
+# meta of a base archive is written after it, followed by its length
+META_SIZE = struct.Struct(">Q")
+
+cache_requests = Counter(
+    "pepeunit_firmware_archive_cache_requests",
+    "Firmware base archive lookups",
+    ["format", "result"],
+)
+cache_size = Gauge(
+    "pepeunit_firmware_archive_cache_bytes",
+    "Size of the firmware base archives on disk",
+    multiprocess_mode="max",
+)
+
+
+@dataclass
+class ArchiveEntry:
+    # posix path from the archive root, data is None for directories
+    name: str
+    data: bytes | None
+    mode: int
+    mtime: float
+
+
+@dataclass
+class FirmwareArchive:
+    """
+    Cached base archive followed by the per unit tail
+    """
+
+    base: BinaryIO | None
+    prefix_size: int
+    tail: bytes
+
+    @property
+    def size(self) -> int:
+        return self.prefix_size + len(self.tail)
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        try:
+            if self.base is not None:
+                # positional reads, copies of one archive share the offset
+                offset = 0
+                while offset < self.prefix_size:
+                    chunk = os.pread(
+                        self.base.fileno(),
+                        min(CHUNK_SIZE, self.prefix_size - offset),
+                        offset,
+                    )
+                    yield chunk
+                    offset += len(chunk)
+            yield self.tail
+        finally:
+            self.close()
+
+    def share(self) -> "FirmwareArchive":
+        # own descriptor, each copy is streamed and closed on its own
+        base = None
+        if self.base is not None:
+            base = os.fdopen(os.dup(self.base.fileno()), "rb")
+        return FirmwareArchive(base, self.prefix_size, self.tail)
+
+    def write_to(self, path: str) -> None:
+        with open(path, "wb") as f:
+            for chunk in self.iter_chunks():
+                f.write(chunk)
+
+    def close(self) -> None:
+        if self.base is not None:
+            self.base.close()
+
+
+class BaseReader:
+    """
+    Base archive without the meta after it, positional reads leave the
+    offset of the shared descriptor alone
+    """
+
+    def __init__(self, f: BinaryIO, size: int) -> None:
+        self.f = f
+        self.size = size
+        self.position = 0
+
+    def seek(self, pos: int, whence: int = io.SEEK_SET) -> int:
+        start = {io.SEEK_SET: 0, io.SEEK_CUR: self.position}.get(
+            whence, self.size
+        )
+        self.position = start + pos
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        left = max(self.size - self.position, 0)
+        size = left if size < 0 else min(size, left)
+        data = os.pread(self.f.fileno(), size, self.position)
+        self.position += len(data)
+        return data
+
+
+class DeflateWriter:
+    """
+    Compresses the tar as it is written, checksums are kept to continue the
+    stream with the per unit tail
+    """
+
+    def __init__(self, f: BinaryIO, wbits: int, level: int) -> None:
+        self.f = f
+        self.producer = ParallelDeflate(wbits, level)
+
+    def write(self, data: bytes) -> int:
+        self.f.write(self.producer.compress(data))
+        return len(data)
+
+    def tell(self) -> int:
+        return self.producer.raw_size
+
+    def finish(self) -> dict:
+        # byte aligned and not final, a new deflate stream can follow
+        self.f.write(self.producer.flush(zlib.Z_FULL_FLUSH))
+        return {
+            "raw_size": self.producer.raw_size,
+            "adler32": self.producer.adler32,
+            "crc32": self.producer.crc32,
+        }
+
+
+class OffsetBuffer(io.BytesIO):
+    """
+    Positions continue after the base archive it is appended to
+    """
+
+    def __init__(self, offset: int) -> None:
+        super().__init__()
+        self.offset = offset
+
+    def tell(self) -> int:
+        return super().tell() + self.offset
+
+    def seek(self, pos: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos -= self.offset
+        return super().seek(pos, whence) + self.offset
+
+
+def get_tar_info(entry: ArchiveEntry) -> tarfile.TarInfo:
+    info = tarfile.TarInfo("./" + entry.name if entry.name != "." else ".")
+    info.mode = entry.mode
+    info.mtime = int(entry.mtime)
+    if entry.data is None:
+        info.type = tarfile.DIRTYPE
+    else:
+        info.size = len(entry.data)
+    return info
+
+
+def get_zip_info(entry: ArchiveEntry) -> zipfile.ZipInfo:
+    # zip can not store dates before 1980
+    date_time = datetime.fromtimestamp(
+        max(entry.mtime, 315532800), UTC
+    ).timetuple()[:6]
+
+    if entry.data is None:
+        info = zipfile.ZipInfo(f"{entry.name}/", date_time)
+        info.external_attr = (0o40000 | entry.mode) << 16 | 0x10
+    else:
+        info = zipfile.ZipInfo(entry.name, date_time)
+        info.external_attr = (0o100000 | entry.mode) << 16
+        info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def add_tar_entries(tar: tarfile.TarFile, entries: Iterable[ArchiveEntry]):
+    for entry in entries:
+        tar.addfile(
+            get_tar_info(entry),
+            io.BytesIO(entry.data) if entry.data is not None else None,
+        )
+
+
+def write_base_archive(
+    f: BinaryIO,
+    archive_format: FirmwareArchiveFormat,
+    entries: Iterable[ArchiveEntry],
+    wbits: int,
+    level: int,
+) -> dict:
+    """
+    Archive without the end records, returns what the tail needs to
+    continue it
+    """
+    # entries carry the commit time, with it on the root too every build of
+    # one key is byte identical
+    entries = iter(entries)
+    first = next(entries, None)
+    if first is not None:
+        entries = itertools.chain([first], entries)
+    root = ArchiveEntry(".", None, 0o755, first.mtime if first else 0)
+
+    match archive_format:
+        case FirmwareArchiveFormat.ZIP:
+            with zipfile.ZipFile(f, "w") as archive:
+                for entry in entries:
+                    archive.writestr(get_zip_info(entry), entry.data or b"")
+            f.seek(0)
+            return {"prefix_size": zipfile.ZipFile(f).start_dir}
+
+        case FirmwareArchiveFormat.TAR:
+            # end of archive blocks are written with the tail
+            tar = tarfile.open(fileobj=f, mode="w")
+            add_tar_entries(tar, [root, *entries])
+            return {"prefix_size": tar.offset}
+
+        case FirmwareArchiveFormat.TGZ:
+            writer = DeflateWriter(f, wbits, level)
+            tar = tarfile.open(fileobj=writer, mode="w")
+            add_tar_entries(tar, [root, *entries])
+            meta = writer.finish()
+            meta["prefix_size"] = f.tell()
+            return meta
+
+
+def build_tail(
+    base: BinaryIO | None,
+    meta: dict,
+    archive_format: FirmwareArchiveFormat,
+    files: dict[str, bytes],
+    wbits: int,
+    level: int,
+) -> bytes:
+    entries = [
+        ArchiveEntry(name, data, 0o644, time.time())
+        for name, data in files.items()
+    ]
+
+    if archive_format == FirmwareArchiveFormat.ZIP:
+        buffer = OffsetBuffer(meta["prefix_size"])
+        with zipfile.ZipFile(buffer, "w") as archive:
+            if base is not None:
+                # central directory lists the base entries before the new ones
+                archive.filelist.extend(
+                    zipfile.ZipFile(
+                        BaseReader(base, meta["base_size"])
+                    ).infolist()
+                )
+            for entry in entries:
+                archive.writestr(get_zip_info(entry), entry.data)
+        return buffer.getvalue()
+
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        add_tar_entries(tar, entries)
+    tail = buffer.getvalue()
+
+    if archive_format == FirmwareArchiveFormat.TAR:
+        return tail
+
+    producer = zlib.compressobj(level=level, wbits=-get_window_bits(wbits))
+    data = producer.compress(tail) + producer.flush()
+
+    if 9 <= wbits <= 15:
+        data += struct.pack(">I", zlib.adler32(tail, meta["adler32"]))
+    elif wbits >= 25:
+        data += struct.pack(
+            "<II",
+            zlib.crc32(tail, meta["crc32"]),
+            (meta["raw_size"] + len(tail)) & 0xFFFFFFFF,
+        )
+    return data
+
+
+class FirmwareArchiveCache:
+    """
+    Base archives of a firmware on disk by content address, least recently
+    used ones are removed over the disk budget
+    """
+
+    def __init__(
+        self,
+        path: str = settings.pu_firmware_cache_path,
+        max_size: int = settings.pu_firmware_cache_size,
+    ) -> None:
+        self.path = path
+        self.max_size = max_size
+
+    @staticmethod
+    def get_key(*parts) -> str:
+        return hashlib.sha256(
+            json.dumps([ARCHIVE_VERSION, *parts], default=str).encode()
+        ).hexdigest()
+
+    def get_archive(
+        self,
+        key: str,
+        archive_format: FirmwareArchiveFormat,
+        get_entries: Callable[[], Iterable[ArchiveEntry]],
+        files: dict[str, bytes],
+        wbits: int = 15,
+        level: int = 9,
+    ) -> FirmwareArchive:
+        cached = self._open(key)
+        cache_requests.labels(
+            archive_format.value, "hit" if cached else "miss"
+        ).inc()
+
+        base, meta = cached or self._build(
+            key, archive_format, get_entries, wbits, level
+        )
+        return FirmwareArchive(
+            base,
+            meta["prefix_size"],
+            build_tail(base, meta, archive_format, files, wbits, level),
+        )
+
+    def get_path(self, key: str) -> str:
+        return f"{self.path}/{key}.base"
+
+    def _open(self, key: str) -> tuple[BinaryIO, dict] | None:
+        """
+        Base and its meta come from one file, a reader never pairs them
+        from different builds
+        """
+        path = self.get_path(key)
+        try:
+            base = open(path, "rb")
+        except OSError:
+            return None
+
+        try:
+            size = os.fstat(base.fileno()).st_size
+            (meta_size,) = META_SIZE.unpack(
+                os.pread(base.fileno(), META_SIZE.size, size - META_SIZE.size)
+            )
+            meta_offset = size - META_SIZE.size - meta_size
+            meta = json.loads(os.pread(base.fileno(), meta_size, meta_offset))
+        except (OSError, ValueError, struct.error):
+            base.close()
+            return None
+        meta["base_size"] = meta_offset
+
+        # last use time orders the eviction
+        with contextlib.suppress(OSError):
+            os.utime(path)
+
+        return base, meta
+
+    def _build(
+        self,
+        key: str,
+        archive_format: FirmwareArchiveFormat,
+        get_entries: Callable[[], Iterable[ArchiveEntry]],
+        wbits: int,
+        level: int,
+    ) -> tuple[BinaryIO, dict]:
+        os.makedirs(self.path, exist_ok=True)
+
+        # one build of a base at a time across threads and workers, the
+        # ones waiting get it from the disk
+        with open(f"{self.path}/{key}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            cached = self._open(key)
+            if cached:
+                return cached
+
+            tmp_path = f"{self.path}/{key}.{uuid_pkg.uuid4()}.tmp"
+            try:
+                with open(tmp_path, "w+b") as f:
+                    meta = write_base_archive(
+                        f, archive_format, get_entries(), wbits, level
+                    )
+                    f.seek(0, io.SEEK_END)
+                    meta["base_size"] = f.tell()
+
+                    data = json.dumps(meta).encode()
+                    f.write(data + META_SIZE.pack(len(data)))
+                base = open(tmp_path, "rb")
+                os.replace(tmp_path, self.get_path(key))
+            finally:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(tmp_path)
+
+        self.evict(keep=key)
+
+        return base, meta
+
+    def evict(self, keep: str | None = None) -> None:
+        entries = []
+        for name in os.listdir(self.path):
+            if not name.endswith(".base"):
+                continue
+            with contextlib.suppress(OSError):
+                stat = os.stat(f"{self.path}/{name}")
+                entries.append(
+                    (stat.st_mtime, stat.st_size, name.removesuffix(".base"))
+                )
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, key in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            if key == keep:
+                continue
+
+            # readers already holding the base keep reading it
+            for suffix in (".base", ".lock"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(f"{self.path}/{key}{suffix}")
+            total_size -= size
+
+        cache_size.set(total_size)
+
+
+firmware_archive_cache = FirmwareArchiveCache()
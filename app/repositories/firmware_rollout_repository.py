@@ -0,0 +1,71 @@
+import datetime
+import uuid as uuid_pkg
+
+from fastapi import Depends
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from app.configs.db import get_session
+from app.configs.errors import RepoError
+from app.domain.firmware_rollout_model import FirmwareRollout
+from app.dto.enum import FirmwareRolloutStatus
+from app.repositories.base_repository import BaseRepository
+
+
+class FirmwareRolloutRepository(BaseRepository):
+    def __init__(self, db: Session = Depends(get_session)) -> None:
+        super().__init__(FirmwareRollout, db)
+
+    def create(self, obj: FirmwareRollout) -> FirmwareRollout:
+        try:
+            return super().create(obj)
+        except IntegrityError:
+            # a second rollout was created between the check and the insert
+            self.db.rollback()
+            self.is_valid_no_running(obj.repo_uuid)
+            raise
+
+    def get_running_by_repo(
+        self, repo_uuid: uuid_pkg.UUID
+    ) -> FirmwareRollout | None:
+        return (
+            self.db.query(FirmwareRollout)
+            .filter(
+                FirmwareRollout.repo_uuid == repo_uuid,
+                FirmwareRollout.status == FirmwareRolloutStatus.RUNNING,
+            )
+            .first()
+        )
+
+    def is_valid_no_running(self, repo_uuid: uuid_pkg.UUID) -> None:
+        if self.get_running_by_repo(repo_uuid):
+            msg = "Firmware rollout of this Repo is already running"
+            raise RepoError(msg)
+
+    def get_last_by_repo(
+        self, repo_uuid: uuid_pkg.UUID
+    ) -> FirmwareRollout | None:
+        return (
+            self.db.query(FirmwareRollout)
+            .filter(FirmwareRollout.repo_uuid == repo_uuid)
+            .order_by(FirmwareRollout.create_datetime.desc())
+            .first()
+        )
+
+    def fail_running(self, error: str) -> int:
+        now = datetime.datetime.now(datetime.UTC)
+        count = (
+            self.db.query(FirmwareRollout)
+            .filter(FirmwareRollout.status == FirmwareRolloutStatus.RUNNING)
+            .update(
+                {
+                    FirmwareRollout.status: FirmwareRolloutStatus.ERROR,
+                    FirmwareRollout.error: error,
+                    FirmwareRollout.last_update_datetime: now,
+                    FirmwareRollout.finish_datetime: now,
+                },
+                synchronize_session=False,
+            )
+        )
+        self.db.commit()
+        return count
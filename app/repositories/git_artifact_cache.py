@@ -0,0 +1,67 @@
+import threading
+from collections.abc import Callable
+
+from cachetools import LRUCache
+from prometheus_client import Counter, Gauge
+
+from app import settings
+from app.services.validators import is_valid_json
+
+cache_requests = Counter(
+    "pepeunit_git_artifact_cache_requests",
+    "Parsed git artifact lookups",
+    ["kind", "result"],
+)
+cache_size = Gauge(
+    "pepeunit_git_artifact_cache_bytes",
+    "Raw size of the cached git artifacts",
+    multiprocess_mode="livesum",
+)
+
+
+class GitArtifactCache:
+    """
+    Parsed JSON artifacts, content of a commit or of a releases hash never
+    changes. Bounded by the raw size of the cached files
+    """
+
+    def __init__(
+        self, maxsize: int = settings.pu_git_artifact_cache_size
+    ) -> None:
+        self.cache: LRUCache[tuple, tuple[int, dict]] = LRUCache(
+            maxsize, getsizeof=lambda item: item[0]
+        )
+        self.lock = threading.Lock()
+
+    def get(
+        self,
+        key: tuple,
+        name: str,
+        loader: Callable[[], bytes | str],
+    ) -> dict:
+        """
+        Returned dicts are shared between callers and must not be mutated
+        """
+        kind = key[0]
+
+        with self.lock:
+            item = self.cache.get(key)
+
+        if item is not None:
+            cache_requests.labels(kind, "hit").inc()
+            return item[1]
+
+        cache_requests.labels(kind, "miss").inc()
+
+        raw = loader()
+        data = is_valid_json(raw, name)
+
+        with self.lock:
+            if len(raw) <= self.cache.maxsize:
+                self.cache[key] = (len(raw), data)
+            cache_size.set(self.cache.currsize)
+
+        return data
+
+
+git_artifact_cache = GitArtifactCache()
@@ -0,0 +1,123 @@
+import threading
+
+from git import Repo as GitRepo
+
+
+class GitObjectReader:
+    """
+    Long-lived git cat-file --batch and --batch-check of one physic
+    repository, requests of all threads go through them one by one
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.repo: GitRepo | None = None
+
+    def read(self, rev: str) -> bytes | None:
+        """
+        Object data by any rev, `commit:path` for a file
+        """
+        result = self._request("get_object_data", rev)
+        return result[3] if result else None
+
+    def exists(self, rev: str) -> bool:
+        return self._request("get_object_header", rev) is not None
+
+    def read_commit(self, rev: str) -> tuple[str, int] | None:
+        """
+        Tree id and commit time
+        """
+        data = self.read(f"{rev}^{{commit}}")
+        if data is None:
+            return None
+
+        headers = dict(
+            line.split(" ", 1)
+            for line in data.split(b"\n\n", 1)[0].decode().splitlines()
+            if " " in line
+        )
+        # committer: name <email> timestamp timezone
+        return headers["tree"], int(headers["committer"].rsplit(" ", 2)[1])
+
+    def list_tree(self, tree_id: str) -> list[tuple[int, str, str]]:
+        """
+        Mode, name and object id of every entry of one tree
+        """
+        data = self.read(tree_id) or b""
+
+        entries = []
+        position = 0
+        while position < len(data):
+            space = data.index(b" ", position)
+            end = data.index(b"\0", space)
+            entries.append(
+                (
+                    int(data[position:space], 8),
+                    data[space + 1 : end].decode(),
+                    data[end + 1 : end + 21].hex(),
+                )
+            )
+            position = end + 21
+        return entries
+
+    def _request(self, method: str, rev: str) -> tuple | None:
+        with self.lock:
+            for attempt in range(2):
+                try:
+                    return getattr(self._get_repo().git, method)(rev)
+                except ValueError:
+                    # missing or ambiguous rev, cat-file stays in sync
+                    return None
+                except OSError:
+                    # cat-file exited, restart it once
+                    self._close()
+                    if attempt:
+                        raise
+            return None
+
+    def close(self) -> None:
+        with self.lock:
+            self._close()
+
+    def _get_repo(self) -> GitRepo:
+        if self.repo is None:
+            self.repo = GitRepo(self.path)
+        return self.repo
+
+    def _close(self) -> None:
+        if self.repo is not None:
+            self.repo.close()
+            self.repo = None
+
+
+class GitObjectReaderPool:
+    """
+    One reader per physic repository, replaced after every sync
+    """
+
+    def __init__(self) -> None:
+        self.readers: dict[str, tuple[object, GitObjectReader]] = {}
+        self.lock = threading.Lock()
+
+    def get(self, path: str, generation: object) -> GitObjectReader:
+        with self.lock:
+            item = self.readers.get(path)
+            if item is not None and item[0] is generation:
+                return item[1]
+
+            if item is not None:
+                item[1].close()
+
+            reader = GitObjectReader(path)
+            self.readers[path] = (generation, reader)
+            return reader
+
+    def close(self, path: str) -> None:
+        with self.lock:
+            item = self.readers.pop(path, None)
+        if item is not None:
+            item[1].close()
+
+
+git_object_readers = GitObjectReaderPool()
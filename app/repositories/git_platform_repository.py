@@ -1,14 +1,56 @@
+import hashlib
+import json
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO
 
 import httpx
+from cachetools import LRUCache, TTLCache
+from prometheus_client import Counter
 
 from app import settings
 from app.configs.errors import GitPlatformClientError
 from app.domain.repository_registry_model import RepositoryRegistry
+from app.dto.enum import GitPlatform
 from app.schemas.pydantic.repository_registry import Credentials
 
+PER_PAGE = 100
+
+platform_requests = Counter(
+    "pepeunit_git_platform_requests",
+    "Requests to the api of git platforms",
+    ["platform", "status"],
+)
+
+# scheme, host, port -> keep-alive client shared by all threads
+http_clients: dict[tuple, httpx.Client] = {}
+
+# request -> (etag, response), answered again on 304 Not Modified
+etag_responses: LRUCache = LRUCache(maxsize=1024)
+
+# gitlab project path -> id
+repository_ids: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+
+cache_lock = threading.Lock()
+
+
+def get_http_client(url: httpx.URL) -> httpx.Client:
+    key = (url.scheme, url.host, url.port)
+    with cache_lock:
+        if key not in http_clients:
+            http_clients[key] = httpx.Client(
+                timeout=settings.pu_git_platform_timeout,
+                limits=httpx.Limits(
+                    max_connections=20, max_keepalive_connections=10
+                ),
+            )
+        return http_clients[key]
+
 
 class GitPlatformClientABC(ABC):
+    platform: GitPlatform
+
     def __init__(
         self,
         repository_registry: RepositoryRegistry,
@@ -17,6 +59,152 @@ class GitPlatformClientABC(ABC):
         self.repository_registry = repository_registry
         self.credentials = credentials
 
+    def _get(
+        self,
+        url: str,
+        headers: dict | None = None,
+        params: dict | None = None,
+    ) -> httpx.Response:
+        """
+        GET on the pooled client, a response with ETag is stored and sent
+        back as If-None-Match, unchanged data costs a 304
+        """
+        url = httpx.URL(url, params=params)
+        key = hashlib.sha256(
+            json.dumps([str(url), headers], sort_keys=True).encode()
+        ).hexdigest()
+        with cache_lock:
+            cached = etag_responses.get(key)
+
+        request_headers = dict(headers or {})
+        if cached:
+            request_headers["If-None-Match"] = cached[0]
+
+        try:
+            response = get_http_client(url).get(url, headers=request_headers)
+        except httpx.HTTPError as err:
+            platform_requests.labels(self.platform.value, "error").inc()
+            msg = f"External API is not available: {type(err).__name__}"
+            raise GitPlatformClientError(msg) from err
+
+        platform_requests.labels(
+            self.platform.value, str(response.status_code)
+        ).inc()
+
+        if response.status_code == httpx.codes.NOT_MODIFIED and cached:
+            return cached[1]
+
+        if (
+            response.status_code == httpx.codes.OK
+            and "ETag" in response.headers
+        ):
+            with cache_lock:
+                etag_responses[key] = (response.headers["ETag"], response)
+
+        return response
+
+    def _get_pages(self, url: str, headers: dict | None = None) -> list:
+        """
+        All items of a paginated list, pages after the first one are
+        fetched concurrently when the platform reports their count
+        """
+
+        def get_page(page: int) -> httpx.Response:
+            return self._get(
+                url, headers, {"page": page, "per_page": PER_PAGE}
+            )
+
+        response = get_page(1)
+        items = self._get_items(response)
+
+        page_count = self._get_page_count(response)
+        if page_count is None:
+            # no total from the platform, pages are read up to a short one
+            page = 1
+            while len(items) == page * PER_PAGE:
+                page += 1
+                items.extend(self._get_items(get_page(page)))
+
+        elif page_count > 1:
+            with ThreadPoolExecutor(
+                max_workers=settings.pu_git_platform_page_workers
+            ) as executor:
+                for response in executor.map(
+                    get_page, range(2, page_count + 1)
+                ):
+                    items.extend(self._get_items(response))
+
+        return items
+
+    @staticmethod
+    def _get_items(response: httpx.Response) -> list:
+        items = response.json()
+        if not isinstance(items, list):
+            msg = "Invalid Credentials"
+            raise GitPlatformClientError(msg)
+        return items
+
+    def download(
+        self, url: str, f: BinaryIO, max_size: int | None = None
+    ) -> None:
+        """
+        Streams a release asset, credentials are sent only to the host of
+        the platform. Assets over max_size are aborted
+        """
+        headers = self._get_download_headers(url)
+        try:
+            with get_http_client(httpx.URL(url)).stream(
+                "GET",
+                url,
+                headers=headers,
+                # custom auth headers are kept on redirects by httpx
+                follow_redirects=not headers,
+            ) as response:
+                platform_requests.labels(
+                    self.platform.value, str(response.status_code)
+                ).inc()
+                response.raise_for_status()
+
+                # the declared length is checked first, the body is counted
+                # anyway since the header is optional
+                msg = f"Release asset is larger than {max_size} bytes"
+                size = int(response.headers.get("Content-Length", 0))
+                if max_size is not None and size > max_size:
+                    raise GitPlatformClientError(msg)
+
+                size = 0
+                for chunk in response.iter_bytes():
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise GitPlatformClientError(msg)
+                    f.write(chunk)
+        except httpx.HTTPError as err:
+            msg = f"Release asset is not available: {type(err).__name__}"
+            raise GitPlatformClientError(msg) from err
+
+    def _get_download_headers(self, url: str) -> dict | None:
+        if httpx.URL(url).host != httpx.URL(self._get_api_url()).host:
+            return None
+        return self._get_headers()
+
+    def _get_headers(self) -> dict | None:
+        return None
+
+    @staticmethod
+    def _get_page_count(response: httpx.Response) -> int | None:
+        if "X-Total-Pages" in response.headers:
+            return int(response.headers["X-Total-Pages"])
+
+        if "last" in response.links:
+            return int(
+                httpx.URL(response.links["last"]["url"]).params.get("page", 1)
+            )
+
+        if "next" not in response.links:
+            return 1
+
+        return None
+
     @abstractmethod
     def get_cloning_url(self) -> str:
         """Get url for cloning"""
@@ -42,9 +230,24 @@ class GitPlatformClientABC(ABC):
 
         return "/".join(name).replace(".git", "")
 
-    @abstractmethod
-    def get_releases(self) -> dict[str, list[tuple[str, str]]]:
+    def get_releases(
+        self, release_assets: dict | None = None
+    ) -> dict[str, list[tuple[str, str]]]:
         """Get release information -> {tag: [(name_package, download_link)]}"""
+        if release_assets is None:
+            release_assets = self.get_release_assets()
+
+        return {
+            tag: [(name, link) for name, link, _ in assets]
+            for tag, assets in release_assets.items()
+        }
+
+    @abstractmethod
+    def get_release_assets(self) -> dict[str, list[tuple[str, str, str]]]:
+        """
+        Get release assets -> {tag: [(name_package, download_link, identity)]},
+        identity changes when the asset behind the same link is replaced
+        """
 
     @abstractmethod
     def get_repo_size(self) -> int:
@@ -58,6 +261,8 @@ class GitPlatformClientABC(ABC):
 class GitlabPlatformClient(GitPlatformClientABC):
     """For Gitlab"""
 
+    platform = GitPlatform.GITLAB
+
     def get_cloning_url(self) -> str:
         return super().get_cloning_url()
 
@@ -71,17 +276,27 @@ class GitlabPlatformClient(GitPlatformClientABC):
     def _get_repository_name(self):
         return super()._get_repository_name()
 
-    def _get_repository_id(self) -> int:
-        headers = None
+    def _get_headers(self) -> dict | None:
         if self.credentials:
-            headers = {
-                "PRIVATE-TOKEN": self.credentials.pat_token,
-            }
+            return {"PRIVATE-TOKEN": self.credentials.pat_token}
+        return None
 
-        result_data = httpx.get(
-            url=self._get_api_url()
-            + self._get_repository_name().replace("/", "%2F"),
-            headers=headers,
+    def _get_project_url(self) -> str:
+        return self._get_api_url() + self._get_repository_name().replace(
+            "/", "%2F"
+        )
+
+    def _get_repository_id(self) -> int:
+        # ids do not change for a path, every sync resolved it several times
+        project_url = self._get_project_url()
+        with cache_lock:
+            target_id = repository_ids.get(project_url)
+        if target_id is not None:
+            return target_id
+
+        result_data = self._get(
+            url=project_url,
+            headers=self._get_headers(),
         )
 
         try:
@@ -90,46 +305,30 @@ class GitlabPlatformClient(GitPlatformClientABC):
             msg = "Invalid Credentials"
             raise GitPlatformClientError(msg) from err
 
+        with cache_lock:
+            repository_ids[project_url] = target_id
+
         return target_id
 
-    def get_releases(self) -> dict[str, list[tuple[str, str]]]:
+    def get_release_assets(self) -> dict[str, list[tuple[str, str, str]]]:
         repository_id = self._get_repository_id()
 
-        headers = None
-        if self.credentials:
-            headers = {"PRIVATE-TOKEN": self.credentials.pat_token}
-
-        all_releases: list[dict] = []
-        page = 1
-        per_page = 100
-
-        while True:
-            releases_data = httpx.get(
-                url=f"{self._get_api_url()}{repository_id}/releases",
-                headers=headers,
-                params={"page": page, "per_page": per_page},
-            )
-            page_items = releases_data.json()
-
-            if not page_items:
-                break
-
-            all_releases.extend(page_items)
-
-            if len(page_items) < per_page:
-                break
-
-            page += 1
+        all_releases = self._get_pages(
+            url=f"{self._get_api_url()}{repository_id}/releases",
+            headers=self._get_headers(),
+        )
 
-        result_dict: dict[str, list[tuple[str, str]]] = {}
+        result_dict: dict[str, list[tuple[str, str, str]]] = {}
         for item in all_releases:
+            # sources are built from the tag, links have no update time
+            commit = item["commit"]["id"]
             assets_list = [
-                (source["format"], source["url"])
+                (source["format"], source["url"], commit)
                 for source in item["assets"]["sources"]
             ]
             assets_list.extend(
                 [
-                    (link["name"], link["url"])
+                    (link["name"], link["url"], f"{link['id']}:{commit}")
                     for link in item["assets"]["links"]
                 ]
             )
@@ -141,17 +340,14 @@ class GitlabPlatformClient(GitPlatformClientABC):
     def get_repo_size(self) -> int:
         repository_id = self._get_repository_id()
 
-        if self.credentials:
-            headers = {
-                "PRIVATE-TOKEN": self.credentials.pat_token,
-            }
-        else:
+        if not self.credentials:
             # BUG: gitlab (< 17.9) has no repository_size for user without role < REPORTER.
             return 0
 
-        repo_data = httpx.get(
-            url=f"{self._get_api_url()}{repository_id}?statistics=true",
-            headers=headers,
+        repo_data = self._get(
+            url=f"{self._get_api_url()}{repository_id}",
+            headers=self._get_headers(),
+            params={"statistics": "true"},
         )
 
         try:
@@ -163,16 +359,9 @@ class GitlabPlatformClient(GitPlatformClientABC):
         return repo_size
 
     def is_valid_token(self) -> bool:
-        headers = None
-        if self.credentials:
-            headers = {
-                "PRIVATE-TOKEN": self.credentials.pat_token,
-            }
-
-        result_data = httpx.get(
-            url=self._get_api_url()
-            + self._get_repository_name().replace("/", "%2F"),
-            headers=headers,
+        result_data = self._get(
+            url=self._get_project_url(),
+            headers=self._get_headers(),
         )
 
         try:
@@ -186,6 +375,8 @@ class GitlabPlatformClient(GitPlatformClientABC):
 class GithubPlatformClient(GitPlatformClientABC):
     """For Github"""
 
+    platform = GitPlatform.GITHUB
+
     def get_cloning_url(self) -> str:
         """Get url for cloning"""
         return super().get_cloning_url()
@@ -209,18 +400,22 @@ class GithubPlatformClient(GitPlatformClientABC):
     def _get_repository_name(self):
         return super()._get_repository_name()
 
-    def get_releases(self) -> dict[str, list[tuple[str, str]]]:
+    def get_release_assets(self) -> dict[str, list[tuple[str, str, str]]]:
         headers = {"Accept": "application/vnd.github.v3+json"}
 
-        releases_data = httpx.get(
+        all_releases = self._get_pages(
             url=f"{self._get_api_url()}{self._get_repository_name()}/releases",
             headers=headers,
         )
 
         result_dict = {}
-        for item in releases_data.json():
+        for item in all_releases:
             result_dict[item["tag_name"]] = [
-                (asset["name"], asset["browser_download_url"])
+                (
+                    asset["name"],
+                    asset["browser_download_url"],
+                    f"{asset['id']}:{asset['updated_at']}:{asset['size']}",
+                )
                 for asset in item["assets"]
             ]
 
@@ -229,7 +424,7 @@ class GithubPlatformClient(GitPlatformClientABC):
     def get_repo_size(self) -> int:
         headers = {"Accept": "application/vnd.github.v3+json"}
 
-        repo_data = httpx.get(
+        repo_data = self._get(
             url=f"{self._get_api_url()}{self._get_repository_name()}",
             headers=headers,
         )
@@ -248,7 +443,7 @@ class GithubPlatformClient(GitPlatformClientABC):
     def is_valid_token(self) -> bool:
         headers = {"Accept": "application/vnd.github.v3+json"}
 
-        repo_data = httpx.get(
+        repo_data = self._get(
             url=f"{self._get_api_url()}{self._get_repository_name()}",
             headers=headers,
         )
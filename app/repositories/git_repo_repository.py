@@ -1,25 +1,43 @@
+import contextlib
+import hashlib
 import io
+import json
+import logging
 import os
 import shutil
 import uuid as uuid_pkg
 from collections import Counter
+from collections.abc import Iterator
 
 from git import Repo as GitRepo
 from git.exc import GitCommandError
+from pathspec import PathSpec
+from pathspec.patterns import GitWildMatchPattern
 
 from app import settings
-from app.configs.errors import GitRepoError
-from app.configs.utils import get_directory_size
+from app.configs.errors import GitRepoError, RepositorySyncingError
 from app.domain.repo_model import Repo
 from app.domain.repository_registry_model import RepositoryRegistry
 from app.domain.unit_model import Unit
 from app.dto.enum import (
     DestinationTopicType,
+    RepositoryRegistryStatus,
     ReservedEnvVariableName,
     StaticRepoFileName,
 )
-from app.services.validators import is_valid_json, is_valid_object
-from app.utils.utils import clean_files_with_pepeignore
+from app.repositories.firmware_archive import ArchiveEntry
+from app.repositories.git_artifact_cache import git_artifact_cache
+from app.repositories.git_object_reader import (
+    GitObjectReader,
+    git_object_readers,
+)
+from app.repositories.git_version_index import GitVersionIndex
+from app.services.validators import is_valid_object
+
+VERSION_INDEX_FILE = "pepeunit_version_index.json"
+
+# index path -> (index file mtime, index), reloaded after every sync
+version_index_cache: dict[str, tuple[int, GitVersionIndex]] = {}
 
 
 class GitRepoRepository:
@@ -27,30 +45,81 @@ class GitRepoRepository:
     def get_path_physic_repository(repository_registry: RepositoryRegistry):
         return f"{settings.pu_save_repo_path}/{repository_registry.uuid}"
 
-    @staticmethod
-    def clone(url: str, repo_save_path: str):
-        shutil.rmtree(repo_save_path, ignore_errors=True)
+    def clone(self, url: str, repo_save_path: str):
+        """
+        Fetches into the existing physic repository, a new clone is made
+        only when there is none or the fetch fails, and replaces the old one
+        after it is complete
+        """
+        if os.path.isdir(f"{repo_save_path}/.git"):
+            try:
+                self.fetch(url, repo_save_path)
+            except GitCommandError:
+                logging.warning(f"Fetch {repo_save_path} failed, re-clone")
+            else:
+                self.save_version_index(repo_save_path)
+                return
 
+        tmp_path = f"{repo_save_path}.{uuid_pkg.uuid4()}.tmp"
         try:
-            # cloning repo by url
-            git_repo = GitRepo.clone_from(
+            GitRepo.clone_from(
                 url,
-                repo_save_path,
+                tmp_path,
+                no_checkout=True,
+                multi_options=(
+                    [f"--filter={settings.pu_git_clone_filter}"]
+                    if settings.pu_git_clone_filter
+                    else None
+                ),
                 env={"GIT_TERMINAL_PROMPT": "0"},
             )
+            self.save_version_index(tmp_path)
         except GitCommandError as err:
+            shutil.rmtree(tmp_path, ignore_errors=True)
             msg = "No valid repo_url or credentials"
             raise GitRepoError(msg) from err
 
-        # get all remotes branches to local repo
-        for remote in git_repo.remotes:
-            remote.fetch()
+        old_path = f"{tmp_path}.old"
+        with contextlib.suppress(FileNotFoundError):
+            os.rename(repo_save_path, old_path)
+        os.rename(tmp_path, repo_save_path)
+
+        git_object_readers.close(repo_save_path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    @staticmethod
+    def fetch(url: str, repo_save_path: str) -> None:
+        git_repo = GitRepo(repo_save_path)
+        try:
+            git_repo.remote().set_url(url)
+            with git_repo.git.custom_environment(GIT_TERMINAL_PROMPT="0"):
+                # all refs are updated in one transaction or none of them
+                git_repo.git.fetch(
+                    "origin",
+                    "--prune",
+                    "--prune-tags",
+                    "--tags",
+                    "--force",
+                    "--atomic",
+                )
+        finally:
+            git_repo.close()
 
     def local_repository_size(
         self, repository_registry: RepositoryRegistry
     ) -> int:
-        return get_directory_size(
-            self.get_path_physic_repository(repository_registry)
+        # size of packs and loose objects, without a walk over every file
+        git_repo = self.get_repo(repository_registry)
+        try:
+            stats = dict(
+                line.split(": ")
+                for line in git_repo.git.count_objects("-v").splitlines()
+            )
+        finally:
+            git_repo.close()
+
+        return 1024 * sum(
+            int(stats[key]) for key in ("size", "size-pack", "size-garbage")
         )
 
     @staticmethod
@@ -60,60 +129,215 @@ class GitRepoRepository:
             name
             for name in os.listdir(path)
             if os.path.isdir(os.path.join(path, name))
+            and not name.endswith((".tmp", ".old"))
         ]
 
-    def generate_tmp_git_repo(
+    def get_pepeignore_hash(
+        self, repository_registry: RepositoryRegistry, commit: str
+    ) -> str | None:
+        data = self.get_object_reader(repository_registry).read(
+            f"{commit}:.pepeignore"
+        )
+        return hashlib.sha256(data).hexdigest() if data is not None else None
+
+    @staticmethod
+    def get_firmware_tree(
+        reader: GitObjectReader, commit: str, spec: PathSpec
+    ) -> tuple[int, list[tuple[str, int, str]]]:
+        """
+        Commit time and (path, mode, object id) of the directories and files
+        of commit left after spec. env.json and schema.json are generated
+        for each unit
+        """
+        commit_data = reader.read_commit(commit)
+        if commit_data is None:
+            msg = "Commit not found"
+            raise GitRepoError(msg)
+        tree_id, commit_time = commit_data
+
+        per_unit_files = {
+            StaticRepoFileName.ENV.value,
+            StaticRepoFileName.SCHEMA.value,
+        }
+
+        items = []
+        trees = [("", tree_id)]
+        while trees:
+            prefix, tree_id = trees.pop()
+            for mode, name, object_id in sorted(
+                reader.list_tree(tree_id), key=lambda item: item[1]
+            ):
+                path = f"{prefix}{name}"
+                match mode >> 12:
+                    case 0o04:
+                        if spec.match_file(path) or spec.match_file(
+                            f"{path}/"
+                        ):
+                            continue
+                        items.append((path, mode, object_id))
+                        trees.append((f"{path}/", object_id))
+                    case 0o10:
+                        if spec.match_file(path) or path in per_unit_files:
+                            continue
+                        items.append((path, mode, object_id))
+                    # symlinks and submodules are not part of a firmware
+
+        return commit_time, items
+
+    @staticmethod
+    def get_pepeignore_spec(reader: GitObjectReader, commit: str) -> PathSpec:
+        pepeignore = reader.read(f"{commit}:.pepeignore")
+        return PathSpec.from_lines(
+            GitWildMatchPattern,
+            pepeignore.decode().splitlines() if pepeignore else [],
+        )
+
+    def get_firmware_entries(
+        self, repository_registry: RepositoryRegistry, commit: str
+    ) -> Iterator[ArchiveEntry]:
+        """
+        Files of commit left after .pepeignore, read from the object store
+        """
+        reader = self.get_object_reader(repository_registry)
+
+        commit_time, items = self.get_firmware_tree(
+            reader, commit, self.get_pepeignore_spec(reader, commit)
+        )
+        for path, mode, object_id in items:
+            if mode >> 12 == 0o04:
+                yield ArchiveEntry(path, None, 0o755, commit_time)
+            else:
+                yield ArchiveEntry(
+                    path, reader.read(object_id), mode & 0o777, commit_time
+                )
+
+    def get_firmware_delta_entries(
         self,
         repository_registry: RepositoryRegistry,
-        commit: str,
-        gen_uuid: uuid_pkg.UUID,
-    ) -> str:
-        tmp_git_repo = self.get_tmp_repo(repository_registry, gen_uuid)
-        tmp_git_repo.git.checkout(commit)
-
-        tmp_git_repo_path = tmp_git_repo.working_tree_dir
-        clean_files_with_pepeignore(
-            tmp_git_repo_path, f"{tmp_git_repo_path}/.pepeignore"
-        )
+        from_commit: str,
+        to_commit: str,
+    ) -> Iterator[ArchiveEntry]:
+        """
+        Manifest and the files of to_commit that differ from from_commit,
+        both sides filtered by the .pepeignore of to_commit
+        """
+        reader = self.get_object_reader(repository_registry)
+        spec = self.get_pepeignore_spec(reader, to_commit)
 
-        return tmp_git_repo_path
+        _, from_items = self.get_firmware_tree(reader, from_commit, spec)
+        commit_time, to_items = self.get_firmware_tree(reader, to_commit, spec)
+
+        from_files = {
+            path: (mode, object_id)
+            for path, mode, object_id in from_items
+            if mode >> 12 == 0o10
+        }
+        to_files = {
+            path: (mode, object_id)
+            for path, mode, object_id in to_items
+            if mode >> 12 == 0o10
+        }
+
+        changed = [
+            path
+            for path, item in to_files.items()
+            if from_files.get(path) != item
+        ]
+        manifest = {
+            "from_commit": from_commit,
+            "to_commit": to_commit,
+            "changed": sorted(
+                [
+                    *changed,
+                    StaticRepoFileName.ENV.value,
+                    StaticRepoFileName.SCHEMA.value,
+                ]
+            ),
+            "deleted": sorted(from_files.keys() - to_files.keys()),
+        }
+
+        yield ArchiveEntry(
+            StaticRepoFileName.DELTA_MANIFEST.value,
+            json.dumps(manifest, indent=4).encode(),
+            0o644,
+            commit_time,
+        )
+        for path in changed:
+            mode, object_id = to_files[path]
+            yield ArchiveEntry(
+                path, reader.read(object_id), mode & 0o777, commit_time
+            )
 
     def get_repo(self, repository_registry: RepositoryRegistry) -> GitRepo:
         repo_save_path = self.get_path_physic_repository(repository_registry)
         try:
             repo = GitRepo(repo_save_path)
         except Exception as err:
+            if (
+                repository_registry.sync_status
+                == RepositoryRegistryStatus.PROCESSING
+            ):
+                msg = f"Physic repository {repository_registry.uuid} is not cloned yet, retry later"
+                raise RepositorySyncingError(msg) from err
+
             msg = "Physic repository not exist"
             raise GitRepoError(msg) from err
 
         return repo
 
     @staticmethod
-    def get_tmp_path(gen_uuid: uuid_pkg.UUID) -> str:
-        return f"tmp/{gen_uuid}"
+    def get_path_version_index(repo_save_path: str) -> str:
+        return f"{repo_save_path}/.git/{VERSION_INDEX_FILE}"
+
+    def save_version_index(self, repo_save_path: str) -> GitVersionIndex:
+        index = GitVersionIndex.build(GitRepo(repo_save_path))
 
-    def get_tmp_repo(
-        self, repository_registry: RepositoryRegistry, gen_uuid: uuid_pkg.UUID
-    ) -> GitRepo:
-        tmp_path = self.get_tmp_path(gen_uuid)
-        current_path = self.get_path_physic_repository(repository_registry)
+        index_path = self.get_path_version_index(repo_save_path)
+        with open(f"{index_path}.tmp", "w") as f:
+            json.dump(index.to_dict(), f)
+        os.replace(f"{index_path}.tmp", index_path)
 
-        shutil.copytree(current_path, tmp_path)
+        return index
+
+    def get_version_index(
+        self, repository_registry: RepositoryRegistry
+    ) -> GitVersionIndex:
+        repo_save_path = self.get_path_physic_repository(repository_registry)
+        index_path = self.get_path_version_index(repo_save_path)
 
         try:
-            repo = GitRepo(tmp_path)
-        except Exception as err:
-            msg = "Physic repository not exist"
-            raise GitRepoError(msg) from err
+            mtime = os.stat(index_path).st_mtime_ns
+        except FileNotFoundError:
+            # repository cloned before the index existed
+            self.get_repo(repository_registry)
+            return self.save_version_index(repo_save_path)
 
-        return repo
+        cached = version_index_cache.get(index_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            with open(index_path) as f:
+                index = GitVersionIndex.from_dict(json.load(f))
+        except (ValueError, KeyError):
+            return self.save_version_index(repo_save_path)
+
+        version_index_cache[index_path] = (mtime, index)
+        return index
+
+    def get_object_reader(
+        self, repository_registry: RepositoryRegistry
+    ) -> GitObjectReader:
+        # a new index means a new clone, cat-file of the old one is closed
+        index = self.get_version_index(repository_registry)
+        return git_object_readers.get(
+            self.get_path_physic_repository(repository_registry), index
+        )
 
     def get_branches(
         self, repository_registry: RepositoryRegistry
     ) -> list[str]:
-        repo = self.get_repo(repository_registry)
-
-        return [r.remote_head for r in repo.remote().refs][1:]
+        return self.get_version_index(repository_registry).get_branch_names()
 
     def get_branch_commits(
         self,
@@ -127,37 +351,23 @@ class GitRepoRepository:
 
         self.is_valid_branch(repository_registry, branch)
 
-        repo = self.get_repo(repository_registry)
-        rev_list = repo.git.rev_list(
-            f"remotes/origin/{branch}", max_count=depth, pretty="%H|%s"
+        commits = self.get_version_index(repository_registry).get_commits(
+            branch
         )
-        commits = rev_list.strip().split("\n")
-        return [
-            {"commit": line.split("|")[0], "summary": line.split("|")[1]}
-            for line in commits
-            if "|" in line
-        ]
+        return commits[:depth]
 
     def get_branch_tags(
-        self, repository_registry: RepositoryRegistry, commits: set
+        self, repository_registry: RepositoryRegistry, branch: str
     ) -> list[dict]:
         """
         Get all commits with tags for branch
         """
 
-        repo = self.get_repo(repository_registry)
-        tags = []
-        for tag in repo.tags:
-            commit_hash = tag.commit.hexsha
-            if commit_hash in commits:
-                tags.append(
-                    {
-                        "commit": commit_hash,
-                        "summary": tag.commit.summary,
-                        "tag": tag.name,
-                    }
-                )
-        return tags[::-1]
+        self.is_valid_branch(repository_registry, branch)
+
+        return self.get_version_index(repository_registry).get_tagged_commits(
+            branch
+        )
 
     def get_branch_commits_with_tag(
         self, repository_registry: RepositoryRegistry, branch: str
@@ -166,60 +376,45 @@ class GitRepoRepository:
         Get all commits for branch, with tags
         """
 
-        commits = self.get_branch_commits(repository_registry, branch)
-        tags = self.get_branch_tags(
-            repository_registry, {item["commit"] for item in commits}
-        )
-
-        commits_with_tag = []
-        for commit in commits:
-            commit_dict = commit
-            commit_dict["tag"] = None
-
-            for tag in tags:
-                if commit["commit"] == tag["commit"]:
-                    commit_dict["tag"] = tag["tag"]
-
-            commits_with_tag.append(commit_dict)
-
-        return commits_with_tag
+        return self.get_branch_commits(repository_registry, branch)
 
     @staticmethod
     def get_tags_from_all_commits(commits: list[dict]) -> list[dict]:
         return [commit for commit in commits if commit["tag"]]
 
-    @staticmethod
-    def find_by_commit(data: list[dict], commit: str) -> dict | None:
-        for item in data:
-            if item["commit"] == commit:
-                return item
-        return None
+    def find_by_commit(
+        self,
+        repository_registry: RepositoryRegistry,
+        branch: str,
+        commit: str,
+    ) -> dict | None:
+        return self.get_version_index(repository_registry).find_by_commit(
+            branch, commit
+        )
 
     def get_target_repo_version(
         self, repository_registry: RepositoryRegistry, repo: Repo
     ) -> tuple[str, str | None]:
         self.is_valid_branch(repository_registry, repo.default_branch)
 
-        all_commits = self.get_branch_commits_with_tag(
-            repository_registry, repo.default_branch
-        )
-        tags = self.get_tags_from_all_commits(all_commits)
+        index = self.get_version_index(repository_registry)
 
         target_commit = None
         if repo.is_auto_update_repo:
             if repo.is_compilable_repo or repo.is_only_tag_update:
+                tags = index.get_tagged_commits(repo.default_branch)
                 if len(tags) != 0:
                     target_commit = tags[0]
             else:
-                target_commit = all_commits[0]
+                target_commit = index.get_commits(repo.default_branch)[0]
 
         else:
             self.is_valid_commit(
                 repository_registry, repo.default_branch, repo.default_commit
             )
 
-            target_commit = self.find_by_commit(
-                all_commits, repo.default_commit
+            target_commit = index.find_by_commit(
+                repo.default_branch, repo.default_commit
             )
 
             if repo.is_compilable_repo and target_commit["tag"] is None:
@@ -243,10 +438,9 @@ class GitRepoRepository:
             target_commit = {"commit": repo_target[0], "tag": repo_target[1]}
         else:
             self.is_valid_branch(repository_registry, unit.repo_branch)
-            all_commits = self.get_branch_commits_with_tag(
-                repository_registry, unit.repo_branch
+            target_commit = self.find_by_commit(
+                repository_registry, unit.repo_branch, unit.repo_commit
             )
-            target_commit = self.find_by_commit(all_commits, unit.repo_commit)
 
             if (
                 target_commit
@@ -265,37 +459,61 @@ class GitRepoRepository:
     def get_file(
         self, repository_registry: RepositoryRegistry, commit: str, path: str
     ) -> io.BytesIO:
-        repo = self.get_repo(repository_registry)
+        reader = self.get_object_reader(repository_registry)
 
         if commit is None:
             msg = "Commit not found"
             raise GitRepoError(msg)
 
-        try:
-            target_file = repo.commit(commit).tree / path
-        except KeyError as err:
+        data = reader.read(f"{commit}:{path}")
+        if data is None:
             msg = f"File {path} not found in repo commit {commit}"
-            raise GitRepoError(msg) from err
-
-        buffer = io.BytesIO()
+            raise GitRepoError(msg)
 
-        target_file.stream_data(buffer)
+        return io.BytesIO(data)
 
-        return buffer
+    def get_file_dict(
+        self, repository_registry: RepositoryRegistry, commit: str, path: str
+    ) -> dict:
+        return git_artifact_cache.get(
+            ("file", repository_registry.uuid, commit, path),
+            path,
+            lambda: (
+                self.get_file(repository_registry, commit, path)
+                .getvalue()
+                .decode()
+            ),
+        )
 
     def get_schema_dict(
         self, repository_registry: RepositoryRegistry, commit: str
     ) -> dict:
-        target_file = StaticRepoFileName.SCHEMA_EXAMPLE.value
-        schema_buffer = self.get_file(repository_registry, commit, target_file)
-        return is_valid_json(schema_buffer.getvalue().decode(), target_file)
+        return self.get_file_dict(
+            repository_registry,
+            commit,
+            StaticRepoFileName.SCHEMA_EXAMPLE.value,
+        )
 
     def get_env_dict(
         self, repository_registry: RepositoryRegistry, commit: str
     ) -> dict:
-        target_file = StaticRepoFileName.ENV_EXAMPLE.value
-        schema_buffer = self.get_file(repository_registry, commit, target_file)
-        return is_valid_json(schema_buffer.getvalue().decode(), target_file)
+        return self.get_file_dict(
+            repository_registry, commit, StaticRepoFileName.ENV_EXAMPLE.value
+        )
+
+    @staticmethod
+    def get_releases(repository_registry: RepositoryRegistry) -> dict:
+        is_valid_object(repository_registry.releases_data)
+
+        releases_hash = hashlib.sha256(
+            repository_registry.releases_data.encode()
+        ).hexdigest()
+
+        return git_artifact_cache.get(
+            ("releases", repository_registry.uuid, releases_hash),
+            "Releases for compile repo",
+            lambda: repository_registry.releases_data,
+        )
 
     def get_env_example(
         self, repository_registry: RepositoryRegistry, commit: str
@@ -311,10 +529,9 @@ class GitRepoRepository:
         }
 
     def delete_repo(self, repository_registry: RepositoryRegistry) -> None:
-        shutil.rmtree(
-            self.get_path_physic_repository(repository_registry),
-            ignore_errors=True,
-        )
+        repo_save_path = self.get_path_physic_repository(repository_registry)
+        git_object_readers.close(repo_save_path)
+        shutil.rmtree(repo_save_path, ignore_errors=True)
 
     def is_valid_schema_file(
         self, repository_registry: RepositoryRegistry, commit: str
@@ -373,20 +590,16 @@ class GitRepoRepository:
     def is_valid_branch(
         self, repository_registry: RepositoryRegistry, branch: str
     ):
-        available_branches = self.get_branches(repository_registry)
-        if not branch or branch not in available_branches:
-            msg = f"Branch {branch} not found, available: {available_branches}"
+        index = self.get_version_index(repository_registry)
+        if not branch or not index.has_branch(branch):
+            msg = f"Branch {branch} not found, available: {index.get_branch_names()}"
             raise GitRepoError(msg)
 
     def is_valid_commit(
         self, repository_registry: RepositoryRegistry, branch: str, commit: str
     ):
-        if commit not in [
-            commit_dict["commit"]
-            for commit_dict in self.get_branch_commits(
-                repository_registry, branch
-            )
-        ]:
+        index = self.get_version_index(repository_registry)
+        if index.find_by_commit(branch, commit) is None:
             msg = f"Commit {commit} not in branch {branch}"
             raise GitRepoError(msg)
 
@@ -407,11 +620,7 @@ class GitRepoRepository:
         firmware_platform: str,
     ):
         if repo.is_compilable_repo:
-            is_valid_object(repository_registry.releases_data)
-
-            releases = is_valid_json(
-                repository_registry.releases_data, "Releases for compile repo"
-            )
+            releases = self.get_releases(repository_registry)
             target_commit, target_tag = self.get_target_unit_version(
                 repo, repository_registry, unit
             )
@@ -0,0 +1,79 @@
+from git import Repo as GitRepo
+
+
+class GitVersionIndex:
+    """
+    Branches, commits and tags of one physic repository, built once per sync
+    """
+
+    def __init__(self, branches: dict[str, list[dict]], tags: dict[str, str]):
+        # branch -> commits newest first, commit -> first tag by name
+        self.branches = branches
+        self.tags = tags
+
+        self.tag_commits = {tag: commit for commit, tag in tags.items()}
+        self.commits = {
+            branch: {item["commit"]: item for item in commits}
+            for branch, commits in branches.items()
+        }
+        self.tagged = {
+            branch: [item for item in commits if item["tag"]]
+            for branch, commits in branches.items()
+        }
+
+    @classmethod
+    def build(cls, repo: GitRepo) -> "GitVersionIndex":
+        tags = {}
+        for_each_ref = repo.git.for_each_ref(
+            "refs/tags",
+            format="%(refname:strip=2)|%(objectname)|%(*objectname)",
+        )
+        for line in for_each_ref.splitlines():
+            name, target, peeled = line.rsplit("|", 2)
+            # annotated tags point to the tag object, peeled is the commit
+            tags.setdefault(peeled or target, name)
+
+        branches = {}
+        for branch in [r.remote_head for r in repo.remote().refs][1:]:
+            rev_list = repo.git.rev_list(
+                f"remotes/origin/{branch}", pretty="%H|%s"
+            )
+            branches[branch] = [
+                {
+                    "commit": commit,
+                    "summary": summary,
+                    "tag": tags.get(commit),
+                }
+                for commit, summary in (
+                    line.split("|", 1)
+                    for line in rev_list.strip().split("\n")
+                    if "|" in line
+                )
+            ]
+
+        return cls(branches, tags)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GitVersionIndex":
+        return cls(data["branches"], data["tags"])
+
+    def to_dict(self) -> dict:
+        return {"branches": self.branches, "tags": self.tags}
+
+    def get_branch_names(self) -> list[str]:
+        return list(self.branches)
+
+    def has_branch(self, branch: str | None) -> bool:
+        return branch in self.branches
+
+    def get_commits(self, branch: str) -> list[dict]:
+        return self.branches.get(branch, [])
+
+    def get_tagged_commits(self, branch: str) -> list[dict]:
+        return self.tagged.get(branch, [])
+
+    def find_by_commit(self, branch: str, commit: str | None) -> dict | None:
+        return self.commits.get(branch, {}).get(commit)
+
+    def get_tag(self, commit: str) -> str | None:
+        return self.tags.get(commit)
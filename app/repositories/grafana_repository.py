@@ -19,6 +19,7 @@ from app.dto.clickhouse.last_value import LastValue
 from app.dto.clickhouse.n_records import NRecords
 from app.dto.clickhouse.time_window import TimeWindow
 from app.dto.enum import (
+    DatasourceDownsampling,
     DatasourceFormat,
     GrafanaUserRole,
     ProcessingPolicyType,
@@ -236,6 +237,13 @@ class GrafanaRepository:
             "order_by_create_date": "asc",
         }
 
+        if data_pipe_entity.processing_policy.policy_type in (
+            ProcessingPolicyType.TIME_WINDOW,
+            ProcessingPolicyType.AGGREGATION,
+        ):
+            # grafana substitutes the panel interval, see datasource downsampling
+            params["interval_ms"] = "$__interval_ms"
+
         # BUG: limit можно прописывать только руками. При генерации, он ломает и пишет ошибку Unknown Query Type у панелей
 
         """
@@ -305,7 +313,21 @@ class GrafanaRepository:
         filters: DataPipeFilter,
         data_pipe_entity: DataPipeConfig,
         unit_node_panel: PanelsUnitNodes | UnitNodeForPanel,
+        *,
+        downsampling: DatasourceDownsampling | None = None,
+        max_data_points: int | None = None,
+        interval_ms: int | None = None,
     ) -> list[DatasourceTimeSeriesData]:
+        if downsampling or max_data_points or interval_ms:
+            return self.get_downsampled_datasource_data(
+                filters,
+                data_pipe_entity,
+                unit_node_panel,
+                downsampling=downsampling,
+                max_data_points=max_data_points,
+                interval_ms=interval_ms,
+            )
+
         count, data = self.data_pipe_repository.list(filters=filters)
 
         return [
@@ -318,6 +340,56 @@ class GrafanaRepository:
             for item in data
         ]
 
+    def get_downsampled_datasource_data(
+        self,
+        filters: DataPipeFilter,
+        data_pipe_entity: DataPipeConfig,
+        unit_node_panel: PanelsUnitNodes | UnitNodeForPanel,
+        *,
+        downsampling: DatasourceDownsampling | None,
+        max_data_points: int | None,
+        interval_ms: int | None,
+    ) -> list[DatasourceTimeSeriesData]:
+        if filters.type in (
+            ProcessingPolicyType.LAST_VALUE,
+            ProcessingPolicyType.N_RECORDS,
+        ):
+            # already bounded by the policy, nothing to downsample
+            return self.get_datasource_data(
+                filters, data_pipe_entity, unit_node_panel
+            )
+
+        is_numeric = (
+            data_pipe_entity.filters.type_input_value == TypeInputValue.NUMBER
+            and not unit_node_panel.is_forced_to_json
+        )
+        if not is_numeric:
+            downsampling = DatasourceDownsampling.LAST
+        elif downsampling in (None, DatasourceDownsampling.LAST):
+            downsampling = DatasourceDownsampling.AVG
+
+        data = self.data_pipe_repository.list_downsampled(
+            filters,
+            downsampling,
+            min(
+                max_data_points or settings.pu_grafana_max_data_points,
+                settings.pu_grafana_max_data_points,
+            ),
+            interval_ms,
+        )
+
+        return [
+            DatasourceTimeSeriesData(
+                time=time,
+                value=self.get_typed_datasource_value(
+                    str(value), data_pipe_entity, unit_node_panel
+                )
+                if not is_numeric
+                else value,
+            )
+            for time, value in data
+        ]
+
     @staticmethod
     def get_typed_datasource_value(
         value: str,
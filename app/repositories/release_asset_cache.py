@@ -0,0 +1,146 @@
+import contextlib
+import hashlib
+import json
+import os
+import re
+import uuid as uuid_pkg
+from collections.abc import Callable
+from typing import BinaryIO
+
+from prometheus_client import Counter, Gauge
+
+from app import settings
+
+DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+mirror_requests = Counter(
+    "pepeunit_release_asset_mirror_requests",
+    "Release assets looked up in the local mirror during sync",
+    ["result"],
+)
+mirror_size = Gauge(
+    "pepeunit_release_asset_mirror_bytes",
+    "Size of the mirrored release assets on disk",
+    multiprocess_mode="max",
+)
+
+
+class ReleaseAssetCache:
+    """
+    Release assets of the platforms on disk by sha256 of the content, an
+    upstream link is mapped to the digest it was downloaded as together
+    with the identity of the asset on the platform, platforms keep the link
+    when an asset is replaced. Least
+    recently served assets are removed over the disk budget, a single
+    asset is never larger than max_asset_size
+    """
+
+    def __init__(
+        self,
+        path: str = settings.pu_release_asset_cache_path,
+        max_size: int = settings.pu_release_asset_cache_size,
+        max_asset_size: int = settings.pu_release_asset_max_size,
+    ) -> None:
+        self.path = path
+        self.max_size = max_size
+        self.max_asset_size = min(max_asset_size, max_size)
+
+    def get_path(self, digest: str) -> str:
+        return f"{self.path}/assets/{digest}"
+
+    def get_link_path(self, link: str) -> str:
+        return f"{self.path}/links/{hashlib.sha256(link.encode()).hexdigest()}"
+
+    def get_digest(self, link: str, identity: str | None = None) -> str | None:
+        try:
+            with open(self.get_link_path(link)) as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if identity is not None and data["identity"] != identity:
+            return None
+
+        digest = data["digest"]
+        return digest if os.path.exists(self.get_path(digest)) else None
+
+    def get_link(self, link: str) -> str:
+        # devices get the backend link when the asset is mirrored
+        digest = self.get_digest(link)
+        if digest is None:
+            return link
+        return f"{settings.pu_link_prefix_and_v1}/repository_registry/release_assets/{digest}"
+
+    def mirror(
+        self,
+        link: str,
+        identity: str,
+        download: Callable[[BinaryIO, int], None],
+    ) -> str:
+        digest = self.get_digest(link, identity)
+        mirror_requests.labels("hit" if digest else "miss").inc()
+        if digest:
+            return digest
+
+        os.makedirs(f"{self.path}/assets", exist_ok=True)
+        os.makedirs(f"{self.path}/links", exist_ok=True)
+
+        tmp_path = f"{self.path}/assets/{uuid_pkg.uuid4()}.tmp"
+        try:
+            with open(tmp_path, "w+b") as f:
+                # aborts past the cap, the link stays upstream
+                download(f, self.max_asset_size)
+                f.seek(0)
+                digest = hashlib.file_digest(f, "sha256").hexdigest()
+            os.replace(tmp_path, self.get_path(digest))
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_path)
+
+        link_path = self.get_link_path(link)
+        with open(f"{link_path}.tmp", "w") as f:
+            json.dump({"digest": digest, "identity": identity}, f)
+        os.replace(f"{link_path}.tmp", link_path)
+
+        self.evict(keep=digest)
+
+        return digest
+
+    def open(self, digest: str) -> str | None:
+        if not DIGEST_PATTERN.fullmatch(digest):
+            return None
+
+        path = self.get_path(digest)
+        try:
+            # last use time orders the eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+
+        return path
+
+    def evict(self, keep: str | None = None) -> None:
+        entries = []
+        for name in os.listdir(f"{self.path}/assets"):
+            if not DIGEST_PATTERN.fullmatch(name):
+                continue
+            with contextlib.suppress(OSError):
+                stat = os.stat(self.get_path(name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, digest in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            if digest == keep:
+                continue
+
+            # links to a removed asset fall back to the upstream one
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.get_path(digest))
+            total_size -= size
+
+        mirror_size.set(total_size)
+
+
+release_asset_cache = ReleaseAssetCache()
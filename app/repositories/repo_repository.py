@@ -63,19 +63,20 @@ class RepoRepository(BaseRepository):
         )
         is_valid_object(repository_registry)
 
-        commits = self.git_repo_repository.get_branch_commits_with_tag(
+        self.git_repo_repository.is_valid_branch(
             repository_registry, repo.default_branch
         )
-        tags = self.git_repo_repository.get_tags_from_all_commits(commits)
 
         versions_list = []
         for commit, count in versions:
-            tag = list(filter(lambda item: item["commit"] == commit, tags))
+            target_commit = self.git_repo_repository.find_by_commit(
+                repository_registry, repo.default_branch, commit
+            )
             versions_list.append(
                 RepoVersionRead(
                     commit=commit,
                     unit_count=count,
-                    tag=tag[0]["tag"] if tag else None,
+                    tag=target_commit["tag"] if target_commit else None,
                 )
             )
 
@@ -83,6 +84,18 @@ class RepoRepository(BaseRepository):
             unit_count=count_with_version, versions=versions_list
         )
 
+    def get_compilable_by_registry(
+        self, repository_registry_uuid: uuid_pkg.UUID
+    ) -> list[Repo]:
+        return (
+            self.db.query(Repo)
+            .filter(
+                Repo.repository_registry_uuid == repository_registry_uuid,
+                Repo.is_compilable_repo.is_(True),
+            )
+            .all()
+        )
+
     def list(
         self, filters: RepoFilter, restriction: list[str] = None
     ) -> tuple[int, list[Repo]]:
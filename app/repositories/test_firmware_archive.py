@@ -0,0 +1,104 @@
+import io
+import tarfile
+import zipfile
+import zlib
+
+import pytest
+
+from app.dto.enum import FirmwareArchiveFormat
+from app.repositories.firmware_archive import (
+    ArchiveEntry,
+    FirmwareArchiveCache,
+)
+
+ENTRIES = [
+    ArchiveEntry("lib", None, 0o755, 1700000000),
+    ArchiveEntry("lib/utils.py", b"print(1)\n" * 100, 0o644, 1700000000),
+    ArchiveEntry("main.py", b"import lib\n", 0o755, 1700000000),
+]
+
+
+def read_archive(
+    data: bytes, archive_format: FirmwareArchiveFormat, wbits: int
+) -> dict:
+    if archive_format == FirmwareArchiveFormat.ZIP:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.testzip() is None
+            return {
+                info.filename: archive.read(info)
+                for info in archive.infolist()
+                if not info.is_dir()
+            }
+
+    if archive_format == FirmwareArchiveFormat.TGZ:
+        producer = zlib.decompressobj(wbits=wbits)
+        data = producer.decompress(data) + producer.flush()
+        assert producer.eof
+
+    with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+        return {
+            member.name.removeprefix("./"): archive.extractfile(member).read()
+            for member in archive.getmembers()
+            if member.isfile()
+        }
+
+
+@pytest.mark.parametrize(
+    ("archive_format", "wbits"),
+    [
+        (FirmwareArchiveFormat.ZIP, 15),
+        (FirmwareArchiveFormat.TAR, 15),
+        (FirmwareArchiveFormat.TGZ, 9),
+        (FirmwareArchiveFormat.TGZ, -15),
+        (FirmwareArchiveFormat.TGZ, 31),
+    ],
+)
+def test_cached_base_with_unit_tail(tmp_path, archive_format, wbits):
+    cache = FirmwareArchiveCache(str(tmp_path), 2**20)
+    builds = []
+
+    def get_entries():
+        builds.append(1)
+        return ENTRIES
+
+    for unit in ("first", "second"):
+        files = {"env.json": f'{{"unit": "{unit}"}}'.encode()}
+        firmware = cache.get_archive(
+            "key", archive_format, get_entries, files, wbits, 9
+        )
+        firmware.write_to(tmp_path / "firmware")
+        firmware.close()
+
+        data = (tmp_path / "firmware").read_bytes()
+        assert len(data) == firmware.size
+        assert read_archive(data, archive_format, wbits) == {
+            "lib/utils.py": ENTRIES[1].data,
+            "main.py": ENTRIES[2].data,
+            **files,
+        }
+
+    assert len(builds) == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = FirmwareArchiveCache(str(tmp_path), 1)
+    for key in ("a", "b"):
+        cache.get_archive(
+            key, FirmwareArchiveFormat.TAR, lambda: ENTRIES, {}
+        ).close()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "b.base",
+        "b.lock",
+    ]
+
+
+def test_builds_of_one_key_are_identical(tmp_path):
+    for path in ("first", "second"):
+        FirmwareArchiveCache(str(tmp_path / path), 2**20).get_archive(
+            "key", FirmwareArchiveFormat.TGZ, lambda: ENTRIES, {}
+        ).close()
+
+    assert (tmp_path / "first/key.base").read_bytes() == (
+        tmp_path / "second/key.base"
+    ).read_bytes()
@@ -0,0 +1,28 @@
+from app.repositories.git_artifact_cache import GitArtifactCache
+
+
+def test_parsed_once_and_bounded_by_bytes():
+    cache = GitArtifactCache(maxsize=30)
+    loads = []
+
+    def loader(value: str):
+        def load():
+            loads.append(value)
+            return f'{{"key": "{value}"}}'
+
+        return load
+
+    assert cache.get(("file", "a"), "a", loader("a")) == {"key": "a"}
+    assert cache.get(("file", "a"), "a", loader("a")) == {"key": "a"}
+    assert loads == ["a"]
+
+    # 12 bytes each, the third one evicts the least recently used
+    cache.get(("file", "b"), "b", loader("b"))
+    cache.get(("file", "a"), "a", loader("a"))
+    cache.get(("file", "c"), "c", loader("c"))
+    assert loads == ["a", "b", "c"]
+    assert ("file", "b") not in cache.cache
+    assert cache.cache.currsize == 24
+
+    cache.get(("file", "big"), "big", loader("x" * 64))
+    assert ("file", "big") not in cache.cache
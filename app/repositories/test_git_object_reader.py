@@ -0,0 +1,25 @@
+from git import Repo as GitRepo
+
+from app.repositories.git_object_reader import GitObjectReader
+
+
+def test_read_missing_and_restart(tmp_path):
+    repo = GitRepo.init(tmp_path)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    (tmp_path / "env_example.json").write_text("{}")
+    repo.index.add(["env_example.json"])
+    commit = repo.index.commit("init").hexsha
+
+    reader = GitObjectReader(str(tmp_path))
+    assert reader.read(f"{commit}:env_example.json") == b"{}"
+    assert reader.read(f"{commit}:schema_example.json") is None
+    assert reader.exists(f"{commit}:env_example.json")
+
+    # the killed cat-file is started again on the next request
+    reader.repo.git.cat_file_all.proc.kill()
+    reader.repo.git.cat_file_all.proc.wait()
+    assert reader.read(f"{commit}:env_example.json") == b"{}"
+
+    reader.close()
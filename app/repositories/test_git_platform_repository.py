@@ -0,0 +1,94 @@
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.domain.repository_registry_model import RepositoryRegistry
+from app.repositories.git_platform_repository import GitlabPlatformClient
+from app.schemas.pydantic.repository_registry import Credentials
+
+RELEASES = [
+    {
+        "tag_name": f"v{i}",
+        "commit": {"id": f"{i:040x}"},
+        "assets": {
+            "sources": [],
+            "links": [{"id": i, "name": "fw", "url": f"/{i}"}],
+        },
+    }
+    for i in range(250)
+]
+
+
+class GitlabHandler(BaseHTTPRequestHandler):
+    requests: Counter
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        self.requests[path] += 1
+
+        if path == "/api/v4/projects/group%2Fname":
+            return self.send_json({"id": 7})
+
+        if path == "/api/v4/projects/7":
+            return self.send_json({"statistics": {"repository_size": 42}})
+
+        params = dict(item.split("=") for item in query.split("&"))
+        page, per_page = int(params["page"]), int(params["per_page"])
+        etag = f'"page-{page}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.requests["not modified"] += 1
+            self.send_response(304)
+            self.end_headers()
+            return None
+
+        return self.send_json(
+            RELEASES[(page - 1) * per_page : page * per_page],
+            {"ETag": etag, "X-Total-Pages": "3"},
+        )
+
+    def send_json(self, data, headers=None):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def gitlab():
+    GitlabHandler.requests = Counter()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GitlabHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def test_gitlab_cached_id_and_conditional_pages(gitlab):
+    client = GitlabPlatformClient(
+        RepositoryRegistry(
+            repository_url=f"http://127.0.0.1:{gitlab.server_port}/group/name.git"
+        ),
+        Credentials.model_validate({"username": "user", "pat_token": "test"}),
+    )
+
+    releases = client.get_releases()
+    assert list(releases) == [f"v{i}" for i in range(250)]
+    assert releases["v3"] == [("fw", "/3")]
+
+    # the second sync resolves no id and gets 304 for every page
+    assert client.get_releases() == releases
+    assert client.get_repo_size() == 42
+
+    assert GitlabHandler.requests["/api/v4/projects/group%2Fname"] == 1
+    assert GitlabHandler.requests["/api/v4/projects/7/releases"] == 6
+    assert GitlabHandler.requests["not modified"] == 3
+
+    assert client.get_release_assets()["v3"] == [("fw", "/3", f"3:{3:040x}")]
@@ -0,0 +1,129 @@
+import json
+import os
+
+from git import Repo as GitRepo
+
+from app.repositories.git_object_reader import GitObjectReader
+from app.repositories.git_repo_repository import GitRepoRepository
+
+
+def test_firmware_entries_skip_pepeignore(tmp_path, monkeypatch):
+    repo = GitRepo.init(tmp_path)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+
+    files = {
+        ".pepeignore": "docs/\n*.md\n",
+        "main.py": "import lib\n",
+        "env.json": "{}",
+        "README.md": "readme",
+        "docs/index.txt": "docs",
+        "lib/utils.py": "print(1)\n",
+        "lib/notes.md": "notes",
+    }
+    for path, data in files.items():
+        (tmp_path / path).parent.mkdir(exist_ok=True)
+        (tmp_path / path).write_text(data)
+    repo.index.add(list(files))
+    commit = repo.index.commit("init")
+
+    reader = GitObjectReader(str(tmp_path))
+    monkeypatch.setattr(
+        GitRepoRepository, "get_object_reader", lambda _self, _registry: reader
+    )
+
+    entries = {
+        entry.name: entry
+        for entry in GitRepoRepository().get_firmware_entries(
+            None, commit.hexsha
+        )
+    }
+    reader.close()
+
+    assert sorted(entries) == [".pepeignore", "lib", "lib/utils.py", "main.py"]
+    assert entries["lib"].data is None
+    assert entries["main.py"].data == b"import lib\n"
+    assert entries["main.py"].mtime == commit.committed_date
+
+
+def test_clone_fetches_into_existing(tmp_path):
+    origin = GitRepo.init(tmp_path / "origin", initial_branch="main")
+    with origin.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    origin.index.commit("init")
+    origin.create_head("dev")
+
+    path = str(tmp_path / "clone")
+    git_repo_repository = GitRepoRepository()
+    git_repo_repository.clone(origin.git_dir, path)
+    inode = os.stat(f"{path}/.git").st_ino
+
+    origin.delete_head("dev")
+    commit = origin.index.commit("update").hexsha
+    git_repo_repository.clone(origin.git_dir, path)
+
+    # refs are updated in place, the physic repository is never missing
+    assert os.stat(f"{path}/.git").st_ino == inode
+    index = git_repo_repository.save_version_index(path)
+    assert index.get_branch_names() == ["main"]
+    assert index.get_commits("main")[0]["commit"] == commit
+
+
+def test_firmware_delta_entries(tmp_path, monkeypatch):
+    repo = GitRepo.init(tmp_path / "repo")
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+
+    def commit(files: dict, removed: tuple = ()) -> str:
+        for path, data in files.items():
+            (tmp_path / "repo" / path).parent.mkdir(exist_ok=True)
+            (tmp_path / "repo" / path).write_text(data)
+        repo.index.add(list(files))
+        if removed:
+            repo.index.remove(list(removed), working_tree=True)
+        return repo.index.commit("update").hexsha
+
+    from_commit = commit(
+        {"main.py": "v1", "old.py": "old", "lib/utils.py": "utils"}
+    )
+    to_commit = commit(
+        {
+            ".pepeignore": "docs/\n",
+            "main.py": "v2",
+            "new.py": "new",
+            "docs/index.md": "docs",
+            "env.json": "{}",
+        },
+        removed=("old.py",),
+    )
+
+    reader = GitObjectReader(str(tmp_path / "repo"))
+    monkeypatch.setattr(
+        GitRepoRepository, "get_object_reader", lambda _self, _registry: reader
+    )
+
+    entries = list(
+        GitRepoRepository().get_firmware_delta_entries(
+            None, from_commit, to_commit
+        )
+    )
+    reader.close()
+
+    manifest = json.loads(entries[0].data)
+    assert entries[0].name == "delta_manifest.json"
+    assert manifest["changed"] == [
+        ".pepeignore",
+        "env.json",
+        "main.py",
+        "new.py",
+        "schema.json",
+    ]
+    assert manifest["deleted"] == ["old.py"]
+    assert {entry.name: entry.data for entry in entries[1:]} == {
+        ".pepeignore": b"docs/\n",
+        "main.py": b"v2",
+        "new.py": b"new",
+    }
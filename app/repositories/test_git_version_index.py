@@ -0,0 +1,40 @@
+from git import Repo as GitRepo
+
+from app.repositories.git_version_index import GitVersionIndex
+
+
+def make_repo(path) -> GitRepo:
+    origin = GitRepo.init(path / "origin", initial_branch="main")
+    with origin.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+
+    for i in range(3):
+        origin.index.commit(f"commit {i}")
+        if i != 1:
+            origin.create_tag(f"v{i}", message=f"release {i}" if i else None)
+
+    return GitRepo.clone_from(origin.working_tree_dir, path / "clone")
+
+
+def test_build_and_lookup(tmp_path):
+    repo = make_repo(tmp_path)
+    index = GitVersionIndex.from_dict(GitVersionIndex.build(repo).to_dict())
+
+    commits = index.get_commits("main")
+    assert index.get_branch_names() == ["main"]
+    assert [item["summary"] for item in commits] == [
+        "commit 2",
+        "commit 1",
+        "commit 0",
+    ]
+    assert [item["tag"] for item in commits] == ["v2", None, "v0"]
+
+    # annotated tags resolve to their commit
+    assert index.tag_commits["v2"] == repo.head.commit.hexsha
+    assert index.get_tagged_commits("main")[0]["tag"] == "v2"
+
+    assert index.find_by_commit("main", commits[1]["commit"]) == commits[1]
+    assert index.find_by_commit("main", "0" * 40) is None
+    assert index.find_by_commit("dev", commits[1]["commit"]) is None
+    assert not index.has_branch("dev")
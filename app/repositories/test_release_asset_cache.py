@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from app.configs.errors import GitPlatformClientError
+from app.repositories.release_asset_cache import ReleaseAssetCache
+
+
+def test_mirror_by_content_and_evict(tmp_path):
+    cache = ReleaseAssetCache(str(tmp_path), 10)
+    downloads = []
+
+    def download(data):
+        def write(f, max_size):
+            downloads.append(data)
+            if len(data) > max_size:
+                msg = "too large"
+                raise GitPlatformClientError(msg)
+            f.write(data)
+
+        return write
+
+    digest = cache.mirror(
+        "https://host/v1/esp32.bin", "1", download(b"firmware")
+    )
+    assert (
+        cache.mirror("https://host/v1/esp32.bin", "1", download(b"x"))
+        == digest
+    )
+    assert cache.mirror(
+        "https://host/v2/esp32.bin", "2", download(b"firmware")
+    ) == (digest)
+    assert downloads == [b"firmware", b"firmware"]
+
+    assert cache.get_link("https://host/v1/esp32.bin").endswith(digest)
+    assert cache.get_link("https://host/v3/esp32.bin") == (
+        "https://host/v3/esp32.bin"
+    )
+    assert cache.open(digest) == f"{tmp_path}/assets/{digest}"
+    assert cache.open("../links") is None
+
+    # over the budget the old asset goes, its links point upstream again
+    cache.mirror("https://host/v3/esp32.bin", "3", download(b"firmware 3"))
+    assert cache.open(digest) is None
+    assert cache.get_link("https://host/v1/esp32.bin") == (
+        "https://host/v1/esp32.bin"
+    )
+
+    # one asset over the per asset cap is not kept at all
+    with pytest.raises(GitPlatformClientError):
+        cache.mirror(
+            "https://host/v4/esp32.bin", "4", download(b"big firmware")
+        )
+    assert cache.get_link("https://host/v4/esp32.bin") == (
+        "https://host/v4/esp32.bin"
+    )
+    assert not [
+        name
+        for name in os.listdir(f"{tmp_path}/assets")
+        if name.endswith(".tmp")
+    ]
+
+
+def test_replaced_asset_behind_same_link(tmp_path):
+    cache = ReleaseAssetCache(str(tmp_path), 100)
+
+    def download(data):
+        def write(f, _max_size):
+            f.write(data)
+
+        return write
+
+    link = "https://host/v1/esp32.bin"
+    digest = cache.mirror(link, "1:2024-01-01", download(b"firmware"))
+    assert cache.mirror(link, "1:2024-01-01", download(b"x")) == digest
+
+    # the platform kept the link, the new identity downloads it again
+    new_digest = cache.mirror(link, "1:2024-02-01", download(b"fixed"))
+    assert new_digest != digest
+    assert cache.get_link(link).endswith(new_digest)
@@ -8,6 +8,11 @@ from fastapi.params import Query
 from app.configs.clickhouse import get_clickhouse_client
 from app.dto.clickhouse.log import UnitLog
 from app.dto.clickhouse.orm import ClickhouseOrm
+from app.dto.enum import DeleteQueueEntity
+from app.repositories.delete_queue_repository import (
+    DeleteQueueRepository,
+    get_deleted_before_condition,
+)
 from app.schemas.gql.inputs.unit import UnitLogFilterInput
 from app.schemas.pydantic.unit import UnitLogFilter
 
@@ -20,6 +25,7 @@ class UnitLogRepository:
     ) -> None:
         self.client = client
         self.orm = ClickhouseOrm(client)
+        self.delete_queue_repository = DeleteQueueRepository(client)
 
     def create(self, unit_log: UnitLog) -> int:
         return self.orm.insert("unit_logs", [unit_log])
@@ -35,8 +41,13 @@ class UnitLogRepository:
         )
 
     def delete(self, uuid: uuid_pkg.UUID) -> None:
-        query = "delete from unit_logs where unit_uuid = %(uuid)s"
-        self.client.execute(query, {"uuid": uuid})
+        self.delete_queue_repository.enqueue(
+            DeleteQueueEntity.UNIT_LOG, [uuid]
+        )
+
+    def delete_queued(self, cutoffs: dict[uuid_pkg.UUID, int]) -> None:
+        condition = get_deleted_before_condition("unit_uuid", cutoffs)
+        self.client.execute(f"delete from unit_logs where {condition}")
 
     def list(
         self, filters: UnitLogFilter | UnitLogFilterInput
@@ -46,6 +57,15 @@ class UnitLogRepository:
             "select count() as count from unit_logs where unit_uuid = %(uuid)s"
         )
 
+        deleted_before = self.delete_queue_repository.get_deleted_before(
+            DeleteQueueEntity.UNIT_LOG, filters.uuid
+        )
+        if deleted_before is not None:
+            hidden_rows = f" AND toUnixTimestamp64Milli(insert_datetime) >= {deleted_before}"
+
+            query += hidden_rows
+            count_query += hidden_rows
+
         filters.level = [] if filters.level is None else filters.level
 
         if filters.level:
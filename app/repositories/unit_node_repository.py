@@ -1,14 +1,32 @@
+import datetime
 import uuid as uuid_pkg
 
 from fastapi import Depends
 from fastapi.params import Query
-from sqlalchemy import func
+from sqlalchemy import (
+    Boolean,
+    String,
+    and_,
+    column,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    true,
+    values,
+)
 from sqlalchemy.orm import aliased
+from sqlalchemy.sql import Select
 from sqlmodel import Session
 
 from app.configs.db import get_session
+from app.domain.permission_model import Permission
+from app.domain.unit_model import Unit
 from app.domain.unit_node_edge_model import UnitNodeEdge
 from app.domain.unit_node_model import UnitNode
+from app.dto.enum import PermissionEntities, UnitNodeTypeEnum
 from app.repositories.base_repository import BaseRepository
 from app.repositories.utils import (
     apply_enums,
@@ -29,6 +47,143 @@ class UnitNodeRepository(BaseRepository):
         self.db.bulk_save_objects(unit_nodes)
         self.db.commit()
 
+    def reconcile(
+        self, units: list[Unit], schema_nodes: list[dict]
+    ) -> list[uuid_pkg.UUID]:
+        """
+        Missing nodes of the schema are inserted for all units with their
+        permissions, nodes out of the schema are deleted with theirs by
+        cascade. Pending changes of the units go in the same transaction.
+        Returns other units that lost an edge to a deleted node
+        """
+        unit_uuids = [unit.uuid for unit in units]
+        if not unit_uuids:
+            self.db.commit()
+            return []
+
+        now = datetime.datetime.now(datetime.UTC)
+        defaults = UnitNode(type="", topic_name="")
+
+        if schema_nodes:
+            schema = values(
+                column("type", String),
+                column("topic_name", String),
+                column("is_data_pipe_active", Boolean),
+                column("data_pipe_yml", String),
+                name="schema_nodes",
+            ).data(
+                [
+                    (
+                        node["type"],
+                        node["topic_name"],
+                        node["is_data_pipe_active"],
+                        node["data_pipe_yml"],
+                    )
+                    for node in schema_nodes
+                ]
+            )
+            exists_node = (
+                select(UnitNode.uuid)
+                .where(
+                    UnitNode.unit_uuid == Unit.uuid,
+                    UnitNode.type == schema.c.type,
+                    UnitNode.topic_name == schema.c.topic_name,
+                )
+                .exists()
+            )
+
+            inserted = self.db.execute(
+                insert(UnitNode)
+                .from_select(
+                    [
+                        "uuid",
+                        "type",
+                        "visibility_level",
+                        "is_rewritable_input",
+                        "max_connections",
+                        "topic_name",
+                        "create_datetime",
+                        "last_update_datetime",
+                        "is_data_pipe_active",
+                        "data_pipe_yml",
+                        "data_pipe_status",
+                        "creator_uuid",
+                        "unit_uuid",
+                    ],
+                    select(
+                        func.gen_random_uuid(),
+                        schema.c.type,
+                        Unit.visibility_level,
+                        literal(defaults.is_rewritable_input),
+                        literal(defaults.max_connections),
+                        schema.c.topic_name,
+                        literal(now),
+                        literal(now),
+                        schema.c.is_data_pipe_active,
+                        schema.c.data_pipe_yml,
+                        literal(defaults.data_pipe_status, String),
+                        Unit.creator_uuid,
+                        Unit.uuid,
+                    )
+                    .select_from(Unit)
+                    .join(schema, true())
+                    .where(Unit.uuid.in_(unit_uuids), ~exists_node),
+                )
+                .returning(
+                    UnitNode.uuid, UnitNode.unit_uuid, UnitNode.creator_uuid
+                )
+            ).all()
+
+            if inserted:
+                self.db.execute(
+                    insert(Permission),
+                    [
+                        {
+                            "uuid": uuid_pkg.uuid4(),
+                            "agent_type": agent_type,
+                            "agent_user_uuid": agent_user_uuid,
+                            "agent_unit_uuid": agent_unit_uuid,
+                            "resource_type": PermissionEntities.UNIT_NODE,
+                            "resource_unit_node_uuid": uuid,
+                        }
+                        for uuid, unit_uuid, creator_uuid in inserted
+                        for agent_type, agent_user_uuid, agent_unit_uuid in (
+                            (PermissionEntities.UNIT, None, unit_uuid),
+                            (PermissionEntities.USER, creator_uuid, None),
+                        )
+                    ],
+                )
+
+        schema_topics = {
+            node_type: [
+                node["topic_name"]
+                for node in schema_nodes
+                if node["type"] == node_type
+            ]
+            for node_type in UnitNodeTypeEnum
+        }
+        is_stale = and_(
+            UnitNode.unit_uuid.in_(unit_uuids),
+            or_(
+                *(
+                    and_(
+                        UnitNode.type == node_type,
+                        UnitNode.topic_name.not_in(topics),
+                    )
+                    for node_type, topics in schema_topics.items()
+                )
+            ),
+        )
+
+        # edges of the stale outputs go with them by cascade
+        linked_unit_uuids = self.get_linked_unit_uuids(
+            select(UnitNode.uuid).where(is_stale)
+        )
+        self.db.execute(delete(UnitNode).where(is_stale))
+        self.db.commit()
+
+        return linked_unit_uuids
+
     def get_by_topic(
         self, unit_uuid: uuid_pkg.UUID, unit_node: UnitNode
     ) -> UnitNode:
@@ -42,42 +197,66 @@ class UnitNodeRepository(BaseRepository):
             .first()
         )
 
-    def get_nodes_with_edges(self, unit_uuid: uuid_pkg.UUID) -> list[tuple]:
-        unit_node_edge_alias = aliased(UnitNodeEdge)
-        unit_node_alias = aliased(UnitNode)
+    def get_nodes_with_edges(
+        self, unit_uuids: list[uuid_pkg.UUID]
+    ) -> dict[uuid_pkg.UUID, list[tuple]]:
+        """
+        Nodes of many units in one query, each with the output nodes linked
+        to it
+        """
+        output_node = aliased(UnitNode)
 
-        edge_subquery = (
+        rows = (
             self.db.query(
+                UnitNode.unit_uuid,
+                UnitNode.uuid,
+                UnitNode.topic_name,
+                UnitNode.type,
                 func.json_agg(
                     func.json_build_array(
-                        unit_node_edge_alias.node_output_uuid,
-                        unit_node_alias.topic_name,
+                        UnitNodeEdge.node_output_uuid, output_node.topic_name
                     )
-                ).label("test")
+                )
+                .filter(UnitNodeEdge.uuid.is_not(None))
+                .label("edges"),
             )
-            .select_from(unit_node_edge_alias)
-            .join(
-                unit_node_alias,
-                unit_node_edge_alias.node_output_uuid == unit_node_alias.uuid,
+            .outerjoin(
+                UnitNodeEdge, UnitNodeEdge.node_input_uuid == UnitNode.uuid
             )
-            .filter(unit_node_edge_alias.node_input_uuid == UnitNode.uuid)
-        )
-
-        return (
-            self.db.query(
+            .outerjoin(
+                output_node, UnitNodeEdge.node_output_uuid == output_node.uuid
+            )
+            .filter(UnitNode.unit_uuid.in_(unit_uuids))
+            .group_by(
+                UnitNode.unit_uuid,
                 UnitNode.uuid,
                 UnitNode.topic_name,
                 UnitNode.type,
-                edge_subquery.label("edges"),
             )
-            .select_from(UnitNodeEdge)
-            .outerjoin(
-                UnitNode,
-                UnitNodeEdge.node_input_uuid == UnitNode.uuid,
-                full=True,
+            .all()
+        )
+
+        nodes_with_edges = {uuid: [] for uuid in unit_uuids}
+        for unit_uuid, *node in rows:
+            nodes_with_edges[unit_uuid].append(tuple(node))
+        return nodes_with_edges
+
+    def get_linked_unit_uuids(
+        self, output_node_uuids: Select | list[uuid_pkg.UUID]
+    ) -> list[uuid_pkg.UUID]:
+        """
+        Units with an input linked to one of the output nodes
+        """
+        return (
+            self.db.execute(
+                select(UnitNode.unit_uuid)
+                .join(
+                    UnitNodeEdge, UnitNodeEdge.node_input_uuid == UnitNode.uuid
+                )
+                .where(UnitNodeEdge.node_output_uuid.in_(output_node_uuids))
+                .distinct()
             )
-            .filter(UnitNode.unit_uuid == unit_uuid)
-            .group_by(UnitNode.uuid, UnitNode.topic_name, UnitNode.type)
+            .scalars()
             .all()
         )
 
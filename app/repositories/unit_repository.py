@@ -1,4 +1,5 @@
 import uuid as uuid_pkg
+from collections.abc import Iterable, Sequence
 
 from fastapi import Depends
 from fastapi.params import Query
@@ -168,6 +169,9 @@ class UnitRepository(BaseRepository):
             else [(item, []) for item in query.all()]
         )
 
+    def get_by_uuids(self, uuids: Iterable[uuid_pkg.UUID]) -> Sequence[Unit]:
+        return self.db.exec(select(Unit).where(Unit.uuid.in_(uuids))).all()
+
     def is_valid_name(self, name: str, uuid: uuid_pkg.UUID | None = None):
         if not is_valid_string_with_rules(name):
             msg = "Name is not correct"
@@ -237,4 +237,4 @@ async def datasource(
     filters: DatasourceFilter = Depends(DatasourceFilter),
     grafana_service: GrafanaService = Depends(get_grafana_service),
 ) -> list[DatasourceTimeSeriesData]:
-    return grafana_service.get_datasource_data(filters)
+    return await grafana_service.get_datasource_data(filters)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 
 from app.configs.rest import get_metrics_service
-from app.schemas.pydantic.metrics import BaseMetricsRead
+from app.schemas.pydantic.metrics import BaseMetricsRead, ClickhouseMetricsRead
 from app.services.metrics_service import MetricsService
 
 router = APIRouter()
@@ -12,3 +12,10 @@ def get_base_metrics(
     metrics_service: MetricsService = Depends(get_metrics_service),
 ):
     return metrics_service.get_instance_metrics()
+
+
+@router.get("/clickhouse", response_model=ClickhouseMetricsRead)
+def get_clickhouse_metrics(
+    metrics_service: MetricsService = Depends(get_metrics_service),
+):
+    return metrics_service.get_clickhouse_metrics()
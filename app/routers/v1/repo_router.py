@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, status
 
 from app.configs.rest import get_repo_service
 from app.schemas.pydantic.repo import (
+    FirmwareRolloutRead,
     PlatformRead,
     RepoCreate,
     RepoFilter,
@@ -78,7 +79,7 @@ def update(
 
 
 @router.patch(
-    "/update_units_firmware/{uuid}", status_code=status.HTTP_204_NO_CONTENT
+    "/update_units_firmware/{uuid}", response_model=FirmwareRolloutRead
 )
 def update_units_firmware(
     uuid: uuid_pkg.UUID, repo_service: RepoService = Depends(get_repo_service)
@@ -86,6 +87,13 @@ def update_units_firmware(
     return repo_service.update_units_firmware(uuid)
 
 
+@router.get("/firmware_rollout/{uuid}", response_model=FirmwareRolloutRead)
+def get_firmware_rollout(
+    uuid: uuid_pkg.UUID, repo_service: RepoService = Depends(get_repo_service)
+):
+    return repo_service.get_firmware_rollout(uuid)
+
+
 @router.post("/bulk_update", status_code=status.HTTP_204_NO_CONTENT)
 def bulk_update(repo_service: RepoService = Depends(get_repo_service)):
     return repo_service.bulk_update_units_firmware()
@@ -2,18 +2,23 @@ import logging
 import time
 import uuid as uuid_pkg
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, status
 from fastapi_utilities import repeat_at
+from starlette.responses import FileResponse, Response
 
 from app.configs.clickhouse import get_hand_clickhouse_client
 from app.configs.db import get_hand_session
+from app.configs.errors import RepositoryRegistryError
 from app.configs.rest import get_repo_service, get_repository_registry_service
 from app.configs.utils import acquire_file_lock
+from app.repositories.release_asset_cache import release_asset_cache
 from app.schemas.pydantic.repository_registry import (
     CommitFilter,
     CommitRead,
     Credentials,
     OneRepositoryRegistryCredentials,
+    RepositoriesRegistryReadiness,
+    RepositoriesRegistryReadinessStatus,
     RepositoriesRegistryResult,
     RepositoryRegistryCreate,
     RepositoryRegistryFilter,
@@ -82,6 +87,51 @@ def create(
     )
 
 
+@router.get("/readiness", response_model=RepositoriesRegistryReadiness)
+def get_readiness(
+    repository_registry_service: RepositoryRegistryService = Depends(
+        get_repository_registry_service
+    ),
+):
+    return repository_registry_service.get_readiness()
+
+
+@router.get(
+    "/readiness/status", response_model=RepositoriesRegistryReadinessStatus
+)
+def get_readiness_status(
+    repository_registry_service: RepositoryRegistryService = Depends(
+        get_repository_registry_service
+    ),
+):
+    return repository_registry_service.get_readiness_status()
+
+
+@router.get("/release_assets/{digest}")
+def get_release_asset(
+    digest: str,
+    if_none_match: str | None = Header(default=None),
+):
+    path = release_asset_cache.open(digest)
+    if path is None:
+        msg = "Release asset not found"
+        raise RepositoryRegistryError(msg)
+
+    # content addressed, the digest is a strong validator forever
+    headers = {
+        "ETag": f'"{digest}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if if_none_match == headers["ETag"]:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+        )
+
+    return FileResponse(
+        path, media_type="application/octet-stream", headers=headers
+    )
+
+
 @router.get("/{uuid}", response_model=RepositoryRegistryRead)
 def get(
     uuid: uuid_pkg.UUID,
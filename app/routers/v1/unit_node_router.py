@@ -1,11 +1,21 @@
+import logging
 import os
+import time
 import uuid as uuid_pkg
 
 from fastapi import APIRouter, Depends, UploadFile, status
+from fastapi_utilities import repeat_at
 from starlette.background import BackgroundTask
 from starlette.responses import FileResponse
 
+from app import settings
+from app.configs.clickhouse import get_hand_clickhouse_client
 from app.configs.rest import get_unit_node_service
+from app.configs.utils import acquire_file_lock
+from app.dto.enum import DeleteQueueEntity
+from app.repositories.data_pipe_repository import DataPipeRepository
+from app.repositories.delete_queue_repository import DeleteQueueRepository
+from app.repositories.unit_log_repository import UnitLogRepository
 from app.schemas.pydantic.shared import UnitNodeRead, UnitNodesResult
 from app.schemas.pydantic.unit_node import (
     DataPipeFilter,
@@ -22,6 +32,67 @@ from app.services.unit_node_service import UnitNodeService
 router = APIRouter()
 
 
+@router.on_event("startup")
+@repeat_at(cron="*/10 * * * *")
+def automatic_trim_n_records():
+    if not settings.pu_ff_datapipe_enable:
+        return
+
+    lock_fd = acquire_file_lock("tmp/trim_n_records.lock")
+
+    time.sleep(10)
+
+    if lock_fd:
+        with get_hand_clickhouse_client() as cc:
+            count = DataPipeRepository(client=cc, db=None).trim_n_records()
+        logging.info(f"Trim n_last_entry for {count} unit nodes")
+
+        lock_fd.close()
+    else:
+        logging.info("Skip trim n_last_entry without lock")
+
+
+@router.on_event("startup")
+@repeat_at(cron="* * * * *")
+def automatic_flush_delete_queue():
+    lock_fd = acquire_file_lock("tmp/flush_delete_queue.lock")
+
+    time.sleep(10)
+
+    if lock_fd:
+        with get_hand_clickhouse_client() as cc:
+            delete_queue_repository = DeleteQueueRepository(cc)
+            repositories = {
+                DeleteQueueEntity.DATA_PIPE: DataPipeRepository(
+                    client=cc, db=None
+                ),
+                DeleteQueueEntity.UNIT_LOG: UnitLogRepository(cc),
+            }
+
+            for (
+                entity,
+                cutoffs,
+            ) in delete_queue_repository.list_pending().items():
+                repositories[entity].delete_queued(cutoffs)
+                delete_queue_repository.remove(entity, cutoffs)
+                logging.info(
+                    f"Delete {entity.value} data for {len(cutoffs)} uuids"
+                )
+
+            queue_depth, queue_lag, mutation_count, mutation_lag = (
+                delete_queue_repository.get_stats()
+            )
+
+        logging.info(
+            f"Delete queue depth {queue_depth}, lag {queue_lag} s, "
+            f"pending mutations {mutation_count}, lag {mutation_lag} s"
+        )
+
+        lock_fd.close()
+    else:
+        logging.info("Skip flush delete queue without lock")
+
+
 @router.get("/{uuid}", response_model=UnitNodeRead)
 def get(
     uuid: uuid_pkg.UUID,
@@ -114,11 +185,11 @@ async def set_data_pipe_data_csv(
 @router.delete(
     "/delete_data_pipe_data/{uuid}", status_code=status.HTTP_204_NO_CONTENT
 )
-def delete_data_pipe_data(
+async def delete_data_pipe_data(
     uuid: uuid_pkg.UUID,
     unit_node_service: UnitNodeService = Depends(get_unit_node_service),
 ):
-    return unit_node_service.delete_data_pipe_data(uuid)
+    return await unit_node_service.delete_data_pipe_data(uuid)
 
 
 @router.get("", response_model=UnitNodesResult)
@@ -1,15 +1,18 @@
 import logging
-import os
+import mimetypes
 import uuid as uuid_pkg
 
 from fastapi import APIRouter, Depends, File, UploadFile, status
-from starlette.background import BackgroundTask
-from starlette.responses import FileResponse, PlainTextResponse
+from starlette.responses import (
+    PlainTextResponse,
+    StreamingResponse,
+)
 
 from app.configs.clickhouse import get_hand_clickhouse_client
 from app.configs.db import get_hand_session
 from app.configs.rest import get_unit_service
-from app.dto.enum import BackendTopicCommand
+from app.dto.enum import BackendTopicCommand, FirmwareArchiveFormat
+from app.repositories.firmware_archive import FirmwareArchive
 from app.schemas.pydantic.repo import TargetVersionRead
 from app.schemas.pydantic.shared import MqttRead
 from app.schemas.pydantic.unit import (
@@ -26,6 +29,7 @@ from app.schemas.pydantic.unit import (
     UnitUpdate,
 )
 from app.services.unit_service import UnitService
+from app.services.utils import token_depends
 
 router = APIRouter()
 
@@ -69,43 +73,71 @@ def get_current_schema(
     return unit_service.get_current_schema(uuid)
 
 
+def get_firmware_response(
+    firmware: FirmwareArchive, archive_format: FirmwareArchiveFormat
+) -> StreamingResponse:
+    return StreamingResponse(
+        firmware.iter_chunks(),
+        media_type=mimetypes.guess_type(f"firmware.{archive_format.value}")[0],
+        headers={"Content-Length": str(firmware.size)},
+    )
+
+
 @router.get("/firmware/zip/{uuid}", response_model=bytes)
-def get_firmware_zip(
+async def get_firmware_zip(
     uuid: uuid_pkg.UUID, unit_service: UnitService = Depends(get_unit_service)
 ):
-    zip_filepath = unit_service.get_unit_firmware_zip(uuid)
-
-    def cleanup():
-        os.remove(zip_filepath)
-
-    return FileResponse(zip_filepath, background=BackgroundTask(cleanup))
+    return get_firmware_response(
+        await unit_service.build_unit_firmware(
+            uuid, FirmwareArchiveFormat.ZIP
+        ),
+        FirmwareArchiveFormat.ZIP,
+    )
 
 
 @router.get("/firmware/tar/{uuid}", response_model=bytes)
-def get_firmware_tar(
+async def get_firmware_tar(
     uuid: uuid_pkg.UUID, unit_service: UnitService = Depends(get_unit_service)
 ):
-    tar_filepath = unit_service.get_unit_firmware_tar(uuid)
-
-    def cleanup():
-        os.remove(tar_filepath)
-
-    return FileResponse(tar_filepath, background=BackgroundTask(cleanup))
+    return get_firmware_response(
+        await unit_service.build_unit_firmware(
+            uuid, FirmwareArchiveFormat.TAR
+        ),
+        FirmwareArchiveFormat.TAR,
+    )
 
 
 @router.get("/firmware/tgz/{uuid}", response_model=bytes)
-def get_firmware_tgz(
+async def get_firmware_tgz(
     uuid: uuid_pkg.UUID,
     wbits: int = 9,
     level: int = 9,
     unit_service: UnitService = Depends(get_unit_service),
 ):
-    tgz_filepath = unit_service.get_unit_firmware_tgz(uuid, wbits, level)
+    return get_firmware_response(
+        await unit_service.build_unit_firmware(
+            uuid, FirmwareArchiveFormat.TGZ, wbits, level
+        ),
+        FirmwareArchiveFormat.TGZ,
+    )
 
-    def cleanup():
-        os.remove(tgz_filepath)
 
-    return FileResponse(tgz_filepath, background=BackgroundTask(cleanup))
+@router.get("/firmware/delta/{uuid}", response_model=bytes)
+async def get_firmware_delta(
+    uuid: uuid_pkg.UUID,
+    from_commit: str,
+    to_commit: str | None = None,
+    archive_format: FirmwareArchiveFormat = FirmwareArchiveFormat.TGZ,
+    wbits: int = 9,
+    level: int = 9,
+    unit_service: UnitService = Depends(get_unit_service),
+):
+    return get_firmware_response(
+        await unit_service.build_unit_firmware_delta(
+            uuid, from_commit, to_commit, archive_format, wbits, level
+        ),
+        archive_format,
+    )
 
 
 @router.post(
@@ -211,6 +243,23 @@ def get_unit_logs(
     )
 
 
+@router.get("/log_stream/{uuid}", response_class=StreamingResponse)
+def get_unit_log_stream(
+    uuid: uuid_pkg.UUID,
+    jwt_token: str | None = Depends(token_depends),
+):
+    # the stream outlives the request, so access is checked in a short
+    # session instead of holding a pool connection while the viewer is open
+    with get_hand_session() as db:
+        log_stream = get_unit_service(db, None, jwt_token).log_stream(uuid)
+
+    return StreamingResponse(
+        log_stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post(
     "/convert_toml_to_md",
     response_class=PlainTextResponse,
@@ -72,7 +72,7 @@ async def set_data_pipe_data_csv(
 
 
 @strawberry.mutation()
-def delete_data_pipe_data(info: Info, uuid: uuid_pkg.UUID) -> NoneType:
+async def delete_data_pipe_data(info: Info, uuid: uuid_pkg.UUID) -> NoneType:
     unit_node_service = get_unit_node_service_gql(info)
-    unit_node_service.delete_data_pipe_data(uuid)
+    await unit_node_service.delete_data_pipe_data(uuid)
     return NoneType()
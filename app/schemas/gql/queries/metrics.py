@@ -2,10 +2,21 @@ import strawberry
 from strawberry.types import Info
 
 from app.configs.gql import get_metrics_service_gql
-from app.schemas.gql.types.metrics import BaseMetricsType
+from app.schemas.gql.types.metrics import (
+    BaseMetricsType,
+    ClickhouseMetricsType,
+)
 
 
 @strawberry.field()
 def get_base_metrics(info: Info) -> BaseMetricsType:
     unit_node_service = get_metrics_service_gql(info)
     return BaseMetricsType(**unit_node_service.get_instance_metrics().dict())
+
+
+@strawberry.field()
+def get_clickhouse_metrics(info: Info) -> ClickhouseMetricsType:
+    metrics_service = get_metrics_service_gql(info)
+    return ClickhouseMetricsType(
+        **metrics_service.get_clickhouse_metrics().dict()
+    )
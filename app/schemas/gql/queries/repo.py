@@ -6,6 +6,7 @@ from strawberry.types import Info
 from app.configs.gql import get_repo_service_gql
 from app.schemas.gql.inputs.repo import RepoFilterInput
 from app.schemas.gql.types.repo import (
+    FirmwareRolloutType,
     PlatformType,
     ReposResultType,
     RepoType,
@@ -53,3 +54,13 @@ def get_versions(uuid: uuid_pkg.UUID, info: Info) -> RepoVersionsType:
         RepoVersionType(**item) for item in item_list.versions
     ]
     return item_list
+
+
+@strawberry.field()
+def get_firmware_rollout(
+    uuid: uuid_pkg.UUID, info: Info
+) -> FirmwareRolloutType:
+    repo_service = get_repo_service_gql(info)
+    return FirmwareRolloutType(
+        **repo_service.get_firmware_rollout(uuid).dict()
+    )
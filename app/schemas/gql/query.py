@@ -5,10 +5,14 @@ from app.schemas.gql.queries.grafana import (
     get_dashboard_panels,
     get_dashboards,
 )
-from app.schemas.gql.queries.metrics import get_base_metrics
+from app.schemas.gql.queries.metrics import (
+    get_base_metrics,
+    get_clickhouse_metrics,
+)
 from app.schemas.gql.queries.permission import get_resource_agents
 from app.schemas.gql.queries.repo import (
     get_available_platforms,
+    get_firmware_rollout,
     get_repo,
     get_repos,
     get_versions,
@@ -58,6 +62,7 @@ Query = create_type(
         get_repositories_registry,
         get_available_platforms,
         get_versions,
+        get_firmware_rollout,
         get_unit,
         get_unit_env,
         get_target_version,
@@ -72,6 +77,7 @@ Query = create_type(
         check_data_pipe_config,
         get_data_pipe_config,
         get_base_metrics,
+        get_clickhouse_metrics,
         get_resource_agents,
         get_dashboard,
         get_dashboards,
@@ -11,3 +11,11 @@ class BaseMetricsType(TypeInputMixin):
     unit_count: int
     unit_node_count: int
     unit_node_edge_count: int
+
+
+@strawberry.type()
+class ClickhouseMetricsType(TypeInputMixin):
+    delete_queue_depth: int
+    delete_queue_lag: int
+    mutation_count: int
+    mutation_lag: int
@@ -4,7 +4,7 @@ from datetime import datetime
 import strawberry
 from strawberry import field
 
-from app.dto.enum import VisibilityLevel
+from app.dto.enum import FirmwareRolloutStatus, VisibilityLevel
 from app.schemas.gql.type_input_mixin import TypeInputMixin
 
 
@@ -66,3 +66,25 @@ class RepoVersionType(TypeInputMixin):
 class RepoVersionsType(TypeInputMixin):
     unit_count: int
     versions: list[RepoVersionType]
+
+
+@strawberry.type()
+class FirmwareRolloutType(TypeInputMixin):
+    uuid: uuid_pkg.UUID
+    repo_uuid: uuid_pkg.UUID
+
+    status: FirmwareRolloutStatus
+    error: str | None = None
+
+    target_commit: str | None = None
+    target_tag: str | None = None
+    rate: float
+
+    count_total: int
+    count_success_update: int
+    count_error_update: int
+    eta: float | None = None
+
+    create_datetime: datetime
+    last_update_datetime: datetime
+    finish_datetime: datetime | None = None
@@ -27,6 +27,7 @@ from app.repositories.unit_log_repository import UnitLogRepository
 from app.repositories.unit_repository import UnitRepository
 from app.schemas.mqtt.manager import mqtt_manager
 from app.schemas.mqtt.utils import get_only_reserved_keys, get_topic_split
+from app.services.unit_log_stream import publish_unit_logs
 from app.services.validators import (
     is_valid_json,
     is_valid_object,
@@ -159,27 +160,25 @@ async def _handle_log_message(unit_uuid, payload):
 
             server_datetime = datetime.datetime.now(datetime.UTC)
 
-            unit_log_repository.bulk_create(
-                [
-                    UnitLog(
-                        uuid=uuid.uuid4(),
-                        level=item["level"].capitalize(),
-                        unit_uuid=unit.uuid,
-                        text=item["text"],
-                        create_datetime=(
-                            item["create_datetime"]
-                            if item.get("create_datetime")
-                            else server_datetime
-                            + datetime.timedelta(seconds=inc)
-                        ),
-                        expiration_datetime=datetime.datetime.now(datetime.UTC)
-                        + datetime.timedelta(
-                            seconds=settings.pu_unit_log_expiration
-                        ),
-                    )
-                    for inc, item in enumerate(log_data)
-                ]
-            )
+            unit_logs = [
+                UnitLog(
+                    uuid=uuid.uuid4(),
+                    level=item["level"].capitalize(),
+                    unit_uuid=unit.uuid,
+                    text=item["text"],
+                    create_datetime=(
+                        item["create_datetime"]
+                        if item.get("create_datetime")
+                        else server_datetime + datetime.timedelta(seconds=inc)
+                    ),
+                    expiration_datetime=datetime.datetime.now(datetime.UTC)
+                    + datetime.timedelta(
+                        seconds=settings.pu_unit_log_expiration
+                    ),
+                )
+                for inc, item in enumerate(log_data)
+            ]
+            unit_log_repository.bulk_create(unit_logs)
 
             unit.last_update_datetime = datetime.datetime.now(datetime.UTC)
             unit_repository.update(
@@ -189,6 +188,13 @@ async def _handle_log_message(unit_uuid, payload):
 
         except Exception as e:
             logging.error(e)
+            return
+
+    # live readers are optional, a failed publish keeps the stored logs
+    try:
+        await publish_unit_logs(unit_uuid, unit_logs)
+    except Exception as e:
+        logging.error(e)
 
 
 @mqtt.on_disconnect()
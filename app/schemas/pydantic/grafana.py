@@ -7,6 +7,7 @@ from pydantic import BaseModel
 from app.dto.enum import (
     DashboardPanelTypeEnum,
     DashboardStatus,
+    DatasourceDownsampling,
     DatasourceFormat,
     OrderByDate,
 )
@@ -29,6 +30,10 @@ class DatasourceFilter(BasePaginationRestMixin):
 
     order_by_create_date: OrderByDate | None = OrderByDate.desc
 
+    max_data_points: int | None = None
+    interval_ms: int | None = None
+    downsampling: DatasourceDownsampling | None = None
+
     @property
     def relative_interval(self):
         return (
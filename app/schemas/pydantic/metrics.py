@@ -8,3 +8,10 @@ class BaseMetricsRead(BaseModel):
     unit_count: int
     unit_node_count: int
     unit_node_edge_count: int
+
+
+class ClickhouseMetricsRead(BaseModel):
+    delete_queue_depth: int
+    delete_queue_lag: int
+    mutation_count: int
+    mutation_lag: int
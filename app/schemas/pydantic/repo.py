@@ -5,7 +5,11 @@ from datetime import datetime
 from fastapi import Query
 from pydantic import BaseModel
 
-from app.dto.enum import OrderByDate, VisibilityLevel
+from app.dto.enum import (
+    FirmwareRolloutStatus,
+    OrderByDate,
+    VisibilityLevel,
+)
 from app.schemas.pydantic.pagination import BasePaginationRestMixin
 
 
@@ -101,3 +105,25 @@ class RepoVersionRead(BaseModel):
 class RepoVersionsRead(BaseModel):
     unit_count: int
     versions: list[RepoVersionRead]
+
+
+class FirmwareRolloutRead(BaseModel):
+    uuid: uuid_pkg.UUID
+    repo_uuid: uuid_pkg.UUID
+
+    status: FirmwareRolloutStatus
+    error: str | None = None
+
+    target_commit: str | None = None
+    target_tag: str | None = None
+    rate: float
+
+    count_total: int
+    count_success_update: int
+    count_error_update: int
+    # seconds left at the current speed, None before the first batch
+    eta: float | None = None
+
+    create_datetime: datetime
+    last_update_datetime: datetime
+    finish_datetime: datetime | None = None
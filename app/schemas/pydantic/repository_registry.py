@@ -57,6 +57,23 @@ class RepositoryRegistryRead(BaseModel):
     branches: list[str]
 
 
+class RepositoryRegistryReadiness(BaseModel):
+    uuid: uuid_pkg.UUID
+    sync_status: RepositoryRegistryStatus | None = None
+    is_available: bool
+
+
+class RepositoriesRegistryReadiness(BaseModel):
+    is_ready: bool
+    count: int
+    available_count: int
+    repositories_registry: list[RepositoryRegistryReadiness]
+
+
+class RepositoriesRegistryReadinessStatus(BaseModel):
+    is_ready: bool
+
+
 class RepositoriesRegistryResult(BaseModel):
     count: int
     repositories_registry: list[RepositoryRegistryRead]
@@ -0,0 +1,204 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import time
+import uuid as uuid_pkg
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+
+from cachetools import LRUCache
+from redis.exceptions import RedisError
+
+from app import settings
+from app.configs.redis import get_redis_client
+from app.dto.enum import ProcessingPolicyType
+from app.schemas.pydantic.grafana import DatasourceTimeSeriesData
+from app.utils.utils import ensure_timezone_aware
+from app.validators.data_pipe import ProcessingPolicyConfig
+
+CACHE_PREFIX = "datasource_cache"
+
+
+def get_datasource_cache_ttl(
+    processing_policy: ProcessingPolicyConfig, interval_ms: int | None
+) -> int:
+    """
+    Data of a policy changes no faster than one of its buckets
+    """
+    match processing_policy.policy_type:
+        case ProcessingPolicyType.AGGREGATION:
+            ttl = processing_policy.time_window_size
+        case ProcessingPolicyType.TIME_WINDOW:
+            ttl = (
+                processing_policy.time_window_size
+                / settings.pu_grafana_max_data_points
+            )
+        case _:
+            ttl = 0
+
+    ttl = max(ttl, (interval_ms or 0) / 1000)
+
+    return int(
+        min(
+            max(ttl, settings.pu_datasource_cache_min_ttl),
+            settings.pu_datasource_cache_max_ttl,
+        )
+    )
+
+
+def align_datetime(
+    value: datetime | None, step: int, *, is_ceil: bool = False
+) -> datetime | None:
+    if value is None:
+        return None
+
+    timestamp = ensure_timezone_aware(value).timestamp()
+    aligned = timestamp // step * step
+    if is_ceil and aligned < timestamp:
+        aligned += step
+
+    return datetime.fromtimestamp(aligned, UTC)
+
+
+class DatasourceCache:
+    """
+    In-process LRU in front of Redis, identical misses share one query
+    """
+
+    def __init__(
+        self, maxsize: int = settings.pu_datasource_cache_size
+    ) -> None:
+        self.local: LRUCache[str, tuple[float, list]] = LRUCache(maxsize)
+        self.in_flight: dict[str, asyncio.Future] = {}
+
+    async def get_key(
+        self, unit_node_uuid: uuid_pkg.UUID, params: dict
+    ) -> str:
+        generation = await self._get_generation(unit_node_uuid)
+        digest = hashlib.sha256(
+            json.dumps(params, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+        return f"{CACHE_PREFIX}:{unit_node_uuid}:{generation}:{digest}"
+
+    async def get_or_load(
+        self,
+        key: str,
+        ttl: int,
+        loader: Callable[[], Awaitable[list[DatasourceTimeSeriesData]]],
+    ) -> list[DatasourceTimeSeriesData]:
+        entry = self.local.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        future = self.in_flight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # the request that ran the query has gone, run it here
+                if not future.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            data = await self._load(key, ttl, loader)
+            self.local[key] = (time.monotonic() + ttl, data)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            future.set_exception(e)
+            # waiters re-raise it, without waiters it is already raised here
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+
+    async def invalidate(self, unit_node_uuid: uuid_pkg.UUID) -> None:
+        prefix = f"{CACHE_PREFIX}:{unit_node_uuid}:"
+        for key in [key for key in self.local if key.startswith(prefix)]:
+            self.local.pop(key, None)
+
+        try:
+            # other workers see the new generation and miss their local copies
+            await get_redis_client().incr(
+                f"{CACHE_PREFIX}:generation:{unit_node_uuid}"
+            )
+        except RedisError as e:
+            logging.warning(f"Datasource cache invalidation failed: {e}")
+
+    @staticmethod
+    async def _get_generation(unit_node_uuid: uuid_pkg.UUID) -> str:
+        try:
+            return (
+                await get_redis_client().get(
+                    f"{CACHE_PREFIX}:generation:{unit_node_uuid}"
+                )
+                or "0"
+            )
+        except RedisError:
+            # keys that never match, the cache is bypassed until Redis is back
+            return f"offline-{time.monotonic_ns()}"
+
+    @staticmethod
+    async def _load(
+        key: str,
+        ttl: int,
+        loader: Callable[[], Awaitable[list[DatasourceTimeSeriesData]]],
+    ) -> list[DatasourceTimeSeriesData]:
+        redis = get_redis_client()
+        try:
+            cached = await redis.get(key)
+            if cached is not None:
+                return [
+                    DatasourceTimeSeriesData(**item)
+                    for item in json.loads(cached)
+                ]
+
+            is_owner = await redis.set(
+                f"{key}:lock",
+                1,
+                nx=True,
+                ex=settings.pu_datasource_cache_lock_timeout,
+            )
+        except RedisError as e:
+            logging.warning(f"Datasource cache unavailable: {e}")
+            return await loader()
+
+        if not is_owner:
+            # the same query already runs in another worker
+            deadline = (
+                time.monotonic() + settings.pu_datasource_cache_lock_timeout
+            )
+            with contextlib.suppress(RedisError):
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(0.05)
+                    cached = await redis.get(key)
+                    if cached is not None:
+                        return [
+                            DatasourceTimeSeriesData(**item)
+                            for item in json.loads(cached)
+                        ]
+            return await loader()
+
+        try:
+            data = await loader()
+            with contextlib.suppress(RedisError):
+                await redis.set(
+                    key,
+                    json.dumps([item.model_dump() for item in data]),
+                    ex=ttl,
+                )
+            return data
+        finally:
+            with contextlib.suppress(RedisError):
+                await redis.delete(f"{key}:lock")
+
+
+datasource_cache = DatasourceCache()
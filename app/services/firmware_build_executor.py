@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from prometheus_client import Counter, Histogram
+
+from app import settings
+from app.configs.errors import FirmwareBuildError
+from app.dto.enum import FirmwareArchiveFormat
+from app.repositories.firmware_archive import FirmwareArchive
+
+build_requests = Counter(
+    "pepeunit_firmware_build_requests",
+    "Firmware build requests by how they were served",
+    ["format", "result"],
+)
+build_wait = Histogram(
+    "pepeunit_firmware_build_wait_seconds",
+    "Time a firmware build waits in the queue",
+    ["format"],
+)
+build_duration = Histogram(
+    "pepeunit_firmware_build_seconds",
+    "Duration of a firmware build",
+    ["format"],
+)
+
+
+@dataclass
+class FirmwareBuild:
+    future: Future
+    waiters: int = 0
+
+
+class FirmwareBuildExecutor:
+    """
+    Firmware builds on their own pool, apart from the threadpool of the sync
+    endpoints. Requests for the same key share one build, a build not
+    started in time is dropped from the queue
+    """
+
+    def __init__(
+        self,
+        max_workers: int = settings.pu_firmware_build_workers,
+        max_queue: int = settings.pu_firmware_build_queue_size,
+        queue_timeout: float = settings.pu_firmware_build_queue_timeout,
+    ) -> None:
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="firmware_build"
+        )
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.builds: dict[str, FirmwareBuild] = {}
+        self.lock = threading.Lock()
+
+    async def run(
+        self,
+        key: str,
+        archive_format: FirmwareArchiveFormat,
+        build: Callable[[], FirmwareArchive],
+    ) -> FirmwareArchive:
+        with self.lock:
+            item = self.builds.get(key)
+            if item is not None:
+                result = "coalesced"
+            elif len(self.builds) >= self.max_queue:
+                build_requests.labels(archive_format.value, "rejected").inc()
+                msg = "Firmware build queue is full, retry later"
+                raise FirmwareBuildError(msg)
+            else:
+                result = "built"
+                item = FirmwareBuild(
+                    self.executor.submit(
+                        self._build,
+                        archive_format,
+                        time.perf_counter(),
+                        build,
+                    )
+                )
+                self.builds[key] = item
+            item.waiters += 1
+
+        build_requests.labels(archive_format.value, result).inc()
+
+        try:
+            waiter = asyncio.wrap_future(item.future)
+            try:
+                archive = await asyncio.wait_for(
+                    asyncio.shield(waiter), self.queue_timeout
+                )
+            except TimeoutError:
+                # a started build is waited for, a queued one is dropped
+                if not item.future.cancel():
+                    archive = await waiter
+            except asyncio.CancelledError:
+                # dropped by another waiter of the same build
+                if not item.future.cancelled():
+                    raise
+
+            if item.future.cancelled():
+                build_requests.labels(archive_format.value, "timeout").inc()
+                msg = (
+                    "Firmware build was not started in "
+                    f"{self.queue_timeout} s, retry later"
+                )
+                raise FirmwareBuildError(msg)
+
+            return archive.share()
+        finally:
+            self._leave(key, item)
+
+    def _leave(self, key: str, item: FirmwareBuild) -> None:
+        with self.lock:
+            item.waiters -= 1
+            if item.waiters:
+                return
+            if self.builds.get(key) is item:
+                del self.builds[key]
+
+        # every waiter has its own copy of the archive
+        item.future.add_done_callback(self._close_archive)
+
+    @staticmethod
+    def _close_archive(future: Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+
+    @staticmethod
+    def _build(
+        archive_format: FirmwareArchiveFormat,
+        submitted: float,
+        build: Callable[[], FirmwareArchive],
+    ) -> FirmwareArchive:
+        started = time.perf_counter()
+        build_wait.labels(archive_format.value).observe(started - submitted)
+        try:
+            return build()
+        finally:
+            build_duration.labels(archive_format.value).observe(
+                time.perf_counter() - started
+            )
+
+
+firmware_build_executor = FirmwareBuildExecutor()
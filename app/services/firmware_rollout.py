@@ -0,0 +1,77 @@
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app import settings
+
+
+class RateLimiter:
+    """
+    Spaces the calls of all threads evenly, rate is calls per second
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_time)
+            self.next_time = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class FirmwareRolloutEngine:
+    """
+    Units are updated by batches on a thread pool, a batch opens its own
+    session and every Unit waits for the shared rate limiter
+    """
+
+    def __init__(
+        self,
+        rate: float = settings.pu_firmware_rollout_rate,
+        max_workers: int = settings.pu_firmware_rollout_workers,
+        batch_size: int = settings.pu_firmware_rollout_batch_size,
+    ) -> None:
+        self.rate = rate
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+
+    def run(
+        self,
+        items: list,
+        process_batch: Callable[[list, RateLimiter], tuple[int, int]],
+        name: str = "Rollout",
+    ) -> Iterator[tuple[int, int]]:
+        """
+        Yields success and error counts of every finished batch, name
+        prefixes the log of failed batches
+        """
+        limiter = RateLimiter(self.rate)
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="firmware_rollout"
+        ) as executor:
+            futures = {
+                executor.submit(process_batch, batch, limiter): batch
+                for batch in (
+                    items[start : start + self.batch_size]
+                    for start in range(0, len(items), self.batch_size)
+                )
+            }
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception:
+                    # batch failed before its units, all of them are errors
+                    batch = futures[future]
+                    logging.exception(
+                        f"{name}: batch of {len(batch)} units failed, "
+                        f"units {[str(item) for item in batch]}"
+                    )
+                    yield 0, len(batch)
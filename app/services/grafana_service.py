@@ -1,8 +1,10 @@
 import datetime
+import hashlib
 import json
 import uuid as uuid_pkg
 
 from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
 
 from app import settings
 from app.configs.errors import GrafanaError
@@ -54,6 +56,11 @@ from app.schemas.pydantic.unit_node import (
     DataPipeFilter,
 )
 from app.services.access_service import AccessService
+from app.services.datasource_cache import (
+    align_datetime,
+    datasource_cache,
+    get_datasource_cache_ttl,
+)
 from app.services.unit_node_service import UnitNodeService
 from app.services.user_service import UserService
 from app.services.validators import is_valid_object, is_valid_string_with_rules
@@ -84,7 +91,7 @@ class GrafanaService:
         self.user_service = user_service
         self.unit_node_service = unit_node_service
 
-    def get_datasource_data(
+    async def get_datasource_data(
         self, filters: DatasourceFilter
     ) -> list[DatasourceTimeSeriesData]:
         self.access_service.authorization.check_access(
@@ -107,19 +114,74 @@ class GrafanaService:
             json.loads(unit_node.data_pipe_yml), is_business_validator=True
         )
 
-        return self.grafana_repository.get_datasource_data(
-            DataPipeFilter(
-                uuid=self.access_service.current_agent.uuid,
-                type=data_pipe_entity.processing_policy.policy_type,
-                start_agg_window_datetime=filters.start_agg_datetime,
-                end_agg_window_datetime=filters.end_agg_datetime,
-                relative_time=filters.relative_time,
-                order_by_create_date=filters.order_by_create_date,
-                offset=filters.offset,
-                limit=filters.limit,
+        if filters.max_data_points is not None and filters.max_data_points < 1:
+            msg = "max_data_points must be >= 1"
+            raise GrafanaError(msg)
+
+        if filters.interval_ms is not None and filters.interval_ms < 0:
+            msg = "interval_ms must be >= 0"
+            raise GrafanaError(msg)
+
+        ttl = get_datasource_cache_ttl(
+            data_pipe_entity.processing_policy, filters.interval_ms
+        )
+        # absolute ranges of panel refreshes are widened to ttl boundaries,
+        # so refreshes inside one ttl share the same query and key
+        data_pipe_filter = DataPipeFilter(
+            uuid=unit_node.uuid,
+            type=data_pipe_entity.processing_policy.policy_type,
+            start_agg_window_datetime=align_datetime(
+                filters.start_agg_datetime, ttl
+            ),
+            end_agg_window_datetime=align_datetime(
+                filters.end_agg_datetime, ttl, is_ceil=True
             ),
-            data_pipe_entity,
-            unit_node_panel,
+            relative_time=filters.relative_time,
+            order_by_create_date=filters.order_by_create_date,
+            offset=filters.offset,
+            limit=filters.limit,
+        )
+
+        def load() -> list[DatasourceTimeSeriesData]:
+            return self.grafana_repository.get_datasource_data(
+                data_pipe_filter,
+                data_pipe_entity,
+                unit_node_panel,
+                downsampling=filters.downsampling,
+                max_data_points=filters.max_data_points,
+                interval_ms=filters.interval_ms,
+            )
+
+        if not settings.pu_ff_datasource_cache_enable:
+            return await run_in_threadpool(load)
+
+        key = await datasource_cache.get_key(
+            unit_node.uuid,
+            {
+                "config": hashlib.sha256(
+                    unit_node.data_pipe_yml.encode()
+                ).hexdigest(),
+                "is_forced_to_json": unit_node_panel.is_forced_to_json,
+                "start": data_pipe_filter.start_agg_window_datetime,
+                "end": data_pipe_filter.end_agg_window_datetime,
+                "relative_time": filters.relative_time,
+                # relative ranges move with now, one key per ttl period
+                "anchor": int(
+                    datetime.datetime.now(datetime.UTC).timestamp() // ttl
+                )
+                if filters.relative_time
+                else None,
+                "order": filters.order_by_create_date,
+                "offset": filters.offset,
+                "limit": filters.limit,
+                "downsampling": filters.downsampling,
+                "max_data_points": filters.max_data_points,
+                "interval_ms": filters.interval_ms,
+            },
+        )
+
+        return await datasource_cache.get_or_load(
+            key, ttl, lambda: run_in_threadpool(load)
         )
 
     def create_dashboard(
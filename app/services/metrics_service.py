@@ -1,7 +1,8 @@
 from cachetools import TTLCache
 from fastapi import Depends
 
-from app.dto.enum import AgentType
+from app.dto.enum import AgentType, UserRole
+from app.repositories.delete_queue_repository import DeleteQueueRepository
 from app.repositories.repo_repository import RepoRepository
 from app.repositories.repository_registry_repository import (
     RepositoryRegistryRepository,
@@ -10,7 +11,7 @@ from app.repositories.unit_node_edge_repository import UnitNodeEdgeRepository
 from app.repositories.unit_node_repository import UnitNodeRepository
 from app.repositories.unit_repository import UnitRepository
 from app.repositories.user_repository import UserRepository
-from app.schemas.pydantic.metrics import BaseMetricsRead
+from app.schemas.pydantic.metrics import BaseMetricsRead, ClickhouseMetricsRead
 from app.services.access_service import AccessService
 
 cache = TTLCache(maxsize=1, ttl=600)
@@ -25,6 +26,7 @@ class MetricsService:
         unit_node_repository: UnitNodeRepository = Depends(),
         unit_repository: UnitRepository = Depends(),
         user_repository: UserRepository = Depends(),
+        delete_queue_repository: DeleteQueueRepository = Depends(),
         access_service: AccessService = Depends(),
     ) -> None:
         self.repository_registry_repository = repository_registry_repository
@@ -33,6 +35,7 @@ class MetricsService:
         self.unit_node_repository = unit_node_repository
         self.unit_node_edge_repository = unit_node_edge_repository
         self.user_repository = user_repository
+        self.delete_queue_repository = delete_queue_repository
         self.access_service = access_service
 
     def get_instance_metrics(self) -> BaseMetricsRead:
@@ -57,3 +60,19 @@ class MetricsService:
         cache[cache_key] = metrics
 
         return metrics
+
+    def get_clickhouse_metrics(self) -> ClickhouseMetricsRead:
+        self.access_service.authorization.check_access(
+            [AgentType.USER], [UserRole.ADMIN]
+        )
+
+        queue_depth, queue_lag, mutation_count, mutation_lag = (
+            self.delete_queue_repository.get_stats()
+        )
+
+        return ClickhouseMetricsRead(
+            delete_queue_depth=queue_depth,
+            delete_queue_lag=queue_lag,
+            mutation_count=mutation_count,
+            mutation_lag=mutation_lag,
+        )
@@ -7,16 +7,23 @@ import uuid as uuid_pkg
 
 from fastapi import Depends
 
+from app import settings
+from app.domain.firmware_rollout_model import FirmwareRollout
 from app.domain.repo_model import Repo
 from app.domain.repository_registry_model import RepositoryRegistry
+from app.domain.unit_model import Unit
 from app.domain.user_model import User
 from app.dto.enum import (
     AgentType,
     BackendTopicCommand,
+    FirmwareRolloutStatus,
     OwnershipType,
     PermissionEntities,
     UserRole,
 )
+from app.repositories.firmware_rollout_repository import (
+    FirmwareRolloutRepository,
+)
 from app.repositories.git_repo_repository import GitRepoRepository
 from app.repositories.repo_repository import RepoRepository
 from app.repositories.unit_repository import UnitRepository
@@ -26,6 +33,7 @@ from app.schemas.gql.inputs.repo import (
     RepoUpdateInput,
 )
 from app.schemas.pydantic.repo import (
+    FirmwareRolloutRead,
     RepoCreate,
     RepoFilter,
     RepoUpdate,
@@ -33,9 +41,14 @@ from app.schemas.pydantic.repo import (
 )
 from app.schemas.pydantic.unit import UnitFilter
 from app.services.access_service import AccessService
+from app.services.firmware_rollout import FirmwareRolloutEngine, RateLimiter
 from app.services.permission_service import PermissionService
 from app.services.repository_registry_service import RepositoryRegistryService
-from app.services.thread import _process_bulk_update_units_firmware
+from app.services.thread import (
+    _process_bulk_update_units_firmware,
+    _process_firmware_rollout,
+    _process_firmware_rollout_batch,
+)
 from app.services.unit_service import UnitService
 from app.services.utils import (
     merge_two_dict_first_priority,
@@ -43,7 +56,6 @@ from app.services.utils import (
 )
 from app.services.validators import (
     is_emtpy_sequence,
-    is_valid_json,
     is_valid_object,
     is_valid_visibility_level,
 )
@@ -58,6 +70,7 @@ class RepoService:
         unit_service: UnitService = Depends(),
         permission_service: PermissionService = Depends(),
         access_service: AccessService = Depends(),
+        firmware_rollout_repository: FirmwareRolloutRepository = Depends(),
     ) -> None:
         self.repo_repository = repo_repository
         self.git_repo_repository = GitRepoRepository()
@@ -66,6 +79,7 @@ class RepoService:
         self.unit_service = unit_service
         self.permission_service = permission_service
         self.access_service = access_service
+        self.firmware_rollout_repository = firmware_rollout_repository
 
     def create(self, data: RepoCreate | RepoCreateInput) -> Repo:
         self.access_service.authorization.check_access([AgentType.USER])
@@ -133,19 +147,19 @@ class RepoService:
 
         platforms = []
         if repo.is_compilable_repo and repository_registry.releases_data:
-            releases = is_valid_json(
-                repository_registry.releases_data, "releases for compile repo"
+            releases = self.git_repo_repository.get_releases(
+                repository_registry
             )
 
             if target_tag:
                 with contextlib.suppress(KeyError):
                     platforms = releases[target_tag]
             elif target_commit:
-                commits = self.git_repo_repository.get_branch_commits_with_tag(
+                self.git_repo_repository.is_valid_branch(
                     repository_registry, repo.default_branch
                 )
                 commit = self.git_repo_repository.find_by_commit(
-                    commits, target_commit
+                    repository_registry, repo.default_branch, target_commit
                 )
                 if commit and commit.get("tag"):
                     platforms = releases[commit["tag"]]
@@ -235,9 +249,9 @@ class RepoService:
 
         return repo
 
-    def update_units_firmware(
+    def create_firmware_rollout(
         self, uuid: uuid_pkg.UUID, is_auto_update: bool = False
-    ) -> None:
+    ) -> FirmwareRollout:
         if not is_auto_update:
             self.access_service.authorization.check_access([AgentType.USER])
 
@@ -254,25 +268,144 @@ class RepoService:
                 repo, [OwnershipType.CREATOR]
             )
 
+        self.firmware_rollout_repository.is_valid_no_running(repo.uuid)
+
+        # target of auto updated units is the same for the whole Repo
+        target_commit, target_tag = (
+            self.git_repo_repository.get_target_repo_version(
+                repository_registry, repo
+            )
+        )
+
+        now = datetime.datetime.now(datetime.UTC)
+        return self.firmware_rollout_repository.create(
+            FirmwareRollout(
+                repo_uuid=repo.uuid,
+                status=FirmwareRolloutStatus.RUNNING,
+                target_commit=target_commit,
+                target_tag=target_tag,
+                rate=settings.pu_firmware_rollout_rate,
+                create_datetime=now,
+                last_update_datetime=now,
+            )
+        )
+
+    def update_units_firmware(
+        self, uuid: uuid_pkg.UUID, is_auto_update: bool = False
+    ) -> FirmwareRolloutRead:
+        firmware_rollout = self.create_firmware_rollout(uuid, is_auto_update)
+
+        threading.Thread(
+            target=_process_firmware_rollout,
+            args=(firmware_rollout.uuid,),
+            daemon=True,
+        ).start()
+
+        return self.mapper_firmware_rollout_to_read(firmware_rollout)
+
+    def run_firmware_rollout(self, firmware_rollout: FirmwareRollout) -> None:
+        repo = self.repo_repository.get(Repo(uuid=firmware_rollout.repo_uuid))
+        repository_registry = self.repository_registry_service.repository_registry_repository.get(
+            RepositoryRegistry(uuid=repo.repository_registry_uuid)
+        )
+
         count, units = self.unit_repository.list(
             UnitFilter(repo_uuid=repo.uuid, is_auto_update_from_repo_unit=True)
         )
+        unit_uuids = [unit[0].uuid for unit in units]
+        firmware_rollout.count_total = len(unit_uuids)
 
-        logging.info(f"{len(units)} units candidates update launched")
+        logging.info(
+            f"Rollout {firmware_rollout.uuid}: {len(unit_uuids)} units candidates update launched"
+        )
 
-        count_error_update = 0
-        count_success_update = 0
-        for unit in [unit[0] for unit in units]:
-            logging.info(f"Run update unit {unit.uuid}")
+        try:
+            # schema of the target is the same for every batch
+            self.git_repo_repository.is_valid_schema_file(
+                repository_registry, firmware_rollout.target_commit
+            )
+            schema_dict = self.git_repo_repository.get_schema_dict(
+                repository_registry, firmware_rollout.target_commit
+            )
 
-            try:
-                self.unit_service.sync_state_unit_nodes_for_version(
-                    repo, unit, repository_registry
+            def process_batch(
+                batch: list[uuid_pkg.UUID], limiter: RateLimiter
+            ) -> tuple[int, int]:
+                return _process_firmware_rollout_batch(
+                    firmware_rollout.uuid, batch, schema_dict, limiter
+                )
+
+            for count_success, count_error in FirmwareRolloutEngine(
+                firmware_rollout.rate
+            ).run(
+                unit_uuids, process_batch, f"Rollout {firmware_rollout.uuid}"
+            ):
+                firmware_rollout.count_success_update += count_success
+                firmware_rollout.count_error_update += count_error
+                firmware_rollout = self._save_firmware_rollout(
+                    firmware_rollout
+                )
+
+                logging.info(
+                    f"Rollout {firmware_rollout.uuid}: {firmware_rollout.count_success_update + firmware_rollout.count_error_update}/{firmware_rollout.count_total}, eta {self.get_firmware_rollout_eta(firmware_rollout)} s"
                 )
-                self.unit_service.unit_node_service.command_to_input_base_topic(
-                    uuid=unit.uuid,
-                    command=BackendTopicCommand.UPDATE,
-                    is_auto_update=True,
+
+            firmware_rollout.status = FirmwareRolloutStatus.COMPLETED
+        except Exception as e:
+            firmware_rollout.status = FirmwareRolloutStatus.ERROR
+            firmware_rollout.error = str(e)
+
+        firmware_rollout.finish_datetime = datetime.datetime.now(datetime.UTC)
+        firmware_rollout = self._save_firmware_rollout(firmware_rollout)
+
+        logging.info(
+            {
+                "repo": repo.uuid,
+                "status": firmware_rollout.status,
+                "count_success_update": firmware_rollout.count_success_update,
+                "count_error_update": firmware_rollout.count_error_update,
+            }
+        )
+
+    def update_units_firmware_batch(
+        self,
+        repo: Repo,
+        repository_registry: RepositoryRegistry,
+        units: list[Unit],
+        firmware_rollout: FirmwareRollout,
+        schema_dict: dict,
+        limiter: RateLimiter,
+    ) -> tuple[int, int]:
+        errors = self.unit_service.bulk_sync_state_unit_nodes_for_version(
+            repo,
+            repository_registry,
+            units,
+            firmware_rollout.target_commit,
+            schema_dict,
+        )
+        for uuid, error in errors.items():
+            logging.warning(f"Failed update unit {uuid} {error}")
+
+        units = [unit for unit in units if unit.uuid not in errors]
+
+        # firmware requests after the command find the schemas cached
+        self.unit_service.generate_current_schemas(
+            units, repository_registry, firmware_rollout.target_commit
+        )
+
+        count_success_update = 0
+        count_error_update = len(errors)
+        for unit in units:
+            limiter.acquire()
+            try:
+                self.unit_service.unit_node_service.publish_command(
+                    BackendTopicCommand.UPDATE,
+                    repo,
+                    repository_registry,
+                    unit,
+                    firmware_rollout.target_commit,
+                    firmware_rollout.target_tag,
+                    schema_dict,
                 )
                 logging.info(f"Successfully update unit {unit.uuid}")
                 count_success_update += 1
@@ -280,13 +413,65 @@ class RepoService:
                 logging.warning(f"Failed update unit {unit.uuid} {e}")
                 count_error_update += 1
 
-        result = {
-            "repo": repo.uuid,
-            "count_success_update": count_success_update,
-            "count_error_update": count_error_update,
-        }
+        return count_success_update, count_error_update
+
+    def get_firmware_rollout(self, uuid: uuid_pkg.UUID) -> FirmwareRolloutRead:
+        self.access_service.authorization.check_access([AgentType.USER])
+
+        repo = self.repo_repository.get(Repo(uuid=uuid))
+        is_valid_object(repo)
 
-        logging.info(result)
+        self.access_service.authorization.check_ownership(
+            repo, [OwnershipType.CREATOR]
+        )
+
+        firmware_rollout = self.firmware_rollout_repository.get_last_by_repo(
+            repo.uuid
+        )
+        is_valid_object(firmware_rollout)
+
+        return self.mapper_firmware_rollout_to_read(firmware_rollout)
+
+    def mapper_firmware_rollout_to_read(
+        self, firmware_rollout: FirmwareRollout
+    ) -> FirmwareRolloutRead:
+        return FirmwareRolloutRead(
+            **firmware_rollout.dict(),
+            eta=self.get_firmware_rollout_eta(firmware_rollout),
+        )
+
+    @staticmethod
+    def get_firmware_rollout_eta(
+        firmware_rollout: FirmwareRollout,
+    ) -> float | None:
+        if firmware_rollout.status != FirmwareRolloutStatus.RUNNING:
+            return 0.0
+
+        count_done = (
+            firmware_rollout.count_success_update
+            + firmware_rollout.count_error_update
+        )
+        if not count_done:
+            return None
+
+        elapsed = (
+            firmware_rollout.last_update_datetime
+            - firmware_rollout.create_datetime
+        ).total_seconds()
+        return round(
+            elapsed / count_done * (firmware_rollout.count_total - count_done),
+            1,
+        )
+
+    def _save_firmware_rollout(
+        self, firmware_rollout: FirmwareRollout
+    ) -> FirmwareRollout:
+        firmware_rollout.last_update_datetime = datetime.datetime.now(
+            datetime.UTC
+        )
+        return self.firmware_rollout_repository.update(
+            firmware_rollout.uuid, firmware_rollout
+        )
 
     def bulk_update_units_firmware(self, is_auto_update: bool = False) -> None:
         if not is_auto_update:
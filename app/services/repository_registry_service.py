@@ -1,10 +1,14 @@
 import datetime
+import functools
 import json
 import logging
 import shutil
+import time
 import uuid as uuid_pkg
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from fastapi import Depends
+from prometheus_client import Histogram
 
 from app import settings
 from app.configs.errors import (
@@ -26,6 +30,7 @@ from app.repositories.git_platform_repository import (
     GitPlatformClientABC,
 )
 from app.repositories.git_repo_repository import GitRepoRepository
+from app.repositories.release_asset_cache import release_asset_cache
 from app.repositories.repo_repository import RepoRepository
 from app.repositories.repository_registry_repository import (
     RepositoryRegistryRepository,
@@ -42,15 +47,26 @@ from app.schemas.pydantic.repository_registry import (
     CommitRead,
     Credentials,
     OneRepositoryRegistryCredentials,
+    RepositoriesRegistryReadiness,
+    RepositoriesRegistryReadinessStatus,
     RepositoryRegistryCreate,
     RepositoryRegistryFilter,
     RepositoryRegistryRead,
+    RepositoryRegistryReadiness,
 )
 from app.services.access_service import AccessService
 from app.services.permission_service import PermissionService
+from app.services.thread import _process_sync_repository_registry
 from app.services.validators import is_emtpy_sequence, is_valid_object
 from app.utils.utils import ensure_timezone_aware
 
+sync_duration = Histogram(
+    "pepeunit_repository_sync_seconds",
+    "Duration of the sync of a RepositoryRegistry with its platform",
+    ["platform", "status"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600),
+)
+
 
 class RepositoryRegistryService:
     def __init__(
@@ -193,18 +209,21 @@ class RepositoryRegistryService:
             repository_registry, filters.repo_branch
         )
 
-        commits = self.git_repo_repository.get_branch_commits_with_tag(
-            repository_registry, filters.repo_branch
-        )
-
         commits_with_tag = (
-            self.git_repo_repository.get_tags_from_all_commits(commits)
+            self.git_repo_repository.get_branch_tags(
+                repository_registry, filters.repo_branch
+            )
             if filters.only_tag
-            else commits
+            else self.git_repo_repository.get_branch_commits_with_tag(
+                repository_registry, filters.repo_branch
+            )
         )
 
-        return [CommitRead(**item) for item in commits_with_tag][
-            filters.offset : filters.offset + filters.limit
+        return [
+            CommitRead(**item)
+            for item in commits_with_tag[
+                filters.offset : filters.offset + filters.limit
+            ]
         ]
 
     def get_credentials(
@@ -299,21 +318,27 @@ class RepositoryRegistryService:
         self.git_repo_repository.delete_repo(repository_registry)
         self.repository_registry_repository.delete(repository_registry)
 
-    def sync_external_repository(
+    def set_sync_processing(
         self, repository_registry: RepositoryRegistry
     ) -> RepositoryRegistry:
-        self.is_sync_available(repository_registry)
-
         repository_registry.sync_status = RepositoryRegistryStatus.PROCESSING
         repository_registry.sync_error = None
         repository_registry.sync_last_datetime = datetime.datetime.now(
             datetime.UTC
         )
 
-        repository_registry = self.repository_registry_repository.update(
+        return self.repository_registry_repository.update(
             repository_registry.uuid, repository_registry
         )
 
+    def sync_external_repository(
+        self, repository_registry: RepositoryRegistry, is_queued: bool = False
+    ) -> RepositoryRegistry:
+        if not is_queued:
+            self.is_sync_available(repository_registry)
+            repository_registry = self.set_sync_processing(repository_registry)
+
+        started = time.perf_counter()
         try:
             # get size repository on external platform
             repository_size = self.get_platform(
@@ -331,7 +356,9 @@ class RepositoryRegistryService:
             self.git_repo_repository.clone(url, repo_save_path)
 
             # get releases assets
-            releases = self.get_platform(repository_registry).get_releases()
+            platform = self.get_platform(repository_registry)
+            release_assets = platform.get_release_assets()
+            releases = platform.get_releases(release_assets)
             repository_registry.releases_data = (
                 json.dumps(releases) if releases else None
             )
@@ -346,16 +373,62 @@ class RepositoryRegistryService:
             )
             repository_registry.local_repository_size = repository_size
 
+            if settings.pu_ff_release_asset_mirror_enable and release_assets:
+                self.mirror_release_assets(repository_registry, release_assets)
+
             repository_registry.sync_status = RepositoryRegistryStatus.UPDATED
             repository_registry.sync_error = None
         except CustomException as e:
             repository_registry.sync_status = RepositoryRegistryStatus.ERROR
             repository_registry.sync_error = e.message
 
+        duration = time.perf_counter() - started
+        sync_status = repository_registry.sync_status.value
+        sync_duration.labels(
+            repository_registry.platform, sync_status
+        ).observe(duration)
+        logging.info(
+            f"Sync RepositoryRegistry {repository_registry.uuid}: {sync_status} in {duration:.2f} s"
+        )
+
         return self.repository_registry_repository.update(
             repository_registry.uuid, repository_registry
         )
 
+    def mirror_release_assets(
+        self,
+        repository_registry: RepositoryRegistry,
+        release_assets: dict,
+    ) -> None:
+        """
+        Downloads the assets of tags targeted by compilable repos, devices
+        get them from the backend instead of the platform
+        """
+        tags = set()
+        for repo in self.repo_repository.get_compilable_by_registry(
+            repository_registry.uuid
+        ):
+            try:
+                _, tag = self.git_repo_repository.get_target_repo_version(
+                    repository_registry, repo
+                )
+            except CustomException:
+                continue
+            tags.add(tag)
+
+        platform = self.get_platform(repository_registry)
+        for tag in tags & release_assets.keys():
+            for _, link, identity in release_assets[tag]:
+                try:
+                    release_asset_cache.mirror(
+                        link,
+                        identity,
+                        functools.partial(platform.download, link),
+                    )
+                except CustomException as e:
+                    # devices fall back to the upstream link
+                    logging.warning(f"Skip mirror of {link}: {e.message}")
+
     def update_local_repository(self, uuid: uuid_pkg.UUID) -> None:
         self.access_service.authorization.check_access([AgentType.USER])
 
@@ -374,21 +447,90 @@ class RepositoryRegistryService:
         logging.info("Run sync all repository in RepositoryRegistry")
 
         local_physic_repository = self.git_repo_repository.get_local_registry()
+
         local_repository_registry = (
             self.repository_registry_repository.get_all()
         )
 
+        queue = {}
         for repository_registry in local_repository_registry:
-            if force or (
-                str(repository_registry.uuid) not in local_physic_repository
+            if not force and (
+                str(repository_registry.uuid) in local_physic_repository
             ):
+                continue
+
+            try:
+                self.is_sync_available(repository_registry)
+            except RepositoryRegistryError as e:
+                logging.info(f"Skip sync RepositoryRegistry: {e.message}")
+                continue
+
+            # queued registries are reported as syncing until their turn
+            self.set_sync_processing(repository_registry)
+            queue[repository_registry.uuid] = (
+                repository_registry.repository_url
+            )
+
+        with ThreadPoolExecutor(
+            max_workers=settings.pu_sync_repository_workers,
+            thread_name_prefix="repository_sync",
+        ) as executor:
+            futures = {
+                executor.submit(_process_sync_repository_registry, uuid): url
+                for uuid, url in queue.items()
+            }
+            for number, future in enumerate(as_completed(futures), 1):
+                try:
+                    sync_status = future.result()
+                except Exception as e:
+                    sync_status = e
                 logging.info(
-                    f"Run sync RepositoryRegistry: {repository_registry.repository_url}"
+                    f"Sync RepositoryRegistry {number}/{len(futures)}: {futures[future]} {sync_status}"
                 )
-                self.sync_external_repository(repository_registry)
 
         logging.info("End sync all repository in RepositoryRegistry")
 
+    def get_readiness(self) -> RepositoriesRegistryReadiness:
+        self.access_service.authorization.check_access(
+            [AgentType.BOT, AgentType.USER, AgentType.BACKEND]
+        )
+
+        return self._get_readiness()
+
+    def get_readiness_status(self) -> RepositoriesRegistryReadinessStatus:
+        # for probes without a token, the registries stay behind auth
+        return RepositoriesRegistryReadinessStatus(
+            is_ready=self._get_readiness().is_ready
+        )
+
+    def _get_readiness(self) -> RepositoriesRegistryReadiness:
+        local_physic_repository = set(
+            self.git_repo_repository.get_local_registry()
+        )
+        repositories_registry = [
+            RepositoryRegistryReadiness(
+                uuid=repository_registry.uuid,
+                sync_status=repository_registry.sync_status,
+                is_available=str(repository_registry.uuid)
+                in local_physic_repository,
+            )
+            for repository_registry in self.repository_registry_repository.get_all()
+        ]
+
+        return RepositoriesRegistryReadiness(
+            # ready when no registry waits for its first clone
+            is_ready=not any(
+                not item.is_available
+                and item.sync_status == RepositoryRegistryStatus.PROCESSING
+                for item in repositories_registry
+            ),
+            count=len(repositories_registry),
+            available_count=sum(
+                item.is_available for item in repositories_registry
+            ),
+            repositories_registry=repositories_registry,
+        )
+
     def backend_force_sync_local_repository_storage(self) -> None:
         self.access_service.authorization.check_access([AgentType.BACKEND])
 
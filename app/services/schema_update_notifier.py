@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+import uuid as uuid_pkg
+from collections.abc import Callable
+
+from prometheus_client import Counter
+
+from app import settings
+from app.services.thread import _process_schema_update
+
+schema_update_requests = Counter(
+    "pepeunit_schema_update_requests",
+    "SCHEMA_UPDATE requests, coalesced ones join a pending notification",
+    ["result"],
+)
+schema_update_notifications = Counter(
+    "pepeunit_schema_update_notifications",
+    "SCHEMA_UPDATE notifications sent to Units",
+    ["status"],
+)
+
+
+class SchemaUpdateNotifier:
+    """
+    Units are marked schema dirty and notified once after a quiet period,
+    a Unit changed without pause is notified no later than max_delay
+    """
+
+    def __init__(
+        self,
+        send: Callable[[list[uuid_pkg.UUID]], int],
+        delay: float = settings.pu_schema_update_delay,
+        max_delay: float = settings.pu_schema_update_max_delay,
+    ) -> None:
+        self.send = send
+        self.delay = delay
+        self.max_delay = max_delay
+        # unit uuid to the first mark and the due time
+        self.pending: dict[uuid_pkg.UUID, tuple[float, float]] = {}
+        self.condition = threading.Condition()
+        self.worker: threading.Thread | None = None
+
+    def mark(self, unit_uuid: uuid_pkg.UUID) -> None:
+        now = time.monotonic()
+        with self.condition:
+            if unit_uuid in self.pending:
+                schema_update_requests.labels("coalesced").inc()
+                first_mark = self.pending[unit_uuid][0]
+            else:
+                schema_update_requests.labels("scheduled").inc()
+                first_mark = now
+
+            self.pending[unit_uuid] = (
+                first_mark,
+                min(now + self.delay, first_mark + self.max_delay),
+            )
+
+            if self.worker is None:
+                self.worker = threading.Thread(
+                    target=self._run, name="schema_update", daemon=True
+                )
+                self.worker.start()
+            self.condition.notify()
+
+    def flush(self) -> None:
+        with self.condition:
+            unit_uuids = list(self.pending)
+            self.pending.clear()
+        self._send(unit_uuids)
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+
+                now = time.monotonic()
+                due_time = min(due for _, due in self.pending.values())
+                if due_time > now:
+                    self.condition.wait(due_time - now)
+                    continue
+
+                unit_uuids = [
+                    unit_uuid
+                    for unit_uuid, (_, due) in self.pending.items()
+                    if due <= now
+                ]
+                for unit_uuid in unit_uuids:
+                    del self.pending[unit_uuid]
+
+            self._send(unit_uuids)
+
+    def _send(self, unit_uuids: list[uuid_pkg.UUID]) -> None:
+        if not unit_uuids:
+            return
+
+        try:
+            count_sent = self.send(unit_uuids)
+        except Exception as e:
+            logging.error(f"Failed to send schema updates: {e}")
+            count_sent = 0
+
+        schema_update_notifications.labels("sent").inc(count_sent)
+        schema_update_notifications.labels("failed").inc(
+            len(unit_uuids) - count_sent
+        )
+
+
+schema_update_notifier = SchemaUpdateNotifier(_process_schema_update)
@@ -0,0 +1,70 @@
+import asyncio
+from datetime import UTC, datetime
+
+from app.dto.enum import ProcessingPolicyType
+from app.schemas.pydantic.grafana import DatasourceTimeSeriesData
+from app.services.datasource_cache import (
+    DatasourceCache,
+    align_datetime,
+    get_datasource_cache_ttl,
+)
+from app.validators.data_pipe import ProcessingPolicyConfig
+
+
+class LocalDatasourceCache(DatasourceCache):
+    """
+    Without the Redis tier
+    """
+
+    @staticmethod
+    async def _load(_key, _ttl, loader):
+        return await loader()
+
+
+def test_ttl_follows_policy_window():
+    aggregation = ProcessingPolicyConfig.model_construct(
+        policy_type=ProcessingPolicyType.AGGREGATION, time_window_size=60
+    )
+    n_records = ProcessingPolicyConfig.model_construct(
+        policy_type=ProcessingPolicyType.N_RECORDS
+    )
+
+    assert get_datasource_cache_ttl(aggregation, None) == 60
+    assert get_datasource_cache_ttl(n_records, None) == 5
+    assert get_datasource_cache_ttl(n_records, 30_000) == 30
+    assert get_datasource_cache_ttl(n_records, 10**9) == 300
+
+
+def test_align_datetime():
+    value = datetime(2024, 1, 1, 10, 0, 7, tzinfo=UTC)
+
+    assert align_datetime(value, 5) == datetime(
+        2024, 1, 1, 10, 0, 5, tzinfo=UTC
+    )
+    assert align_datetime(value, 5, is_ceil=True) == datetime(
+        2024, 1, 1, 10, 0, 10, tzinfo=UTC
+    )
+    assert align_datetime(None, 5) is None
+
+
+def test_identical_misses_share_one_query():
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return [DatasourceTimeSeriesData(time=1, value=1.0)]
+
+    async def run():
+        cache = LocalDatasourceCache(maxsize=10)
+        results = await asyncio.gather(
+            *[cache.get_or_load("key", 60, loader) for _ in range(10)]
+        )
+        assert all(result == results[0] for result in results)
+
+        await cache.get_or_load("key", 60, loader)
+        assert not cache.in_flight
+
+    asyncio.run(run())
+
+    assert len(calls) == 1
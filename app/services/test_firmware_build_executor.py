@@ -0,0 +1,73 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.configs.errors import FirmwareBuildError
+from app.dto.enum import FirmwareArchiveFormat
+from app.repositories.firmware_archive import FirmwareArchive
+from app.services.firmware_build_executor import FirmwareBuildExecutor
+
+
+def test_same_key_shares_one_build(tmp_path):
+    path = tmp_path / "base"
+    path.write_bytes(b"base")
+    release = threading.Event()
+    builds = []
+
+    def build():
+        builds.append(1)
+        release.wait(5)
+        return FirmwareArchive(open(path, "rb"), 4, b"tail")
+
+    async def run():
+        executor = FirmwareBuildExecutor(max_workers=1, max_queue=4)
+        requests = [
+            asyncio.create_task(
+                executor.run("key", FirmwareArchiveFormat.TAR, build)
+            )
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.1)
+        release.set()
+        archives = await asyncio.gather(*requests)
+
+        assert not executor.builds
+        return [b"".join(archive.iter_chunks()) for archive in archives]
+
+    assert asyncio.run(run()) == [b"basetail"] * 3
+    assert len(builds) == 1
+
+
+def test_full_queue_and_timeout_are_rejected():
+    release = threading.Event()
+
+    def build():
+        release.wait(5)
+        return FirmwareArchive(None, 0, b"")
+
+    async def run():
+        executor = FirmwareBuildExecutor(
+            max_workers=1, max_queue=2, queue_timeout=0.1
+        )
+        started = asyncio.create_task(
+            executor.run("a", FirmwareArchiveFormat.TAR, build)
+        )
+        await asyncio.sleep(0)
+
+        queued = asyncio.create_task(
+            executor.run("b", FirmwareArchiveFormat.TAR, build)
+        )
+        await asyncio.sleep(0)
+
+        with pytest.raises(FirmwareBuildError, match="queue is full"):
+            await executor.run("c", FirmwareArchiveFormat.TAR, build)
+
+        # the only worker is busy, b is dropped from the queue
+        with pytest.raises(FirmwareBuildError, match="not started"):
+            await queued
+
+        release.set()
+        await started
+
+    asyncio.run(run())
@@ -0,0 +1,35 @@
+import time
+
+from app.services.firmware_rollout import FirmwareRolloutEngine, RateLimiter
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(50)
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+
+    # first call is immediate, the next five wait 20 ms each
+    assert time.monotonic() - started >= 0.1
+
+
+def test_engine_counts_every_batch(caplog):
+    def process_batch(batch: list[int], limiter: RateLimiter):
+        if 0 in batch:
+            msg = "no session"
+            raise RuntimeError(msg)
+        for _ in batch:
+            limiter.acquire()
+        return len(batch) - 1, 1
+
+    engine = FirmwareRolloutEngine(rate=0, max_workers=2, batch_size=3)
+    results = list(engine.run(list(range(10)), process_batch, "Rollout 1"))
+
+    assert len(results) == 4
+    assert sum(success for success, _ in results) == 4
+    assert sum(error for _, error in results) == 6
+
+    # the failed batch is logged with its units
+    assert "Rollout 1: batch of 3 units failed, units ['0', '1', '2']" in (
+        caplog.text
+    )
@@ -0,0 +1,40 @@
+import threading
+import uuid as uuid_pkg
+
+from app.services.schema_update_notifier import SchemaUpdateNotifier
+
+
+def test_marks_of_one_unit_are_sent_once():
+    sent = []
+    done = threading.Event()
+
+    def send(unit_uuids):
+        sent.extend(unit_uuids)
+        if len(sent) >= 2:
+            done.set()
+        return len(unit_uuids)
+
+    notifier = SchemaUpdateNotifier(send, delay=0.1, max_delay=1)
+    first, second = sorted([uuid_pkg.uuid4(), uuid_pkg.uuid4()])
+    for _ in range(50):
+        notifier.mark(first)
+    notifier.mark(second)
+
+    assert done.wait(2)
+    assert sorted(sent) == [first, second]
+    assert not notifier.pending
+
+
+def test_flush_sends_pending_units():
+    sent = []
+    notifier = SchemaUpdateNotifier(
+        lambda unit_uuids: sent.extend(unit_uuids) or len(unit_uuids),
+        delay=60,
+        max_delay=60,
+    )
+    unit_uuid = uuid_pkg.uuid4()
+    notifier.mark(unit_uuid)
+    notifier.flush()
+
+    assert sent == [unit_uuid]
+    assert not notifier.pending
@@ -0,0 +1,46 @@
+import asyncio
+import json
+import uuid as uuid_pkg
+
+from app.services.unit_log_stream import UnitLogSubscriber, UnitLogTopic
+
+
+def make_items(*uuids: str) -> list[tuple[str, str]]:
+    return [(uuid, json.dumps({"uuid": uuid})) for uuid in uuids]
+
+
+def read_event(event: str) -> list[str]:
+    data = event.split("data: ", 1)[1].strip()
+    return [item["uuid"] for item in json.loads(data)]
+
+
+def test_backfill_merges_live_messages_without_duplicates():
+    async def run():
+        topic = UnitLogTopic(uuid_pkg.uuid4(), backfill_size=3)
+        topic.publish(make_items("b", "c"))
+        topic.set_backfill(make_items("a", "b"))
+
+        assert topic.ready.is_set()
+        assert read_event(topic.get_backfill_event()) == ["a", "b", "c"]
+
+        topic.publish(make_items("d"))
+        assert read_event(topic.get_backfill_event()) == ["b", "c", "d"]
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_drops_oldest_events():
+    async def run():
+        topic = UnitLogTopic(uuid_pkg.uuid4(), backfill_size=10)
+        topic.set_backfill([])
+        subscriber = UnitLogSubscriber(queue_size=2)
+        topic.subscribers.add(subscriber)
+
+        for uuid in ("a", "b", "c"):
+            topic.publish(make_items(uuid))
+
+        assert subscriber.dropped == 1
+        assert read_event(subscriber.queue.get_nowait()) == ["b"]
+        assert read_event(subscriber.queue.get_nowait()) == ["c"]
+
+    asyncio.run(run())
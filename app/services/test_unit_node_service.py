@@ -0,0 +1,24 @@
+from app import settings
+from app.dto.enum import UnitNodeTypeEnum
+from app.services.unit_node_service import UnitNodeService
+
+
+def test_schema_nodes_of_input_and_output_topics():
+    schema_nodes = UnitNodeService.get_schema_nodes(
+        {
+            "input_base_topic": ["update/pepeunit"],
+            "input_topic": ["light/pepeunit", "mode"],
+            "output_topic": ["temperature"],
+        }
+    )
+
+    assert [(node["type"], node["topic_name"]) for node in schema_nodes] == [
+        (UnitNodeTypeEnum.INPUT, "light/pepeunit"),
+        (UnitNodeTypeEnum.INPUT, "mode"),
+        (UnitNodeTypeEnum.OUTPUT, "temperature"),
+    ]
+    assert [node["is_data_pipe_active"] for node in schema_nodes] == [
+        settings.pu_ff_datapipe_default_last_value_enable,
+        False,
+        False,
+    ]
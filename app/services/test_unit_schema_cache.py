@@ -0,0 +1,34 @@
+import uuid as uuid_pkg
+
+from app.services.unit_schema_cache import UnitSchemaCache
+
+
+def test_local_copies_by_key():
+    cache = UnitSchemaCache(maxsize=2)
+    schema_dict = {"input_topic": {"light": ["a/light"]}}
+
+    cache.set("key", schema_dict)
+    schema_dict["input_topic"]["light"].append("b/light")
+
+    # callers own what they get, the cached schema stays as it was set
+    cached = cache.get("key")
+    assert cached == {"input_topic": {"light": ["a/light"]}}
+    cached["input_topic"].clear()
+    assert cache.get("key") == {"input_topic": {"light": ["a/light"]}}
+    assert cache.get("other") is None
+
+
+def test_invalidate_drops_local_copies_of_units():
+    cache = UnitSchemaCache()
+    first, second = uuid_pkg.uuid4(), uuid_pkg.uuid4()
+    keys = {
+        unit_uuid: f"unit_schema_cache:{unit_uuid}:commit:0"
+        for unit_uuid in (first, second)
+    }
+    for key in keys.values():
+        cache.set(key, {})
+
+    cache.invalidate([first])
+
+    assert cache.get(keys[first]) is None
+    assert cache.get(keys[second]) == {}
@@ -1,8 +1,14 @@
 import logging
+import uuid as uuid_pkg
 
 from app.configs.clickhouse import get_hand_clickhouse_client
 from app.configs.db import get_hand_session
+from app.domain.firmware_rollout_model import FirmwareRollout
+from app.domain.repo_model import Repo
+from app.domain.repository_registry_model import RepositoryRegistry
+from app.dto.enum import BackendTopicCommand, RepositoryRegistryStatus
 from app.schemas.pydantic.repo import RepoFilter
+from app.services.firmware_rollout import RateLimiter
 
 
 def _process_bulk_update_units_firmware():
@@ -16,13 +22,114 @@ def _process_bulk_update_units_firmware():
         )
         logging.info(f"{len(auto_update_repositories)} repos update launched")
 
+        # repos one by one, units of a repo are updated in parallel
         for repo in auto_update_repositories:
             logging.info(f"run update repo {repo.uuid}")
             try:
-                repo_service.update_units_firmware(
-                    repo.uuid, is_auto_update=True
+                repo_service.run_firmware_rollout(
+                    repo_service.create_firmware_rollout(
+                        repo.uuid, is_auto_update=True
+                    )
                 )
             except Exception as e:
                 logging.error(f"failed to update repo {repo.uuid}: {e}")
 
         logging.info("task auto update repo successfully completed")
+
+
+def _process_firmware_rollout(uuid: uuid_pkg.UUID) -> None:
+    from app.configs.rest import get_repo_service
+
+    with get_hand_session() as db, get_hand_clickhouse_client() as cc:
+        repo_service = get_repo_service(db, cc, None)
+
+        firmware_rollout = repo_service.firmware_rollout_repository.get(
+            FirmwareRollout(uuid=uuid)
+        )
+        repo_service.run_firmware_rollout(firmware_rollout)
+
+
+def _process_firmware_rollout_batch(
+    uuid: uuid_pkg.UUID,
+    unit_uuids: list[uuid_pkg.UUID],
+    schema_dict: dict,
+    limiter: RateLimiter,
+) -> tuple[int, int]:
+    from app.configs.rest import get_repo_service
+
+    # each batch works in its own session
+    with get_hand_session() as db, get_hand_clickhouse_client() as cc:
+        repo_service = get_repo_service(db, cc, None)
+
+        firmware_rollout = repo_service.firmware_rollout_repository.get(
+            FirmwareRollout(uuid=uuid)
+        )
+        repo = repo_service.repo_repository.get(
+            Repo(uuid=firmware_rollout.repo_uuid)
+        )
+        repository_registry = repo_service.repository_registry_service.repository_registry_repository.get(
+            RepositoryRegistry(uuid=repo.repository_registry_uuid)
+        )
+
+        # units deleted while in queue are counted as errors
+        units = repo_service.unit_repository.get_by_uuids(unit_uuids)
+        count_success_update, count_error_update = (
+            repo_service.update_units_firmware_batch(
+                repo,
+                repository_registry,
+                units,
+                firmware_rollout,
+                schema_dict,
+                limiter,
+            )
+        )
+
+    return (
+        count_success_update,
+        count_error_update + len(unit_uuids) - len(units),
+    )
+
+
+def _process_schema_update(unit_uuids: list[uuid_pkg.UUID]) -> int:
+    from app.configs.rest import get_unit_node_service
+
+    count_sent = 0
+    with get_hand_session() as db, get_hand_clickhouse_client() as cc:
+        unit_node_service = get_unit_node_service(db, cc, None)
+
+        for uuid in unit_uuids:
+            try:
+                unit_node_service.command_to_input_base_topic(
+                    uuid=uuid,
+                    command=BackendTopicCommand.SCHEMA_UPDATE,
+                    is_auto_update=True,
+                )
+                count_sent += 1
+            except Exception as e:
+                db.rollback()
+                logging.warning(f"Failed schema update unit {uuid} {e}")
+
+    return count_sent
+
+
+def _process_sync_repository_registry(
+    uuid: uuid_pkg.UUID,
+) -> RepositoryRegistryStatus | None:
+    from app.configs.rest import get_repository_registry_service
+
+    # each sync thread works in its own session
+    with get_hand_session() as db:
+        repository_registry_service = get_repository_registry_service(db, None)
+
+        repository_registry = (
+            repository_registry_service.repository_registry_repository.get(
+                RepositoryRegistry(uuid=uuid)
+            )
+        )
+        if repository_registry is None:
+            # deleted while in queue
+            return None
+
+        return repository_registry_service.sync_external_repository(
+            repository_registry, is_queued=True
+        ).sync_status
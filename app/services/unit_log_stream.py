@@ -0,0 +1,219 @@
+import asyncio
+import contextlib
+import json
+import logging
+import uuid as uuid_pkg
+from collections import deque
+from collections.abc import AsyncIterator
+
+from app import settings
+from app.configs.clickhouse import get_hand_clickhouse_client
+from app.configs.redis import get_redis_client
+from app.dto.clickhouse.log import UnitLog
+from app.dto.enum import OrderByDate
+from app.repositories.unit_log_repository import UnitLogRepository
+from app.schemas.pydantic.unit import UnitLogFilter
+from app.utils.utils import obj_serializer
+
+UNIT_LOG_CHANNEL = "unit_logs:{}"
+
+
+async def publish_unit_logs(
+    unit_uuid: uuid_pkg.UUID, unit_logs: list[UnitLog]
+) -> None:
+    await get_redis_client().publish(
+        UNIT_LOG_CHANNEL.format(unit_uuid),
+        json.dumps(
+            [unit_log.dict() for unit_log in unit_logs],
+            default=obj_serializer,
+        ),
+    )
+
+
+def format_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+class UnitLogSubscriber:
+    def __init__(self, queue_size: int) -> None:
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def push(self, event: str) -> None:
+        # slow reader loses the oldest events instead of stalling the others
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class UnitLogTopic:
+    """
+    Live logs of one unit shared by all viewers in this worker
+    """
+
+    def __init__(self, unit_uuid: uuid_pkg.UUID, backfill_size: int) -> None:
+        self.unit_uuid = unit_uuid
+        self.tail: deque[tuple[str, str]] = deque(maxlen=backfill_size)
+        self.subscribers: set[UnitLogSubscriber] = set()
+        self.ready = asyncio.Event()
+        self.backfill_task: asyncio.Task | None = None
+        self._pending: list[tuple[str, str]] = []
+
+    def publish(self, items: list[tuple[str, str]]) -> None:
+        if not self.ready.is_set():
+            self._pending.extend(items)
+            return
+
+        self.tail.extend(items)
+        event = format_event(
+            "logs", f"[{','.join(item for _, item in items)}]"
+        )
+        for subscriber in self.subscribers:
+            subscriber.push(event)
+
+    def set_backfill(self, items: list[tuple[str, str]]) -> None:
+        # messages received while ClickHouse was read can be in both sources
+        known = {uuid for uuid, _ in items}
+        self.tail.extend(items)
+        self.tail.extend(
+            item for item in self._pending if item[0] not in known
+        )
+        self._pending = []
+        self.ready.set()
+
+    def get_backfill_event(self) -> str:
+        return format_event(
+            "logs", f"[{','.join(item for _, item in self.tail)}]"
+        )
+
+
+class UnitLogBroadcaster:
+    """
+    One Redis subscription per worker and one ClickHouse backfill per unit,
+    whatever the number of viewers
+    """
+
+    def __init__(
+        self,
+        backfill_size: int = settings.pu_unit_log_stream_backfill_size,
+        queue_size: int = settings.pu_unit_log_stream_queue_size,
+        heartbeat: int = settings.pu_unit_log_stream_heartbeat,
+    ) -> None:
+        self.backfill_size = backfill_size
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.topics: dict[str, UnitLogTopic] = {}
+        self._pubsub = None
+        self._reader: asyncio.Task | None = None
+
+    async def stream(self, unit_uuid: uuid_pkg.UUID) -> AsyncIterator[str]:
+        channel = UNIT_LOG_CHANNEL.format(unit_uuid)
+        subscriber = UnitLogSubscriber(self.queue_size)
+
+        topic = self.topics.get(channel)
+        if topic is None:
+            topic = UnitLogTopic(unit_uuid, self.backfill_size)
+            self.topics[channel] = topic
+            await self._subscribe(channel)
+            topic.backfill_task = asyncio.create_task(self._backfill(topic))
+
+        topic.subscribers.add(subscriber)
+        try:
+            await topic.ready.wait()
+            yield topic.get_backfill_event()
+
+            dropped = 0
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscriber.queue.get(), self.heartbeat
+                    )
+                except TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+
+                if subscriber.dropped != dropped:
+                    yield format_event(
+                        "dropped", str(subscriber.dropped - dropped)
+                    )
+                    dropped = subscriber.dropped
+
+                yield event
+        finally:
+            topic.subscribers.discard(subscriber)
+            if not topic.subscribers and self.topics.get(channel) is topic:
+                del self.topics[channel]
+                await self._unsubscribe(channel)
+
+    async def _backfill(self, topic: UnitLogTopic) -> None:
+        try:
+            unit_logs = await asyncio.to_thread(
+                self._read_tail, topic.unit_uuid
+            )
+        except Exception as e:
+            logging.warning(f"Unit log backfill failed: {e}")
+            unit_logs = []
+
+        topic.set_backfill(
+            [
+                (
+                    str(unit_log.uuid),
+                    json.dumps(unit_log.dict(), default=obj_serializer),
+                )
+                for unit_log in reversed(unit_logs)
+            ]
+        )
+
+    def _read_tail(self, unit_uuid: uuid_pkg.UUID) -> list[UnitLog]:
+        with get_hand_clickhouse_client() as cc:
+            _, unit_logs = UnitLogRepository(cc).list(
+                UnitLogFilter(
+                    uuid=unit_uuid,
+                    limit=self.backfill_size,
+                    offset=0,
+                    order_by_create_date=OrderByDate.desc,
+                )
+            )
+        return unit_logs
+
+    async def _subscribe(self, channel: str) -> None:
+        if self._pubsub is None:
+            self._pubsub = get_redis_client().pubsub()
+
+        await self._pubsub.subscribe(channel)
+
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read())
+
+    async def _unsubscribe(self, channel: str) -> None:
+        with contextlib.suppress(Exception):
+            await self._pubsub.unsubscribe(channel)
+
+    async def _read(self) -> None:
+        while self.topics:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except Exception as e:
+                logging.warning(f"Unit log stream reader failed: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            if message is None or message["type"] != "message":
+                continue
+
+            topic = self.topics.get(message["channel"])
+            if topic is None:
+                continue
+
+            topic.publish(
+                [
+                    (item["uuid"], json.dumps(item))
+                    for item in json.loads(message["data"])
+                ]
+            )
+
+
+unit_log_broadcaster = UnitLogBroadcaster()
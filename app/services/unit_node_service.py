@@ -43,6 +43,7 @@ from app.dto.enum import (
 )
 from app.repositories.data_pipe_repository import DataPipeRepository
 from app.repositories.git_repo_repository import GitRepoRepository
+from app.repositories.release_asset_cache import release_asset_cache
 from app.repositories.repo_repository import RepoRepository
 from app.repositories.repository_registry_repository import (
     RepositoryRegistryRepository,
@@ -68,7 +69,10 @@ from app.schemas.pydantic.unit_node import (
     UnitNodeUpdate,
 )
 from app.services.access_service import AccessService
+from app.services.datasource_cache import datasource_cache
 from app.services.permission_service import PermissionService
+from app.services.schema_update_notifier import schema_update_notifier
+from app.services.unit_schema_cache import unit_schema_cache
 from app.services.utils import (
     dict_to_yml_file,
     get_topic_name,
@@ -83,9 +87,9 @@ from app.services.validators import (
     is_valid_uuid,
     is_valid_visibility_level,
 )
-from app.utils.utils import async_chunked, obj_serializer, remove_dict_none
+from app.utils.utils import obj_serializer, remove_dict_none
 from app.validators.data_pipe import is_valid_data_pipe_config
-from app.validators.data_pipe_user_csv import StreamingCSVValidator
+from app.validators.data_pipe_user_csv_batch import BatchCSVValidator
 
 
 class UnitNodeService:
@@ -122,46 +126,23 @@ class UnitNodeService:
         is_valid_object(unit_node)
         return unit_node
 
-    def bulk_create(
-        self,
-        schema_dict: dict,
-        unit: Unit,
-        is_update: bool = False,
-        input_node: dict = None,
-        output_node: dict = None,
-    ) -> None:
-        unit_nodes_list = []
-        agents_default_permission_list = []
-        for assignment, topic_list in schema_dict.items():
-            for topic in topic_list:
-                if is_update:
-                    if (
-                        assignment == DestinationTopicType.INPUT_TOPIC
-                        and topic not in input_node
-                    ) or (
-                        assignment == DestinationTopicType.OUTPUT_TOPIC
-                        and topic not in output_node
-                    ):
-                        pass
-                    else:
-                        continue
-                elif assignment not in [
-                    DestinationTopicType.INPUT_TOPIC,
-                    DestinationTopicType.OUTPUT_TOPIC,
-                ]:
-                    continue
-
-                unit_node = UnitNode(
-                    type=(
-                        UnitNodeTypeEnum.INPUT
-                        if assignment == DestinationTopicType.INPUT_TOPIC
-                        else UnitNodeTypeEnum.OUTPUT
-                    ),
-                    visibility_level=unit.visibility_level,
-                    topic_name=topic,
-                    creator_uuid=unit.creator_uuid,
-                    unit_uuid=unit.uuid,
-                )
+    @staticmethod
+    def get_schema_nodes(schema_dict: dict) -> list[dict]:
+        """
+        Fields of the UnitNodes the schema declares, without the Unit ones
+        """
+        schema_nodes = []
+        for assignment, node_type in (
+            (DestinationTopicType.INPUT_TOPIC, UnitNodeTypeEnum.INPUT),
+            (DestinationTopicType.OUTPUT_TOPIC, UnitNodeTypeEnum.OUTPUT),
+        ):
+            for topic in schema_dict.get(assignment, []):
+                schema_node = {
+                    "type": node_type,
+                    "topic_name": topic,
+                    "is_data_pipe_active": False,
+                    "data_pipe_yml": None,
+                }
 
                 if (
                     settings.pu_ff_datapipe_default_last_value_enable
@@ -169,8 +150,8 @@ class UnitNodeService:
                         GlobalPrefixTopic.BACKEND_SUB_PREFIX.value
                     )
                 ):
-                    unit_node.is_data_pipe_active = True
-                    unit_node.data_pipe_yml = json.dumps(
+                    schema_node["is_data_pipe_active"] = True
+                    schema_node["data_pipe_yml"] = json.dumps(
                         {
                             "active_period": {
                                 "type": "Permanent",
@@ -198,57 +179,56 @@ class UnitNodeService:
                         }
                     )
 
-                unit_node.create_datetime = datetime.datetime.now(datetime.UTC)
-                unit_node.last_update_datetime = unit_node.create_datetime
-                unit_nodes_list.append(unit_node)
-
-                agents_default_permission_list.extend(
-                    [
-                        PermissionBaseType(
-                            agent_uuid=agent.uuid,
-                            agent_type=agent.__class__.__name__,
-                            resource_uuid=unit_node.uuid,
-                            resource_type=unit_node.__class__.__name__,
-                        )
-                        for agent in [
-                            unit,
-                            User(uuid=self.access_service.current_agent.uuid),
-                        ]
+                schema_nodes.append(schema_node)
+
+        return schema_nodes
+
+    def bulk_create(self, schema_dict: dict, unit: Unit) -> None:
+        unit_nodes_list = []
+        agents_default_permission_list = []
+        for schema_node in self.get_schema_nodes(schema_dict):
+            unit_node = UnitNode(
+                visibility_level=unit.visibility_level,
+                creator_uuid=unit.creator_uuid,
+                unit_uuid=unit.uuid,
+                **schema_node,
+            )
+
+            unit_node.create_datetime = datetime.datetime.now(datetime.UTC)
+            unit_node.last_update_datetime = unit_node.create_datetime
+            unit_nodes_list.append(unit_node)
+
+            agents_default_permission_list.extend(
+                [
+                    PermissionBaseType(
+                        agent_uuid=agent.uuid,
+                        agent_type=agent.__class__.__name__,
+                        resource_uuid=unit_node.uuid,
+                        resource_type=unit_node.__class__.__name__,
+                    )
+                    for agent in [
+                        unit,
+                        User(uuid=self.access_service.current_agent.uuid),
                     ]
-                )
+                ]
+            )
 
         self.unit_node_repository.bulk_save(unit_nodes_list)
         self.access_service.permission_repository.bulk_save(
             agents_default_permission_list
         )
 
-    def bulk_update(
-        self,
-        schema_dict: dict,
-        unit: Unit,
-        input_node: dict,
-        output_node: dict,
-    ) -> None:
-        self.bulk_create(schema_dict, unit, True, input_node, output_node)
-
-        unit_node_uuid_delete = []
-        for assignment, topic_list in schema_dict.items():
-            if assignment == DestinationTopicType.INPUT_TOPIC:
-                unit_node_uuid_delete.extend(
-                    [
-                        input_node[topic]
-                        for topic in input_node.keys() - set(topic_list)
-                    ]
-                )
-            elif assignment == DestinationTopicType.OUTPUT_TOPIC:
-                unit_node_uuid_delete.extend(
-                    [
-                        output_node[topic]
-                        for topic in output_node.keys() - set(topic_list)
-                    ]
-                )
-
-        self.unit_node_repository.delete(unit_node_uuid_delete)
+    def bulk_reconcile(self, schema_dict: dict, units: list[Unit]) -> None:
+        """
+        UnitNodes of all Units follow one schema, set based whatever the
+        number of Units
+        """
+        linked_unit_uuids = self.unit_node_repository.reconcile(
+            units, self.get_schema_nodes(schema_dict)
+        )
+        unit_schema_cache.invalidate(
+            [unit.uuid for unit in units] + linked_unit_uuids
+        )
 
     def bulk_set_visibility_level(self, unit: Unit):
         count, unit_nodes = self.unit_node_repository.list(
@@ -395,6 +375,30 @@ class UnitNodeService:
             repository_registry, target_version
         )
 
+        self.publish_command(
+            command,
+            repo,
+            repository_registry,
+            unit,
+            target_version,
+            target_tag,
+            schema_dict,
+        )
+
+    def publish_command(
+        self,
+        command: BackendTopicCommand,
+        repo: Repo,
+        repository_registry: RepositoryRegistry,
+        unit: Unit,
+        target_version: str,
+        target_tag: str | None,
+        schema_dict: dict,
+    ) -> None:
+        """
+        Command for a Unit with the version already resolved, a rollout
+        resolves it once for all Units of the Repo
+        """
         command_to_topic_dict = {
             BackendTopicCommand.UPDATE: ReservedInputBaseTopic.UPDATE.value,
             BackendTopicCommand.ENV_UPDATE: ReservedInputBaseTopic.ENV_UPDATE.value,
@@ -459,14 +463,25 @@ class UnitNodeService:
             message_dict[ReservedEnvVariableName.PU_COMMIT_VERSION.value] = (
                 target_version
             )
+            if (
+                not repo.is_compilable_repo
+                and unit.current_commit_version
+                and unit.current_commit_version != target_version
+            ):
+                # devices able to apply a delta skip the unchanged files
+                message_dict["DELTA_FIRMWARE_LINK"] = (
+                    f"{settings.pu_link_prefix_and_v1}/units/firmware/delta/{unit.uuid}"
+                    f"?from_commit={unit.current_commit_version}&to_commit={target_version}"
+                )
             if repo.is_compilable_repo:
-                links = is_valid_json(
-                    repository_registry.releases_data,
-                    "Releases for compile repo",
+                links = self.git_repo_repository.get_releases(
+                    repository_registry
                 )[target_tag]
                 _, link = self.git_repo_repository.find_by_platform(
                     links, unit.target_firmware_platform
                 )
+                if settings.pu_ff_release_asset_mirror_enable:
+                    link = release_asset_cache.get_link(link)
                 message_dict["COMPILED_FIRMWARE_LINK"] = link
 
         elif command == BackendTopicCommand.LOG_SYNC:
@@ -538,13 +553,9 @@ class UnitNodeService:
             )
 
         unit_node_edge = self.unit_node_edge_repository.create(new_edge)
-
-        with contextlib.suppress(MqttError):
-            self.command_to_input_base_topic(
-                uuid=input_node.unit_uuid,
-                command=BackendTopicCommand.SCHEMA_UPDATE,
-                is_auto_update=True,
-            )
+        unit_schema_cache.invalidate([input_node.unit_uuid])
+        # edges wired one by one end in one notification
+        schema_update_notifier.mark(input_node.unit_uuid)
 
         return unit_node_edge
 
@@ -638,7 +649,7 @@ class UnitNodeService:
             )
         )
 
-    def delete_data_pipe_data(self, uuid: uuid_pkg.UUID) -> None:
+    async def delete_data_pipe_data(self, uuid: uuid_pkg.UUID) -> None:
         if not settings.pu_ff_datapipe_enable:
             raise FeatureFlagError()
 
@@ -652,6 +663,7 @@ class UnitNodeService:
         )
 
         self.data_pipe_repository.bulk_delete([unit_node.uuid])
+        await datasource_cache.invalidate(unit_node.uuid)
 
     def get_data_pipe_data(
         self, filters: DataPipeFilter | DataPipeFilterInput
@@ -730,16 +742,16 @@ class UnitNodeService:
 
         self.data_pipe_repository.bulk_delete([unit_node.uuid])
 
-        async for batch in async_chunked(
-            StreamingCSVValidator(data_pipe_entity).iter_validated_streaming(
-                unit_node.uuid, data_csv
-            ),
-            5000,
+        validator = BatchCSVValidator(data_pipe_entity, batch_size=5000)
+        async for columns in validator.iter_validated_columns(
+            unit_node.uuid, data_csv
         ):
-            self.data_pipe_repository.bulk_create(
-                data_pipe_entity.processing_policy.policy_type, batch
+            self.data_pipe_repository.bulk_create_columnar(
+                data_pipe_entity.processing_policy.policy_type, columns
             )
 
+        await datasource_cache.invalidate(unit_node.uuid)
+
     def delete_node_edge(
         self, input_uuid: uuid_pkg.UUID, output_uuid: uuid_pkg.UUID
     ) -> None:
@@ -782,13 +794,9 @@ class UnitNodeService:
             # so there should be immunity to this error.
 
         self.unit_node_edge_repository.delete(unit_node_edge)
-
-        with contextlib.suppress(MqttError):
-            self.command_to_input_base_topic(
-                uuid=input_node.unit_uuid,
-                command=BackendTopicCommand.SCHEMA_UPDATE,
-                is_auto_update=True,
-            )
+        unit_schema_cache.invalidate([input_node.unit_uuid])
+        # edges wired one by one end in one notification
+        schema_update_notifier.mark(input_node.unit_uuid)
 
     def list(
         self, filters: UnitNodeFilter | UnitNodeFilterInput
@@ -0,0 +1,84 @@
+import copy
+import logging
+import threading
+import time
+import uuid as uuid_pkg
+from collections.abc import Iterable
+
+from cachetools import LRUCache
+from redis.exceptions import RedisError
+
+from app import settings
+from app.configs.redis import get_sync_redis_client
+
+CACHE_PREFIX = "unit_schema_cache"
+
+
+class UnitSchemaCache:
+    """
+    Current schemas of Units in process, keyed by the target commit and the
+    generation of the Unit in Redis, bumped on its edge and node changes
+    """
+
+    def __init__(
+        self, maxsize: int = settings.pu_unit_schema_cache_size
+    ) -> None:
+        self.local: LRUCache[str, dict] = LRUCache(maxsize)
+        self.lock = threading.Lock()
+
+    def get_keys(
+        self, unit_uuids: list[uuid_pkg.UUID], target_version: str
+    ) -> dict[uuid_pkg.UUID, str]:
+        """
+        Generations of all Units in one round trip
+        """
+        try:
+            generations = get_sync_redis_client().mget(
+                [
+                    f"{CACHE_PREFIX}:generation:{unit_uuid}"
+                    for unit_uuid in unit_uuids
+                ]
+            )
+        except RedisError:
+            # keys that never match, the cache is bypassed until Redis is back
+            generations = [f"offline-{time.monotonic_ns()}"] * len(unit_uuids)
+
+        return {
+            unit_uuid: f"{CACHE_PREFIX}:{unit_uuid}:{target_version}:{generation or '0'}"
+            for unit_uuid, generation in zip(
+                unit_uuids, generations, strict=True
+            )
+        }
+
+    def get(self, key: str) -> dict | None:
+        with self.lock:
+            schema_dict = self.local.get(key)
+        return copy.deepcopy(schema_dict)
+
+    def set(self, key: str, schema_dict: dict) -> None:
+        with self.lock:
+            self.local[key] = copy.deepcopy(schema_dict)
+
+    def invalidate(self, unit_uuids: Iterable[uuid_pkg.UUID]) -> None:
+        unit_uuids = set(unit_uuids)
+        if not unit_uuids:
+            return
+
+        prefixes = tuple(
+            f"{CACHE_PREFIX}:{unit_uuid}:" for unit_uuid in unit_uuids
+        )
+        with self.lock:
+            for key in [key for key in self.local if key.startswith(prefixes)]:
+                self.local.pop(key, None)
+
+        try:
+            # other workers see the new generation and miss their local copies
+            pipeline = get_sync_redis_client().pipeline(transaction=False)
+            for unit_uuid in unit_uuids:
+                pipeline.incr(f"{CACHE_PREFIX}:generation:{unit_uuid}")
+            pipeline.execute()
+        except RedisError as e:
+            logging.warning(f"Unit schema cache invalidation failed: {e}")
+
+
+unit_schema_cache = UnitSchemaCache()
@@ -6,14 +6,20 @@ import datetime
 import itertools
 import json
 import os
-import shutil
+import re
 import uuid as uuid_pkg
-import zlib
+from collections.abc import AsyncIterator, Callable
 
 from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
 
 from app import settings
-from app.configs.errors import MqttError, NoAccessError, UnitError
+from app.configs.errors import (
+    CustomException,
+    MqttError,
+    NoAccessError,
+    UnitError,
+)
 from app.domain.repo_model import Repo
 from app.domain.repository_registry_model import RepositoryRegistry
 from app.domain.unit_model import Unit
@@ -25,6 +31,7 @@ from app.dto.enum import (
     AgentType,
     BackendTopicCommand,
     DestinationTopicType,
+    FirmwareArchiveFormat,
     LogLevel,
     OwnershipType,
     PermissionEntities,
@@ -32,6 +39,10 @@ from app.dto.enum import (
     StaticRepoFileName,
     UnitNodeTypeEnum,
 )
+from app.repositories.firmware_archive import (
+    FirmwareArchive,
+    firmware_archive_cache,
+)
 from app.repositories.git_repo_repository import GitRepoRepository
 from app.repositories.repo_repository import RepoRepository
 from app.repositories.repository_registry_repository import (
@@ -60,8 +71,11 @@ from app.schemas.pydantic.unit import (
 )
 from app.schemas.pydantic.unit_node import UnitNodeFilter
 from app.services.access_service import AccessService
+from app.services.firmware_build_executor import firmware_build_executor
 from app.services.permission_service import PermissionService
+from app.services.unit_log_stream import unit_log_broadcaster
 from app.services.unit_node_service import UnitNodeService
+from app.services.unit_schema_cache import unit_schema_cache
 from app.services.utils import (
     get_topic_name,
     merge_two_dict_first_priority,
@@ -76,6 +90,8 @@ from app.services.validators import (
 )
 from app.utils.utils import aes_gcm_decode, aes_gcm_encode
 
+COMMIT_PATTERN = re.compile(r"[0-9a-f]{40}")
+
 
 class UnitService:
     def __init__(
@@ -160,7 +176,7 @@ class UnitService:
         )
         self.permission_service.create_by_domains(unit, unit)
 
-        self.unit_node_service.bulk_create(schema_dict, unit, False)
+        self.unit_node_service.bulk_create(schema_dict, unit)
 
         return unit_deepcopy
 
@@ -224,17 +240,20 @@ class UnitService:
         return result_unit
 
     def sync_state_unit_nodes_for_version(
-        self, repo: Repo, unit: Unit, repository_registry: RepositoryRegistry
+        self,
+        repo: Repo,
+        unit: Unit,
+        repository_registry: RepositoryRegistry,
+        target_version: str | None = None,
     ) -> Unit:
         self.git_repo_repository.is_valid_firmware_platform(
             repo, repository_registry, unit, unit.target_firmware_platform
         )
 
-        target_version, target_tag = (
-            self.git_repo_repository.get_target_unit_version(
+        if target_version is None:
+            target_version = self.git_repo_repository.get_target_unit_version(
                 repo, repository_registry, unit
-            )
-        )
+            )[0]
 
         if target_version == unit.current_commit_version:
             return self.unit_repository.update(unit.uuid, unit)
@@ -242,51 +261,81 @@ class UnitService:
         self.git_repo_repository.is_valid_schema_file(
             repository_registry, target_version
         )
+        self.sync_unit_env_for_version(
+            unit, repository_registry, target_version
+        )
 
-        if unit.cipher_env_dict:
-            new_env_dict = self.generate_unified_env(
-                unit=unit,
-                repository_registry=repository_registry,
-                target_version=target_version,
-                user_env_dict=None,
-                include_commit_version=True,
-                filter_by_allowed_keys=True,
-            )
+        schema_dict = self.git_repo_repository.get_schema_dict(
+            repository_registry, target_version
+        )
+        self.unit_node_service.bulk_reconcile(schema_dict, [unit])
 
-            self.git_repo_repository.is_valid_env_file(
-                repository_registry, target_version, new_env_dict
-            )
+        unit.last_update_datetime = datetime.datetime.now(datetime.UTC)
+        return self.unit_repository.update(unit.uuid, unit)
 
-            unit.cipher_env_dict = aes_gcm_encode(json.dumps(new_env_dict))
+    def bulk_sync_state_unit_nodes_for_version(
+        self,
+        repo: Repo,
+        repository_registry: RepositoryRegistry,
+        units: list[Unit],
+        target_version: str,
+        schema_dict: dict,
+    ) -> dict[uuid_pkg.UUID, str]:
+        """
+        sync_state_unit_nodes_for_version for Units of the session on one
+        valid target, UnitNodes of all of them are reconciled in one
+        transaction. Returns errors of the skipped Units
+        """
+        errors = {}
+        sync_units = []
+        for unit in units:
+            try:
+                self.git_repo_repository.is_valid_firmware_platform(
+                    repo,
+                    repository_registry,
+                    unit,
+                    unit.target_firmware_platform,
+                )
+                if target_version == unit.current_commit_version:
+                    continue
 
-            unit = self.unit_repository.update(unit.uuid, unit)
+                self.sync_unit_env_for_version(
+                    unit, repository_registry, target_version
+                )
+            except CustomException as e:
+                errors[unit.uuid] = e.message
+                continue
 
-        count, all_exist_unit_nodes = self.unit_node_repository.list(
-            UnitNodeFilter(unit_uuid=unit.uuid)
-        )
+            unit.last_update_datetime = datetime.datetime.now(datetime.UTC)
+            sync_units.append(unit)
 
-        input_node_dict = {
-            unit_node.topic_name: unit_node.uuid
-            for unit_node in all_exist_unit_nodes
-            if unit_node.type == UnitNodeTypeEnum.INPUT
-        }
+        self.unit_node_service.bulk_reconcile(schema_dict, sync_units)
 
-        output_node_dict = {
-            unit_node.topic_name: unit_node.uuid
-            for unit_node in all_exist_unit_nodes
-            if unit_node.type == UnitNodeTypeEnum.OUTPUT
-        }
+        return errors
 
-        schema_dict = self.git_repo_repository.get_schema_dict(
-            repository_registry, target_version
+    def sync_unit_env_for_version(
+        self,
+        unit: Unit,
+        repository_registry: RepositoryRegistry,
+        target_version: str,
+    ) -> None:
+        if not unit.cipher_env_dict:
+            return
+
+        new_env_dict = self.generate_unified_env(
+            unit=unit,
+            repository_registry=repository_registry,
+            target_version=target_version,
+            user_env_dict=None,
+            include_commit_version=True,
+            filter_by_allowed_keys=True,
         )
 
-        self.unit_node_service.bulk_update(
-            schema_dict, unit, input_node_dict, output_node_dict
+        self.git_repo_repository.is_valid_env_file(
+            repository_registry, target_version, new_env_dict
         )
 
-        unit.last_update_datetime = datetime.datetime.now(datetime.UTC)
-        return self.unit_repository.update(unit.uuid, unit)
+        unit.cipher_env_dict = aes_gcm_encode(json.dumps(new_env_dict))
 
     def get_env(self, uuid: uuid_pkg.UUID) -> dict:
         self.access_service.authorization.check_access(
@@ -425,11 +474,21 @@ class UnitService:
             unit, repository_registry, target_version
         )
 
-    def get_unit_firmware(self, uuid: uuid_pkg.UUID) -> str:
+    def get_firmware_source(
+        self,
+        uuid: uuid_pkg.UUID,
+        archive_format: FirmwareArchiveFormat,
+        wbits: int,
+        level: int,
+    ) -> tuple[Unit, Repo, RepositoryRegistry]:
         self.access_service.authorization.check_access(
             [AgentType.USER, AgentType.UNIT]
         )
 
+        if archive_format == FirmwareArchiveFormat.TGZ:
+            self.is_valid_wbits(wbits)
+            self.is_valid_level(level)
+
         unit = self.unit_repository.get(Unit(uuid=uuid))
 
         self.access_service.authorization.check_ownership(
@@ -443,86 +502,222 @@ class UnitService:
         )
         is_valid_object(repository_registry)
 
-        target_version = self.git_repo_repository.get_target_unit_version(
-            repo, repository_registry, unit
-        )[0]
+        return unit, repo, repository_registry
 
+    def get_unit_files(
+        self,
+        unit: Unit,
+        repository_registry: RepositoryRegistry,
+        target_version: str,
+    ) -> dict[str, bytes]:
         env_dict = self.get_env(unit.uuid)
         self.git_repo_repository.is_valid_env_file(
             repository_registry, target_version, env_dict
         )
 
-        gen_uuid = uuid_pkg.uuid4()
-
-        if repo.is_compilable_repo:
-            tmp_git_repo_path = self.git_repo_repository.get_tmp_path(gen_uuid)
-            os.mkdir(tmp_git_repo_path)
-        else:
-            tmp_git_repo_path = self.git_repo_repository.generate_tmp_git_repo(
-                repository_registry, target_version, gen_uuid
-            )
-
         env_dict[ReservedEnvVariableName.PU_COMMIT_VERSION.value] = (
             target_version
         )
 
-        with open(
-            f"{tmp_git_repo_path}/{StaticRepoFileName.ENV.value}", "w"
-        ) as f:
-            f.write(json.dumps(env_dict, indent=4))
-
         new_schema_dict = self.generate_current_schema(
             unit, repository_registry, target_version
         )
 
-        with open(
-            f"{tmp_git_repo_path}/{StaticRepoFileName.SCHEMA.value}", "w"
-        ) as f:
-            f.write(json.dumps(new_schema_dict, indent=4))
+        return {
+            StaticRepoFileName.ENV.value: json.dumps(
+                env_dict, indent=4
+            ).encode(),
+            StaticRepoFileName.SCHEMA.value: json.dumps(
+                new_schema_dict, indent=4
+            ).encode(),
+        }
+
+    def get_firmware_build(
+        self,
+        uuid: uuid_pkg.UUID,
+        archive_format: FirmwareArchiveFormat,
+        wbits: int = 15,
+        level: int = 9,
+    ) -> tuple[str, Callable[[], FirmwareArchive]]:
+        """
+        Checks and database reads of the request, the returned build only
+        reads the physic repository and the archive cache
+        """
+        unit, repo, repository_registry = self.get_firmware_source(
+            uuid, archive_format, wbits, level
+        )
 
-        return tmp_git_repo_path
+        target_version = self.git_repo_repository.get_target_unit_version(
+            repo, repository_registry, unit
+        )[0]
 
-    def get_unit_firmware_zip(self, uuid: uuid_pkg.UUID) -> str:
-        firmware_path = self.get_unit_firmware(uuid)
-        firmware_zip_path = f"tmp/{uuid}"
+        files = self.get_unit_files(unit, repository_registry, target_version)
 
-        shutil.make_archive(firmware_zip_path, "zip", firmware_path)
-        shutil.rmtree(firmware_path, ignore_errors=True)
+        # base archive is shared by all units on the same version
+        if repo.is_compilable_repo:
+            key = firmware_archive_cache.get_key(archive_format, wbits, level)
+            get_entries = list
+        else:
+            key = firmware_archive_cache.get_key(
+                repository_registry.uuid,
+                target_version,
+                self.git_repo_repository.get_pepeignore_hash(
+                    repository_registry, target_version
+                ),
+                archive_format,
+                wbits,
+                level,
+            )
 
-        return f"{firmware_zip_path}.zip"
+            def get_entries():
+                return self.git_repo_repository.get_firmware_entries(
+                    repository_registry, target_version
+                )
 
-    def get_unit_firmware_tar(self, uuid: uuid_pkg.UUID) -> str:
-        firmware_path = self.get_unit_firmware(uuid)
-        firmware_tar_path = f"tmp/{uuid}"
+        def build():
+            return firmware_archive_cache.get_archive(
+                key, archive_format, get_entries, files, wbits, level
+            )
 
-        shutil.make_archive(firmware_tar_path, "tar", firmware_path)
-        shutil.rmtree(firmware_path, ignore_errors=True)
+        return firmware_archive_cache.get_key(key, unit.uuid, files), build
 
-        return f"{firmware_tar_path}.tar"
+    def get_unit_firmware(
+        self,
+        uuid: uuid_pkg.UUID,
+        archive_format: FirmwareArchiveFormat,
+        wbits: int = 15,
+        level: int = 9,
+    ) -> FirmwareArchive:
+        _, build = self.get_firmware_build(uuid, archive_format, wbits, level)
+        return build()
+
+    async def build_unit_firmware(
+        self,
+        uuid: uuid_pkg.UUID,
+        archive_format: FirmwareArchiveFormat,
+        wbits: int = 15,
+        level: int = 9,
+    ) -> FirmwareArchive:
+        key, build = await run_in_threadpool(
+            self.get_firmware_build, uuid, archive_format, wbits, level
+        )
+        return await firmware_build_executor.run(key, archive_format, build)
 
-    def get_unit_firmware_tgz(
-        self, uuid: uuid_pkg.UUID, wbits: int = 15, level: int = 9
-    ) -> str:
-        self.is_valid_wbits(wbits)
-        self.is_valid_level(level)
+    def get_firmware_delta_build(
+        self,
+        uuid: uuid_pkg.UUID,
+        from_commit: str,
+        to_commit: str | None = None,
+        archive_format: FirmwareArchiveFormat = FirmwareArchiveFormat.TGZ,
+        wbits: int = 15,
+        level: int = 9,
+    ) -> tuple[str, Callable[[], FirmwareArchive]]:
+        """
+        Only the files changed between two commits with a manifest of the
+        changed and deleted paths, to_commit is the unit target by default
+        """
+        unit, repo, repository_registry = self.get_firmware_source(
+            uuid, archive_format, wbits, level
+        )
 
-        firmware_path = self.get_unit_firmware(uuid)
-        firmware_tar_path = f"tmp/{uuid}"
+        if repo.is_compilable_repo:
+            msg = "Delta is not available for compilable Repo"
+            raise UnitError(msg)
 
-        shutil.make_archive(firmware_tar_path, "tar", firmware_path)
-        shutil.rmtree(firmware_path, ignore_errors=True)
+        if to_commit is None:
+            to_commit = self.git_repo_repository.get_target_unit_version(
+                repo, repository_registry, unit
+            )[0]
+
+        # refs and short SHAs move, only full SHAs are safe as a cache key
+        branch = (
+            repo.default_branch
+            if unit.is_auto_update_from_repo_unit
+            else unit.repo_branch
+        )
+        for commit in (from_commit, to_commit):
+            if not COMMIT_PATTERN.fullmatch(commit):
+                msg = f"Commit {commit} is not a full 40 character SHA"
+                raise UnitError(msg)
+            self.git_repo_repository.is_valid_commit(
+                repository_registry, branch, commit
+            )
+
+        files = self.get_unit_files(unit, repository_registry, to_commit)
+
+        # one delta for each pair of commits, whatever unit asks for it
+        key = firmware_archive_cache.get_key(
+            "delta",
+            repository_registry.uuid,
+            from_commit,
+            to_commit,
+            self.git_repo_repository.get_pepeignore_hash(
+                repository_registry, to_commit
+            ),
+            archive_format,
+            wbits,
+            level,
+        )
+
+        def get_entries():
+            return self.git_repo_repository.get_firmware_delta_entries(
+                repository_registry, from_commit, to_commit
+            )
+
+        def build():
+            return firmware_archive_cache.get_archive(
+                key, archive_format, get_entries, files, wbits, level
+            )
 
-        with open(firmware_tar_path + ".tar", "rb") as tar_file:
-            producer = zlib.compressobj(wbits=wbits, level=level)
+        return firmware_archive_cache.get_key(key, unit.uuid, files), build
 
-            tar_data = producer.compress(tar_file.read()) + producer.flush()
+    async def build_unit_firmware_delta(
+        self,
+        uuid: uuid_pkg.UUID,
+        from_commit: str,
+        to_commit: str | None = None,
+        archive_format: FirmwareArchiveFormat = FirmwareArchiveFormat.TGZ,
+        wbits: int = 15,
+        level: int = 9,
+    ) -> FirmwareArchive:
+        key, build = await run_in_threadpool(
+            self.get_firmware_delta_build,
+            uuid,
+            from_commit,
+            to_commit,
+            archive_format,
+            wbits,
+            level,
+        )
+        return await firmware_build_executor.run(key, archive_format, build)
+
+    def write_unit_firmware(
+        self,
+        uuid: uuid_pkg.UUID,
+        archive_format: FirmwareArchiveFormat,
+        wbits: int = 15,
+        level: int = 9,
+    ) -> str:
+        firmware_archive = self.get_unit_firmware(
+            uuid, archive_format, wbits, level
+        )
+        firmware_path = f"tmp/{uuid}.{archive_format.value}"
+        firmware_archive.write_to(firmware_path)
 
-            with open(f"{firmware_tar_path}.tgz", "wb") as tgz:
-                tgz.write(tar_data)
+        return firmware_path
 
-        os.remove(firmware_tar_path + ".tar")
+    def get_unit_firmware_zip(self, uuid: uuid_pkg.UUID) -> str:
+        return self.write_unit_firmware(uuid, FirmwareArchiveFormat.ZIP)
 
-        return f"{firmware_tar_path}.tgz"
+    def get_unit_firmware_tar(self, uuid: uuid_pkg.UUID) -> str:
+        return self.write_unit_firmware(uuid, FirmwareArchiveFormat.TAR)
+
+    def get_unit_firmware_tgz(
+        self, uuid: uuid_pkg.UUID, wbits: int = 15, level: int = 9
+    ) -> str:
+        return self.write_unit_firmware(
+            uuid, FirmwareArchiveFormat.TGZ, wbits, level
+        )
 
     async def convert_toml_file_to_md(self, file) -> str:
         self.access_service.authorization.check_access([AgentType.USER])
@@ -638,8 +833,14 @@ class UnitService:
         unit_deep = copy.deepcopy(unit)
         unit_nodes_deep = copy.deepcopy(unit_nodes)
 
+        linked_unit_uuids = self.unit_node_repository.get_linked_unit_uuids(
+            [unit_node.uuid for unit_node in unit_nodes_deep]
+        )
+
         self.unit_repository.delete(unit)
 
+        unit_schema_cache.invalidate(linked_unit_uuids)
+
         # clickhouse data clear
         self.unit_node_service.data_pipe_repository.bulk_delete(
             [unit_node.uuid for unit_node in unit_nodes_deep]
@@ -672,18 +873,28 @@ class UnitService:
     def log_list(
         self, filters: UnitLogFilter | UnitLogFilterInput
     ) -> tuple[int, builtins.list[UnitLog]]:
+        self.check_log_access(filters.uuid)
+
+        return self.unit_log_repository.list(filters)
+
+    def log_stream(self, uuid: uuid_pkg.UUID) -> AsyncIterator[str]:
+        unit = self.check_log_access(uuid)
+
+        return unit_log_broadcaster.stream(unit.uuid)
+
+    def check_log_access(self, uuid: uuid_pkg.UUID) -> Unit:
         self.access_service.authorization.check_access(
             [AgentType.USER, AgentType.UNIT]
         )
 
-        unit = self.unit_repository.get(Unit(uuid=filters.uuid))
+        unit = self.unit_repository.get(Unit(uuid=uuid))
         is_valid_object(unit)
 
         self.access_service.authorization.check_ownership(
             unit, [OwnershipType.CREATOR, OwnershipType.UNIT]
         )
 
-        return self.unit_log_repository.list(filters)
+        return unit
 
     def generate_current_schema(
         self,
@@ -691,10 +902,56 @@ class UnitService:
         repository_registry: RepositoryRegistry,
         target_version: str,
     ) -> dict:
+        return self.generate_current_schemas(
+            [unit], repository_registry, target_version
+        )[unit.uuid]
+
+    def generate_current_schemas(
+        self,
+        units: builtins.list[Unit],
+        repository_registry: RepositoryRegistry,
+        target_version: str,
+    ) -> dict[uuid_pkg.UUID, dict]:
+        """
+        Schemas of Units on one target, the ones missing in the cache are
+        generated from one query
+        """
+        keys = unit_schema_cache.get_keys(
+            [unit.uuid for unit in units], target_version
+        )
+
+        schemas = {}
+        for unit in units:
+            schema = unit_schema_cache.get(keys[unit.uuid])
+            if schema is not None:
+                schemas[unit.uuid] = schema
+
+        missing_uuids = [
+            unit.uuid for unit in units if unit.uuid not in schemas
+        ]
+        if not missing_uuids:
+            return schemas
+
+        schema_dict = self.git_repo_repository.get_schema_dict(
+            repository_registry, target_version
+        )
         nodes_with_edges = self.unit_node_repository.get_nodes_with_edges(
-            unit.uuid
+            missing_uuids
         )
+        for uuid in missing_uuids:
+            schemas[uuid] = self.get_current_schema_dict(
+                uuid, schema_dict, nodes_with_edges[uuid]
+            )
+            unit_schema_cache.set(keys[uuid], schemas[uuid])
+
+        return schemas
 
+    @staticmethod
+    def get_current_schema_dict(
+        uuid: uuid_pkg.UUID,
+        schema_dict: dict,
+        nodes_with_edges: builtins.list[tuple],
+    ) -> dict:
         output_dict = {}
         input_dict = {}
         for node_uuid, topic_name, topic_type, edges in nodes_with_edges:
@@ -712,10 +969,6 @@ class UnitService:
             else:
                 output_dict[topic_name] = topics
 
-        schema_dict = self.git_repo_repository.get_schema_dict(
-            repository_registry, target_version
-        )
-
         new_schema_dict = {}
         for destination, topics in schema_dict.items():
             new_schema_dict[destination] = {}
@@ -726,7 +979,7 @@ class UnitService:
                     DestinationTopicType.OUTPUT_BASE_TOPIC,
                 ]:
                     new_schema_dict[destination][topic] = [
-                        f"{settings.pu_domain}/{destination}/{unit.uuid}/{topic}"
+                        f"{settings.pu_domain}/{destination}/{uuid}/{topic}"
                     ]
                 elif destination == DestinationTopicType.INPUT_TOPIC:
                     new_schema_dict[destination][topic] = input_dict[topic]
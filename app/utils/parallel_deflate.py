@@ -0,0 +1,140 @@
+import struct
+import threading
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app import settings
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_deflate_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.pu_firmware_compress_workers,
+                thread_name_prefix="deflate",
+            )
+    return _executor
+
+
+def get_window_bits(wbits: int) -> int:
+    # raw -15..-9, zlib 9..15 and gzip 25..31 share the window size
+    return abs(wbits) if abs(wbits) <= 15 else wbits - 16
+
+
+def deflate_block(
+    block: bytes, dictionary: bytes, level: int, window: int, mode: int
+) -> bytes:
+    # zlib releases the GIL, blocks are compressed on all cores
+    if dictionary:
+        producer = zlib.compressobj(
+            level=level, wbits=-window, zdict=dictionary
+        )
+    else:
+        producer = zlib.compressobj(level=level, wbits=-window)
+    return producer.compress(block) + producer.flush(mode)
+
+
+class ParallelDeflate:
+    """
+    pigz style compressobj: independent blocks primed with the end of the
+    previous one are deflated in a thread pool and joined into one stream
+    for the requested wbits. Payloads under one block use plain zlib
+    """
+
+    def __init__(
+        self,
+        wbits: int = zlib.MAX_WBITS,
+        level: int = -1,
+        block_size: int = settings.pu_firmware_compress_block_size,
+        executor: ThreadPoolExecutor | None = None,
+    ) -> None:
+        self.wbits = wbits
+        self.level = level
+        self.window = get_window_bits(wbits)
+        self.block_size = block_size
+        self.executor = executor or get_deflate_executor()
+        self.max_pending = settings.pu_firmware_compress_workers * 2
+
+        self.raw_size = 0
+        self.adler32 = zlib.adler32(b"")
+        self.crc32 = zlib.crc32(b"")
+
+        self._buffer = bytearray()
+        self._previous = b""
+        self._pending: deque[Future] = deque()
+        self._is_started = False
+
+    def compress(self, data: bytes) -> bytes:
+        self.raw_size += len(data)
+        self.adler32 = zlib.adler32(data, self.adler32)
+        self.crc32 = zlib.crc32(data, self.crc32)
+
+        self._buffer += data
+        output = []
+        while len(self._buffer) >= self.block_size:
+            block = bytes(self._buffer[: self.block_size])
+            del self._buffer[: self.block_size]
+            output.append(self._submit(block, zlib.Z_SYNC_FLUSH))
+
+            # bounded memory, the stream waits for the oldest block
+            while len(self._pending) > self.max_pending:
+                output.append(self._pending.popleft().result())
+
+        return b"".join(output)
+
+    def flush(self, mode: int = zlib.Z_FINISH) -> bytes:
+        """
+        Z_FINISH ends the stream, Z_FULL_FLUSH leaves it byte aligned and
+        open for another deflate stream
+        """
+        if not self._is_started:
+            producer = zlib.compressobj(level=self.level, wbits=self.wbits)
+            return producer.compress(bytes(self._buffer)) + producer.flush(
+                mode
+            )
+
+        output = [self._submit(bytes(self._buffer), mode)]
+        self._buffer = bytearray()
+        output.extend(future.result() for future in self._pending)
+        self._pending.clear()
+
+        if mode == zlib.Z_FINISH:
+            output.append(self._get_trailer())
+
+        return b"".join(output)
+
+    def _submit(self, block: bytes, mode: int) -> bytes:
+        header = b""
+        if not self._is_started:
+            # header followed by an empty stored block, valid for any wbits
+            header = zlib.compressobj(
+                level=self.level, wbits=self.wbits
+            ).flush(zlib.Z_SYNC_FLUSH)
+            self._is_started = True
+
+        self._pending.append(
+            self.executor.submit(
+                deflate_block,
+                block,
+                self._previous,
+                self.level,
+                self.window,
+                mode,
+            )
+        )
+        self._previous = block[-(1 << self.window) :]
+
+        return header
+
+    def _get_trailer(self) -> bytes:
+        if 9 <= self.wbits <= 15:
+            return struct.pack(">I", self.adler32)
+        if self.wbits >= 25:
+            return struct.pack("<II", self.crc32, self.raw_size & 0xFFFFFFFF)
+        return b""
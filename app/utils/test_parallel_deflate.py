@@ -0,0 +1,27 @@
+import random
+import zlib
+
+import pytest
+
+from app.utils.parallel_deflate import ParallelDeflate
+
+random.seed(1)
+DATA = b"".join(
+    random.choice([b"topic ", b"unit ", b"state ", b"\x00\xff"])
+    for _ in range(20_000)
+)
+
+
+@pytest.mark.parametrize("wbits", [9, 15, -15, 31])
+@pytest.mark.parametrize("block_size", [1000, 4096, 10**6])
+def test_matches_zlib_stream(wbits, block_size):
+    producer = ParallelDeflate(wbits, 6, block_size)
+    data = b"".join(
+        producer.compress(DATA[i : i + 3000])
+        for i in range(0, len(DATA), 3000)
+    )
+    data += producer.flush()
+
+    assert zlib.decompress(data, wbits) == DATA
+    assert producer.raw_size == len(DATA)
+    assert producer.crc32 == zlib.crc32(DATA)
@@ -0,0 +1,23 @@
+import math
+
+from app.utils.utils import largest_triangle_three_buckets
+
+
+def test_lttb_keeps_small_series():
+    points = [(i, float(i)) for i in range(10)]
+
+    assert largest_triangle_three_buckets(points, 10) == points
+    assert largest_triangle_three_buckets(points, 2) == points
+
+
+def test_lttb_keeps_edges_and_peaks():
+    points = [(i, math.sin(i / 50)) for i in range(1000)]
+    points[500] = (500, 10.0)
+
+    sampled = largest_triangle_three_buckets(points, 100)
+
+    assert len(sampled) == 100
+    assert sampled[0] == points[0]
+    assert sampled[-1] == points[-1]
+    assert (500, 10.0) in sampled
+    assert sampled == sorted(sampled)
@@ -3,7 +3,6 @@ import datetime
 import hashlib
 import logging
 import os
-import shutil
 import string
 import time
 import uuid
@@ -14,8 +13,6 @@ import pyaes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from dateutil.relativedelta import relativedelta
 from fastapi import UploadFile
-from pathspec import PathSpec
-from pathspec.patterns import GitWildMatchPattern
 
 from app import settings
 from app.configs.errors import CipherError
@@ -136,35 +133,6 @@ def generate_random_string(length=6):
     return "".join(chars[c % len(chars)] for c in os.urandom(length))
 
 
-def clean_files_with_pepeignore(directory: str, pepe_ignore_path: str) -> None:
-    if not os.path.exists(pepe_ignore_path):
-        return
-
-    with open(pepe_ignore_path) as f:
-        pepeignore_rules = f.read().splitlines()
-
-    spec = PathSpec.from_lines(GitWildMatchPattern, pepeignore_rules)
-
-    for root, dirs, files in os.walk(directory, topdown=False):
-        rel_root = os.path.relpath(root, directory)
-        for file in files:
-            if rel_root == ".":
-                file_path = file
-            else:
-                file_path = os.path.join(rel_root, file)
-            if spec.match_file(file_path):
-                full_path = os.path.join(directory, file_path)
-                os.remove(full_path)
-        for dir_name in dirs:
-            if rel_root == ".":
-                dir_path = dir_name
-            else:
-                dir_path = os.path.join(rel_root, dir_name)
-            if spec.match_file(dir_path) or spec.match_file(f"{dir_path}/"):
-                full_dir_path = os.path.join(directory, dir_path)
-                shutil.rmtree(full_dir_path, ignore_errors=True)
-
-
 def timeit(func):
     def wrapper(*args, **kwargs):
         start_time = time.time()
@@ -250,6 +218,46 @@ def parse_interval(s: str) -> datetime.timedelta | relativedelta:
             raise ValueError(msg)
 
 
+def largest_triangle_three_buckets(
+    points: list[tuple[int, float]], threshold: int
+) -> list[tuple[int, float]]:
+    """
+    Downsample time-sorted (x, y) points to threshold points, keeping the shape
+    """
+    if threshold >= len(points) or threshold < 3:
+        return points
+
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    previous = 0
+
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        next_bucket = points[end : int((i + 2) * bucket_size) + 1]
+        next_bucket = next_bucket or points[-1:]
+        avg_x = sum(x for x, _ in next_bucket) / len(next_bucket)
+        avg_y = sum(y for _, y in next_bucket) / len(next_bucket)
+
+        previous_x, previous_y = points[previous]
+        best_area = -1.0
+        for j in range(start, end):
+            x, y = points[j]
+            area = abs(
+                (previous_x - avg_x) * (y - previous_y)
+                - (previous_x - x) * (avg_y - previous_y)
+            )
+            if area > best_area:
+                best_area = area
+                previous = j
+
+        sampled.append(points[previous])
+
+    sampled.append(points[-1])
+    return sampled
+
+
 def logo_to_console():
     print(
         rf"""
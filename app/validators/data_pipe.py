@@ -17,6 +17,8 @@ from app.dto.enum import (
 from app.schemas.pydantic.unit_node import DataPipeValidationErrorRead
 from app.utils.utils import snake_to_camel
 
+MAX_N_RECORDS_COUNT = 1024
+
 
 class ActivePeriod(BaseModel):
     type: ActivePeriodType
@@ -132,8 +134,8 @@ class ProcessingPolicyConfig(BaseModel):
             if self.n_records_count is None:
                 msg = "n_records_count is required for N_RECORDS"
                 raise ValueError(msg)
-            if not (0 < self.n_records_count <= 1024):
-                msg = "n_records_count must be between 1 and 1024"
+            if not (0 < self.n_records_count <= MAX_N_RECORDS_COUNT):
+                msg = f"n_records_count must be between 1 and {MAX_N_RECORDS_COUNT}"
                 raise ValueError(msg)
 
         if self.policy_type in [
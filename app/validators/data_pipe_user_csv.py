@@ -46,33 +46,20 @@ class StreamingCSVValidator:
         for row in reader:
             self.current_row += 1
 
-            create_datetime = self._parse_datetime(
-                row[AvailableCSVKeys.CREATE_DATETIME.value]
+            (
+                create_datetime,
+                state,
+                start_window_datetime,
+                end_window_datetime,
+            ) = self.validate_row(
+                row,
+                previous_create_datetime,
+                previous_state,
+                previous_end_window_datetime,
             )
-            self.check_monotonicity(create_datetime, previous_create_datetime)
-
-            state = self._is_valid_state(row[AvailableCSVKeys.STATE.value])
-
-            end_window_datetime = None
-            if (
-                self.config.processing_policy.policy_type
-                == ProcessingPolicyType.AGGREGATION
-            ):
-                end_window_datetime = self._parse_datetime(
-                    row[AvailableCSVKeys.END_WINDOW_DATETIME.value]
-                )
-
-            self.check_active_period(create_datetime)
-            self.check_black_white_list(state)
-            self.check_threshold(state)
-            self.check_max_rate(create_datetime, previous_create_datetime)
-            self.check_last_unique(state, previous_state)
-            self.check_max_size(state)
 
             match self.config.processing_policy.policy_type:
                 case ProcessingPolicyType.TIME_WINDOW:
-                    self.check_window_entry(create_datetime)
-
                     expiration_datetime = create_datetime + timedelta(
                         seconds=self.config.processing_policy.time_window_size
                     )
@@ -86,8 +73,6 @@ class StreamingCSVValidator:
                     )
 
                 case ProcessingPolicyType.N_RECORDS:
-                    self.check_n_last_entry()
-
                     yield NRecords(
                         unit_node_uuid=unit_node_uuid,
                         state=str(state),
@@ -98,16 +83,6 @@ class StreamingCSVValidator:
                     )
 
                 case ProcessingPolicyType.AGGREGATION:
-                    self.check_aggregation_entry(
-                        row,
-                        create_datetime,
-                        end_window_datetime,
-                        previous_end_window_datetime,
-                    )
-
-                    start_window_datetime = self._parse_datetime(
-                        row[AvailableCSVKeys.START_WINDOW_DATETIME.value]
-                    )
                     yield Aggregation(
                         unit_node_uuid=unit_node_uuid,
                         state=float(state),
@@ -126,6 +101,60 @@ class StreamingCSVValidator:
             ):
                 previous_end_window_datetime = end_window_datetime
 
+    def validate_row(
+        self,
+        row: dict,
+        previous_create_datetime: datetime | None,
+        previous_state: str | float | None,
+        previous_end_window_datetime: datetime | None,
+    ) -> tuple[datetime, str | float, datetime | None, datetime | None]:
+        create_datetime = self._parse_datetime(
+            row[AvailableCSVKeys.CREATE_DATETIME.value]
+        )
+        self.check_monotonicity(create_datetime, previous_create_datetime)
+
+        state = self._is_valid_state(row[AvailableCSVKeys.STATE.value])
+
+        end_window_datetime = None
+        if (
+            self.config.processing_policy.policy_type
+            == ProcessingPolicyType.AGGREGATION
+        ):
+            end_window_datetime = self._parse_datetime(
+                row[AvailableCSVKeys.END_WINDOW_DATETIME.value]
+            )
+
+        self.check_active_period(create_datetime)
+        self.check_black_white_list(state)
+        self.check_threshold(state)
+        self.check_max_rate(create_datetime, previous_create_datetime)
+        self.check_last_unique(state, previous_state)
+        self.check_max_size(state)
+
+        start_window_datetime = None
+        match self.config.processing_policy.policy_type:
+            case ProcessingPolicyType.TIME_WINDOW:
+                self.check_window_entry(create_datetime)
+            case ProcessingPolicyType.N_RECORDS:
+                self.check_n_last_entry()
+            case ProcessingPolicyType.AGGREGATION:
+                self.check_aggregation_entry(
+                    row,
+                    create_datetime,
+                    end_window_datetime,
+                    previous_end_window_datetime,
+                )
+                start_window_datetime = self._parse_datetime(
+                    row[AvailableCSVKeys.START_WINDOW_DATETIME.value]
+                )
+
+        return (
+            create_datetime,
+            state,
+            start_window_datetime,
+            end_window_datetime,
+        )
+
     def check_window_entry(self, create_datetime: datetime) -> None:
         datetime_now = datetime.now(UTC)
         if (
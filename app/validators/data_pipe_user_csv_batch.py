@@ -0,0 +1,549 @@
+import csv
+import uuid as uuid_pkg
+from collections.abc import AsyncGenerator
+from datetime import UTC, datetime, timedelta
+from io import StringIO
+
+import numpy as np
+
+from app import settings
+from app.dto.enum import (
+    ActivePeriodType,
+    FilterTypeValueFiltering,
+    FilterTypeValueThreshold,
+    ProcessingPolicyType,
+    TypeInputValue,
+)
+from app.validators.data_pipe import DataPipeConfig
+from app.validators.data_pipe_user_csv import (
+    AvailableCSVKeys,
+    StreamingCSVValidator,
+)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_MICROSECOND = timedelta(microseconds=1)
+_US_IN_SECOND = 1_000_000
+
+# Layout of "%Y-%m-%d %H:%M:%S[.%f]" - the only form parsed by numpy,
+# everything else goes through StreamingCSVValidator._parse_datetime
+_DATETIME_BASE_LEN = 19
+_DATETIME_MAX_LEN = 26
+_DATETIME_DIGITS = (0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18)
+_DATETIME_SEPARATORS = ((4, "-"), (7, "-"), (10, " "), (13, ":"), (16, ":"))
+_DATETIME_FIELDS = (
+    # start, digits, min, max
+    (0, 4, 1, 9999),
+    (5, 2, 1, 12),
+    (8, 2, 1, 31),
+    (11, 2, 0, 23),
+    (14, 2, 0, 59),
+    (17, 2, 0, 59),
+)
+
+
+def datetime_to_us(value: datetime) -> int:
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def us_to_datetimes(values: np.ndarray) -> list[datetime]:
+    return [
+        item.replace(tzinfo=UTC)
+        for item in values.astype("datetime64[us]").astype(object)
+    ]
+
+
+class BatchCSVValidator(StreamingCSVValidator):
+    """
+    Columnar counterpart of StreamingCSVValidator.
+
+    Checks run as vector operations over a batch, and only the rows
+    flagged by them are replayed through StreamingCSVValidator.validate_row.
+    Masks may over-report but never miss a failing row, so the first error
+    and its message match the row-wise validator exactly.
+    """
+
+    def __init__(self, config: DataPipeConfig, batch_size: int = 5000):
+        super().__init__(config)
+        self.batch_size = batch_size
+
+        self.fieldnames: list[str] = []
+        self.previous_create_us: int | None = None
+        self.previous_state: str | float | None = None
+        self.previous_end_window_us: int | None = None
+
+    async def iter_validated_columns(
+        self, unit_node_uuid: uuid_pkg.UUID, upload_file
+    ) -> AsyncGenerator[dict[str, list]]:
+        content = await upload_file.read()
+        reader = csv.reader(StringIO(content.decode("utf-8")))
+
+        self.fieldnames = next(reader, [])
+
+        batch = []
+        for row in reader:
+            # csv.DictReader skips blank lines, keep row numbers identical
+            if row == []:
+                continue
+
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                yield self.validate_batch(unit_node_uuid, batch)
+                batch = []
+
+        if batch:
+            yield self.validate_batch(unit_node_uuid, batch)
+
+    def validate_batch(
+        self, unit_node_uuid: uuid_pkg.UUID, rows: list[list[str]]
+    ) -> dict[str, list]:
+        policy = self.config.processing_policy
+        is_aggregation = policy.policy_type == ProcessingPolicyType.AGGREGATION
+
+        create_values = self._get_column(
+            rows, AvailableCSVKeys.CREATE_DATETIME
+        )
+        create_us, suspicious = self._parse_datetime_column(create_values)
+
+        states, numbers, state_suspicious = self._parse_state_column(
+            self._get_column(rows, AvailableCSVKeys.STATE)
+        )
+        suspicious |= state_suspicious
+
+        start_us = end_us = None
+        if is_aggregation:
+            end_us, end_suspicious = self._parse_datetime_column(
+                self._get_column(rows, AvailableCSVKeys.END_WINDOW_DATETIME)
+            )
+            start_us, start_suspicious = self._parse_datetime_column(
+                self._get_column(rows, AvailableCSVKeys.START_WINDOW_DATETIME)
+            )
+            suspicious |= end_suspicious | start_suspicious
+
+        text_states = (
+            states
+            if self.config.filters.type_input_value == TypeInputValue.TEXT
+            else list(map(str, states))
+        )
+        sizes = np.fromiter(map(len, text_states), dtype=np.int64)
+
+        previous_create_us, has_previous = self._shift(
+            create_us, self.previous_create_us
+        )
+
+        suspicious |= has_previous & (create_us < previous_create_us)
+        suspicious |= self._active_period_mask(create_us)
+        suspicious |= self._black_white_list_mask(states, numbers)
+        suspicious |= self._threshold_mask(numbers)
+        suspicious |= self._max_rate_mask(
+            create_us, previous_create_us, has_previous
+        )
+        suspicious |= self._last_unique_mask(states, numbers)
+
+        if self.config.filters.max_size > 0:
+            suspicious |= sizes > self.config.filters.max_size
+
+        match policy.policy_type:
+            case ProcessingPolicyType.TIME_WINDOW:
+                suspicious |= self._window_entry_mask(create_us)
+            case ProcessingPolicyType.N_RECORDS:
+                row_numbers = np.arange(
+                    self.current_row + 1, self.current_row + len(rows) + 1
+                )
+                suspicious |= row_numbers > policy.n_records_count
+            case ProcessingPolicyType.AGGREGATION:
+                suspicious |= self._aggregation_entry_mask(
+                    create_us, start_us, end_us
+                )
+
+        self._replay_suspicious_rows(
+            rows, suspicious, create_us, states, end_us
+        )
+
+        self.current_row += len(rows)
+        self.previous_create_us = int(create_us[-1])
+        self.previous_state = states[-1]
+        if is_aggregation:
+            self.previous_end_window_us = int(end_us[-1])
+
+        return self._build_columns(
+            unit_node_uuid,
+            create_us,
+            states,
+            text_states=text_states,
+            start_us=start_us,
+            end_us=end_us,
+        )
+
+    def _replay_suspicious_rows(
+        self,
+        rows: list[list[str]],
+        suspicious: np.ndarray,
+        create_us: np.ndarray,
+        states: list,
+        end_us: np.ndarray | None,
+    ) -> None:
+        offset = self.current_row
+
+        for index in np.flatnonzero(suspicious).tolist():
+            if index == 0:
+                previous_create_us = self.previous_create_us
+                previous_state = self.previous_state
+                previous_end_window_us = self.previous_end_window_us
+            else:
+                previous_create_us = int(create_us[index - 1])
+                previous_state = states[index - 1]
+                previous_end_window_us = (
+                    int(end_us[index - 1]) if end_us is not None else None
+                )
+
+            self.current_row = offset + index + 1
+            self.validate_row(
+                self._as_dict(rows[index]),
+                self._from_us(previous_create_us),
+                previous_state,
+                self._from_us(previous_end_window_us),
+            )
+
+        self.current_row = offset
+
+    def _build_columns(
+        self,
+        unit_node_uuid: uuid_pkg.UUID,
+        create_us: np.ndarray,
+        states: list,
+        *,
+        text_states: list[str],
+        start_us: np.ndarray | None,
+        end_us: np.ndarray | None,
+    ) -> dict[str, list]:
+        policy = self.config.processing_policy
+        count = len(states)
+        create_datetimes = us_to_datetimes(create_us)
+
+        match policy.policy_type:
+            case ProcessingPolicyType.TIME_WINDOW:
+                return {
+                    "unit_node_uuid": [unit_node_uuid] * count,
+                    "state": text_states,
+                    "state_type": [self.config.filters.type_input_value.value]
+                    * count,
+                    "create_datetime": create_datetimes,
+                    "expiration_datetime": us_to_datetimes(
+                        create_us + policy.time_window_size * _US_IN_SECOND
+                    ),
+                    "size": list(map(len, text_states)),
+                }
+            case ProcessingPolicyType.N_RECORDS:
+                return {
+                    "unit_node_uuid": [unit_node_uuid] * count,
+                    "state": text_states,
+                    "state_type": [self.config.filters.type_input_value.value]
+                    * count,
+                    "create_datetime": create_datetimes,
+                    "max_count": [policy.n_records_count] * count,
+                    "size": list(map(len, text_states)),
+                }
+            case ProcessingPolicyType.AGGREGATION:
+                return {
+                    "unit_node_uuid": [unit_node_uuid] * count,
+                    "state": list(map(float, states)),
+                    "aggregation_type": [policy.aggregation_functions.value]
+                    * count,
+                    "time_window_size": [policy.time_window_size] * count,
+                    "create_datetime": create_datetimes,
+                    "start_window_datetime": us_to_datetimes(start_us),
+                    "end_window_datetime": us_to_datetimes(end_us),
+                }
+
+    def _get_column(
+        self, rows: list[list[str]], key: AvailableCSVKeys
+    ) -> list[str | None]:
+        if key.value not in self.fieldnames:
+            # validate_row fails on the missing key, flag every row
+            return [None] * len(rows)
+
+        position = self.fieldnames.index(key.value)
+        return [row[position] if position < len(row) else None for row in rows]
+
+    def _as_dict(self, row: list[str]) -> dict:
+        # Same shape as csv.DictReader rows
+        result = dict(zip(self.fieldnames, row, strict=False))
+        if len(self.fieldnames) < len(row):
+            result[None] = row[len(self.fieldnames) :]
+        for key in self.fieldnames[len(row) :]:
+            result[key] = None
+        return result
+
+    def _parse_datetime_column(
+        self, values: list[str | None]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        count = len(values)
+        result = np.zeros(count, dtype=np.int64)
+        suspicious = np.zeros(count, dtype=bool)
+
+        text = np.array(values, dtype=np.str_)
+        canonical = self._canonical_datetime_mask(text)
+        if canonical.any():
+            try:
+                result[canonical] = (
+                    text[canonical].astype("datetime64[us]").astype(np.int64)
+                )
+            except ValueError:
+                canonical[:] = False
+
+        for index in np.flatnonzero(~canonical).tolist():
+            try:
+                result[index] = datetime_to_us(
+                    self._parse_datetime(values[index])
+                )
+            except (TypeError, ValueError):
+                suspicious[index] = True
+
+        return result, suspicious
+
+    @staticmethod
+    def _canonical_datetime_mask(text: np.ndarray) -> np.ndarray:
+        count = len(text)
+        width = text.dtype.itemsize // 4
+        if width < _DATETIME_BASE_LEN:
+            return np.zeros(count, dtype=bool)
+
+        codes = text.view(np.uint32).reshape(count, width).astype(
+            np.int64
+        ) - ord("0")
+        lengths = np.char.str_len(text)
+
+        digits = codes[:, _DATETIME_DIGITS]
+        mask = ((digits >= 0) & (digits <= 9)).all(axis=1)
+        for position, separator in _DATETIME_SEPARATORS:
+            mask &= codes[:, position] == ord(separator) - ord("0")
+
+        for start, size, min_value, max_value in _DATETIME_FIELDS:
+            value = np.zeros(count, dtype=np.int64)
+            for position in range(start, start + size):
+                value = value * 10 + codes[:, position]
+            mask &= (value >= min_value) & (value <= max_value)
+
+        if width == _DATETIME_BASE_LEN:
+            return mask & (lengths == _DATETIME_BASE_LEN)
+
+        mask &= (lengths == _DATETIME_BASE_LEN) | (
+            (lengths > _DATETIME_BASE_LEN + 1)
+            & (lengths <= _DATETIME_MAX_LEN)
+            & (codes[:, _DATETIME_BASE_LEN] == ord(".") - ord("0"))
+        )
+
+        fraction_end = min(width, _DATETIME_MAX_LEN)
+        fraction = codes[:, _DATETIME_BASE_LEN + 1 : fraction_end]
+        positions = np.arange(_DATETIME_BASE_LEN + 1, fraction_end)
+        mask &= (
+            ((fraction >= 0) & (fraction <= 9))
+            | (positions >= lengths[:, None])
+        ).all(axis=1)
+
+        return mask
+
+    def _parse_state_column(
+        self, values: list[str | None]
+    ) -> tuple[list, np.ndarray, np.ndarray]:
+        count = len(values)
+        suspicious = np.zeros(count, dtype=bool)
+
+        if self.config.filters.type_input_value == TypeInputValue.TEXT:
+            states = list(map(str, values))
+            return states, np.full(count, np.nan), suspicious
+
+        try:
+            states = list(map(float, values))
+        except (TypeError, ValueError):
+            states = []
+            for index, value in enumerate(values):
+                try:
+                    states.append(float(value))
+                except (TypeError, ValueError):
+                    states.append(float("nan"))
+                    suspicious[index] = True
+
+        return states, np.array(states, dtype=np.float64), suspicious
+
+    @staticmethod
+    def _shift(
+        values: np.ndarray, previous: int | None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        shifted = np.empty_like(values)
+        shifted[1:] = values[:-1]
+        shifted[0] = previous if previous is not None else 0
+
+        has_previous = np.ones(len(values), dtype=bool)
+        has_previous[0] = previous is not None
+        return shifted, has_previous
+
+    @staticmethod
+    def _from_us(value: int | None) -> datetime | None:
+        return _EPOCH + value * _MICROSECOND if value is not None else None
+
+    @staticmethod
+    def _bound_to_us(value: datetime | None) -> int | None:
+        if value is None or value.tzinfo is None:
+            return None
+        return datetime_to_us(value)
+
+    def _active_period_mask(self, create_us: np.ndarray) -> np.ndarray:
+        active_period = self.config.active_period
+        start_us = self._bound_to_us(active_period.start)
+        end_us = self._bound_to_us(active_period.end)
+
+        check_start = active_period.type in (
+            ActivePeriodType.FROM_DATE,
+            ActivePeriodType.DATE_RANGE,
+        )
+        check_end = active_period.type in (
+            ActivePeriodType.TO_DATE,
+            ActivePeriodType.DATE_RANGE,
+        )
+        if (check_start and start_us is None) or (
+            check_end and end_us is None
+        ):
+            return np.ones(len(create_us), dtype=bool)
+
+        mask = np.zeros(len(create_us), dtype=bool)
+        if check_start:
+            mask |= create_us < start_us
+        if check_end:
+            mask |= create_us > end_us
+        return mask
+
+    def _black_white_list_mask(
+        self, states: list, numbers: np.ndarray
+    ) -> np.ndarray:
+        filters = self.config.filters
+        count = len(states)
+        if not filters.type_value_filtering:
+            return np.zeros(count, dtype=bool)
+
+        try:
+            if filters.type_input_value == TypeInputValue.TEXT:
+                allowed = {str(item) for item in filters.filtering_values}
+                in_list = np.fromiter(
+                    (state in allowed for state in states),
+                    dtype=bool,
+                    count=count,
+                )
+            else:
+                in_list = np.isin(
+                    numbers,
+                    [float(item) for item in filters.filtering_values],
+                )
+        except (TypeError, ValueError):
+            return np.ones(count, dtype=bool)
+
+        match filters.type_value_filtering:
+            case FilterTypeValueFiltering.WHITELIST:
+                return ~in_list
+            case FilterTypeValueFiltering.BLACKLIST:
+                return in_list
+
+    def _threshold_mask(self, numbers: np.ndarray) -> np.ndarray:
+        filters = self.config.filters
+        mask = np.zeros(len(numbers), dtype=bool)
+        if not (
+            filters.type_value_threshold
+            and filters.type_input_value == TypeInputValue.NUMBER
+        ):
+            return mask
+
+        check_min = filters.type_value_threshold in (
+            FilterTypeValueThreshold.MIN,
+            FilterTypeValueThreshold.RANGE,
+        )
+        check_max = filters.type_value_threshold in (
+            FilterTypeValueThreshold.MAX,
+            FilterTypeValueThreshold.RANGE,
+        )
+        if (check_min and filters.threshold_min is None) or (
+            check_max and filters.threshold_max is None
+        ):
+            return ~mask
+
+        if check_min:
+            mask |= numbers < filters.threshold_min
+        if check_max:
+            mask |= numbers > filters.threshold_max
+        return mask
+
+    def _is_unique_policy(self) -> bool:
+        return self.config.processing_policy.policy_type in [
+            ProcessingPolicyType.N_RECORDS,
+            ProcessingPolicyType.TIME_WINDOW,
+        ]
+
+    def _max_rate_mask(
+        self,
+        create_us: np.ndarray,
+        previous_create_us: np.ndarray,
+        has_previous: np.ndarray,
+    ) -> np.ndarray:
+        if not (self._is_unique_policy() and self.config.filters.max_rate > 0):
+            return np.zeros(len(create_us), dtype=bool)
+
+        max_rate_us = (
+            timedelta(seconds=self.config.filters.max_rate) // _MICROSECOND
+        )
+        return has_previous & (previous_create_us + max_rate_us > create_us)
+
+    def _last_unique_mask(
+        self, states: list, numbers: np.ndarray
+    ) -> np.ndarray:
+        count = len(states)
+        mask = np.zeros(count, dtype=bool)
+        if not (
+            self._is_unique_policy() and self.config.filters.last_unique_check
+        ):
+            return mask
+
+        if self.config.filters.type_input_value == TypeInputValue.TEXT:
+            mask[1:] = np.fromiter(
+                map(str.__eq__, states[1:], states[:-1]),
+                dtype=bool,
+                count=count - 1,
+            )
+        else:
+            mask[1:] = numbers[1:] == numbers[:-1]
+
+        if self.previous_state is not None:
+            mask[0] = states[0] == self.previous_state
+        return mask
+
+    def _window_entry_mask(self, create_us: np.ndarray) -> np.ndarray:
+        # validate_row takes its own now(), so rows close to the borders
+        # are always replayed
+        now_us = datetime_to_us(datetime.now(UTC))
+        window_us = (
+            self.config.processing_policy.time_window_size * _US_IN_SECOND
+        )
+        return (create_us > now_us - _US_IN_SECOND) | (
+            create_us < now_us - window_us + _US_IN_SECOND
+        )
+
+    def _aggregation_entry_mask(
+        self,
+        create_us: np.ndarray,
+        start_us: np.ndarray,
+        end_us: np.ndarray,
+    ) -> np.ndarray:
+        window_us = (
+            self.config.processing_policy.time_window_size * _US_IN_SECOND
+        )
+        min_window_us = settings.pu_time_window_sizes[0] * _US_IN_SECOND
+
+        mask = (start_us // _US_IN_SECOND) % 60 != 0
+        mask |= (end_us // _US_IN_SECOND) % 60 != 0
+        mask |= end_us < start_us
+        mask |= np.abs(create_us - end_us) >= min_window_us
+        mask |= end_us - start_us != window_us
+
+        previous_end_us, has_previous = self._shift(
+            end_us, self.previous_end_window_us
+        )
+        mask |= has_previous & ((end_us - previous_end_us) % window_us != 0)
+        return mask
@@ -0,0 +1,195 @@
+import asyncio
+import random
+import uuid as uuid_pkg
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from app.configs.errors import DataPipeError
+from app.dto.enum import (
+    ActivePeriodType,
+    AggregationFunctions,
+    FilterTypeValueFiltering,
+    FilterTypeValueThreshold,
+    ProcessingPolicyType,
+    TypeInputValue,
+)
+from app.validators.data_pipe import DataPipeConfig
+from app.validators.data_pipe_user_csv import StreamingCSVValidator
+from app.validators.data_pipe_user_csv_batch import BatchCSVValidator
+
+
+class UploadFile:
+    def __init__(self, content: str):
+        self.content = content.encode("utf-8")
+
+    async def read(self) -> bytes:
+        return self.content
+
+
+def make_config(policy: dict, **filters) -> DataPipeConfig:
+    return DataPipeConfig(
+        active_period={"type": ActivePeriodType.PERMANENT},
+        filters={
+            "type_input_value": TypeInputValue.NUMBER,
+            "max_rate": 0,
+            "max_size": 0,
+            **filters,
+        },
+        processing_policy=policy,
+    )
+
+
+def make_csv(rows: list[tuple]) -> str:
+    lines = ["create_datetime,state"]
+    lines.extend(f"{create},{state}" for create, state in rows)
+    return "\n".join(lines)
+
+
+def fmt(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+async def run_streaming(config, content):
+    validator = StreamingCSVValidator(config)
+    try:
+        items = [
+            item.to_dict() | {"unit_node_uuid": None}
+            async for item in validator.iter_validated_streaming(
+                uuid_pkg.uuid4(), UploadFile(content)
+            )
+        ]
+    except (DataPipeError, ValueError) as e:
+        return [], f"{type(e).__name__}: {e}"
+    return items, None
+
+
+async def run_batch(config, content, batch_size):
+    unit_node_uuid = uuid_pkg.uuid4()
+    items = []
+    try:
+        async for columns in BatchCSVValidator(
+            config, batch_size=batch_size
+        ).iter_validated_columns(unit_node_uuid, UploadFile(content)):
+            items.extend(
+                dict(zip(columns.keys(), values, strict=True))
+                | {"unit_node_uuid": None}
+                for values in zip(*columns.values(), strict=True)
+            )
+    except (DataPipeError, ValueError) as e:
+        return [], f"{type(e).__name__}: {e}"
+    return items, None
+
+
+def assert_same(config, content, batch_size=7) -> str | None:
+    streaming_items, streaming_error = asyncio.run(
+        run_streaming(config, content)
+    )
+    batch_items, batch_error = asyncio.run(
+        run_batch(config, content, batch_size)
+    )
+
+    assert batch_error == streaming_error
+    if streaming_error is None:
+        assert batch_items == streaming_items
+    return streaming_error
+
+
+def time_window_rows(count: int, step: float = 1.0) -> list[tuple]:
+    start = datetime.now(UTC) - timedelta(seconds=count * step + 60)
+    return [
+        (fmt(start + timedelta(seconds=i * step)), i % 17)
+        for i in range(count)
+    ]
+
+
+TIME_WINDOW = {
+    "policy_type": ProcessingPolicyType.TIME_WINDOW,
+    "time_window_size": 86400,
+}
+
+
+def test_valid_time_window_matches():
+    assert (
+        assert_same(make_config(TIME_WINDOW), make_csv(time_window_rows(50)))
+        is None
+    )
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {
+            "type_value_threshold": FilterTypeValueThreshold.RANGE,
+            "threshold_min": 0,
+            "threshold_max": 15,
+        },
+        {
+            "type_value_filtering": FilterTypeValueFiltering.WHITELIST,
+            "filtering_values": list(range(16)),
+        },
+        {
+            "type_value_filtering": FilterTypeValueFiltering.BLACKLIST,
+            "filtering_values": [16],
+        },
+        {"max_rate": 4},
+        {"max_size": 3},
+    ],
+)
+def test_first_failing_row_matches(filters):
+    rows = time_window_rows(60, step=3)
+    error = assert_same(make_config(TIME_WINDOW, **filters), make_csv(rows))
+    assert "Validation Error: Row " in error
+
+
+def test_broken_rows_match():
+    rows = time_window_rows(40)
+    random.seed(1)
+    for _ in range(20):
+        broken = list(rows)
+        index = random.randrange(1, len(rows))
+        broken[index] = random.choice(
+            [
+                (broken[index][0], "abc"),
+                (broken[index][0][:10], 1),
+                (broken[index - 1][0].replace(":", "-"), 1),
+                (fmt(datetime(2000, 1, 1, tzinfo=UTC)), 1),
+                (broken[index][0], broken[index - 1][1]),
+            ]
+        )
+        assert_same(
+            make_config(TIME_WINDOW, last_unique_check=True),
+            make_csv(broken),
+        )
+
+
+def test_n_records_limit_matches():
+    config = make_config(
+        {"policy_type": ProcessingPolicyType.N_RECORDS, "n_records_count": 20}
+    )
+    assert assert_same(config, make_csv(time_window_rows(20))) is None
+    assert "n_records_count" in assert_same(
+        config, make_csv(time_window_rows(21))
+    )
+
+
+def test_aggregation_matches():
+    config = make_config(
+        {
+            "policy_type": ProcessingPolicyType.AGGREGATION,
+            "time_window_size": 3600,
+            "aggregation_functions": AggregationFunctions.AVG,
+        }
+    )
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    lines = ["create_datetime,state,start_window_datetime,end_window_datetime"]
+    for i in range(30):
+        end = start + timedelta(hours=i + 1)
+        lines.append(
+            f"{fmt(end + timedelta(seconds=5))},{i * 1.5},"
+            f"{fmt(end - timedelta(hours=1))},{fmt(end)}"
+        )
+    assert assert_same(config, "\n".join(lines)) is None
+
+    lines[12] = lines[12].replace(":00:00.000000,", ":00:30.000000,", 1)
+    assert "Row 12:" in assert_same(config, "\n".join(lines))
@@ -0,0 +1,271 @@
+CREATE TABLE window_entry_rollup_1m
+(
+    unit_node_uuid UUID,
+    bucket_datetime DateTime,
+    state_avg AggregateFunction(avg, Nullable(Float64)),
+    state_min SimpleAggregateFunction(min, Nullable(Float64)),
+    state_max SimpleAggregateFunction(max, Nullable(Float64)),
+    state_last AggregateFunction(argMax, String, DateTime64(3)),
+    state_count SimpleAggregateFunction(sum, UInt64),
+    expiration_datetime SimpleAggregateFunction(max, DateTime)
+)
+ENGINE = AggregatingMergeTree()
+ORDER BY (unit_node_uuid, bucket_datetime)
+TTL expiration_datetime
+SETTINGS
+    merge_with_ttl_timeout = 600,
+    index_granularity = 128;
+
+CREATE MATERIALIZED VIEW window_entry_rollup_1m_mv TO window_entry_rollup_1m AS
+SELECT
+    unit_node_uuid,
+    toStartOfMinute(create_datetime) AS bucket_datetime,
+    avgState(toFloat64OrNull(state)) AS state_avg,
+    min(toFloat64OrNull(state)) AS state_min,
+    max(toFloat64OrNull(state)) AS state_max,
+    argMaxState(state, create_datetime) AS state_last,
+    count() AS state_count,
+    max(expiration_datetime) AS expiration_datetime
+FROM window_entry
+GROUP BY unit_node_uuid, bucket_datetime;
+
+INSERT INTO window_entry_rollup_1m
+SELECT
+    unit_node_uuid,
+    toStartOfMinute(create_datetime) AS bucket_datetime,
+    avgState(toFloat64OrNull(state)) AS state_avg,
+    min(toFloat64OrNull(state)) AS state_min,
+    max(toFloat64OrNull(state)) AS state_max,
+    argMaxState(state, create_datetime) AS state_last,
+    count() AS state_count,
+    max(expiration_datetime) AS expiration_datetime
+FROM window_entry
+GROUP BY unit_node_uuid, bucket_datetime;
+
+
+CREATE TABLE aggregation_entry_rollup_1m
+(
+    unit_node_uuid UUID,
+    aggregation_type Enum8('Avg' = 1, 'Min' = 2, 'Max' = 3, 'Sum' = 4),
+    time_window_size UInt32,
+    bucket_datetime DateTime,
+    state_avg AggregateFunction(avg, Float64),
+    state_min SimpleAggregateFunction(min, Float64),
+    state_max SimpleAggregateFunction(max, Float64),
+    state_last AggregateFunction(argMax, Float64, DateTime64(3)),
+    state_count SimpleAggregateFunction(sum, UInt64)
+)
+ENGINE = AggregatingMergeTree()
+ORDER BY (unit_node_uuid, aggregation_type, time_window_size, bucket_datetime)
+SETTINGS
+    index_granularity = 128;
+
+CREATE MATERIALIZED VIEW aggregation_entry_rollup_1m_mv TO aggregation_entry_rollup_1m AS
+SELECT
+    unit_node_uuid,
+    aggregation_type,
+    time_window_size,
+    toStartOfMinute(end_window_datetime) AS bucket_datetime,
+    avgState(state) AS state_avg,
+    min(state) AS state_min,
+    max(state) AS state_max,
+    argMaxState(state, end_window_datetime) AS state_last,
+    count() AS state_count
+FROM aggregation_entry
+GROUP BY unit_node_uuid, aggregation_type, time_window_size, bucket_datetime;
+
+INSERT INTO aggregation_entry_rollup_1m
+SELECT
+    unit_node_uuid,
+    aggregation_type,
+    time_window_size,
+    toStartOfMinute(end_window_datetime) AS bucket_datetime,
+    avgState(state) AS state_avg,
+    min(state) AS state_min,
+    max(state) AS state_max,
+    argMaxState(state, end_window_datetime) AS state_last,
+    count() AS state_count
+FROM aggregation_entry
+GROUP BY unit_node_uuid, aggregation_type, time_window_size, bucket_datetime;
+
+
+CREATE TABLE window_entry_rollup_1h
+(
+    unit_node_uuid UUID,
+    bucket_datetime DateTime,
+    state_avg AggregateFunction(avg, Nullable(Float64)),
+    state_min SimpleAggregateFunction(min, Nullable(Float64)),
+    state_max SimpleAggregateFunction(max, Nullable(Float64)),
+    state_last AggregateFunction(argMax, String, DateTime64(3)),
+    state_count SimpleAggregateFunction(sum, UInt64),
+    expiration_datetime SimpleAggregateFunction(max, DateTime)
+)
+ENGINE = AggregatingMergeTree()
+ORDER BY (unit_node_uuid, bucket_datetime)
+TTL expiration_datetime
+SETTINGS
+    merge_with_ttl_timeout = 600,
+    index_granularity = 128;
+
+CREATE MATERIALIZED VIEW window_entry_rollup_1h_mv TO window_entry_rollup_1h AS
+SELECT
+    unit_node_uuid,
+    toStartOfHour(create_datetime) AS bucket_datetime,
+    avgState(toFloat64OrNull(state)) AS state_avg,
+    min(toFloat64OrNull(state)) AS state_min,
+    max(toFloat64OrNull(state)) AS state_max,
+    argMaxState(state, create_datetime) AS state_last,
+    count() AS state_count,
+    max(expiration_datetime) AS expiration_datetime
+FROM window_entry
+GROUP BY unit_node_uuid, bucket_datetime;
+
+INSERT INTO window_entry_rollup_1h
+SELECT
+    unit_node_uuid,
+    toStartOfHour(create_datetime) AS bucket_datetime,
+    avgState(toFloat64OrNull(state)) AS state_avg,
+    min(toFloat64OrNull(state)) AS state_min,
+    max(toFloat64OrNull(state)) AS state_max,
+    argMaxState(state, create_datetime) AS state_last,
+    count() AS state_count,
+    max(expiration_datetime) AS expiration_datetime
+FROM window_entry
+GROUP BY unit_node_uuid, bucket_datetime;
+
+
+CREATE TABLE aggregation_entry_rollup_1h
+(
+    unit_node_uuid UUID,
+    aggregation_type Enum8('Avg' = 1, 'Min' = 2, 'Max' = 3, 'Sum' = 4),
+    time_window_size UInt32,
+    bucket_datetime DateTime,
+    state_avg AggregateFunction(avg, Float64),
+    state_min SimpleAggregateFunction(min, Float64),
+    state_max SimpleAggregateFunction(max, Float64),
+    state_last AggregateFunction(argMax, Float64, DateTime64(3)),
+    state_count SimpleAggregateFunction(sum, UInt64)
+)
+ENGINE = AggregatingMergeTree()
+ORDER BY (unit_node_uuid, aggregation_type, time_window_size, bucket_datetime)
+SETTINGS
+    index_granularity = 128;
+
+CREATE MATERIALIZED VIEW aggregation_entry_rollup_1h_mv TO aggregation_entry_rollup_1h AS
+SELECT
+    unit_node_uuid,
+    aggregation_type,
+    time_window_size,
+    toStartOfHour(end_window_datetime) AS bucket_datetime,
+    avgState(state) AS state_avg,
+    min(state) AS state_min,
+    max(state) AS state_max,
+    argMaxState(state, end_window_datetime) AS state_last,
+    count() AS state_count
+FROM aggregation_entry
+GROUP BY unit_node_uuid, aggregation_type, time_window_size, bucket_datetime;
+
+INSERT INTO aggregation_entry_rollup_1h
+SELECT
+    unit_node_uuid,
+    aggregation_type,
+    time_window_size,
+    toStartOfHour(end_window_datetime) AS bucket_datetime,
+    avgState(state) AS state_avg,
+    min(state) AS state_min,
+    max(state) AS state_max,
+    argMaxState(state, end_window_datetime) AS state_last,
+    count() AS state_count
+FROM aggregation_entry
+GROUP BY unit_node_uuid, aggregation_type, time_window_size, bucket_datetime;
+
+
+CREATE TABLE window_entry_rollup_1d
+(
+    unit_node_uuid UUID,
+    bucket_datetime DateTime,
+    state_avg AggregateFunction(avg, Nullable(Float64)),
+    state_min SimpleAggregateFunction(min, Nullable(Float64)),
+    state_max SimpleAggregateFunction(max, Nullable(Float64)),
+    state_last AggregateFunction(argMax, String, DateTime64(3)),
+    state_count SimpleAggregateFunction(sum, UInt64),
+    expiration_datetime SimpleAggregateFunction(max, DateTime)
+)
+ENGINE = AggregatingMergeTree()
+ORDER BY (unit_node_uuid, bucket_datetime)
+TTL expiration_datetime
+SETTINGS
+    merge_with_ttl_timeout = 600,
+    index_granularity = 128;
+
+CREATE MATERIALIZED VIEW window_entry_rollup_1d_mv TO window_entry_rollup_1d AS
+SELECT
+    unit_node_uuid,
+    toStartOfDay(create_datetime) AS bucket_datetime,
+    avgState(toFloat64OrNull(state)) AS state_avg,
+    min(toFloat64OrNull(state)) AS state_min,
+    max(toFloat64OrNull(state)) AS state_max,
+    argMaxState(state, create_datetime) AS state_last,
+    count() AS state_count,
+    max(expiration_datetime) AS expiration_datetime
+FROM window_entry
+GROUP BY unit_node_uuid, bucket_datetime;
+
+INSERT INTO window_entry_rollup_1d
+SELECT
+    unit_node_uuid,
+    toStartOfDay(create_datetime) AS bucket_datetime,
+    avgState(toFloat64OrNull(state)) AS state_avg,
+    min(toFloat64OrNull(state)) AS state_min,
+    max(toFloat64OrNull(state)) AS state_max,
+    argMaxState(state, create_datetime) AS state_last,
+    count() AS state_count,
+    max(expiration_datetime) AS expiration_datetime
+FROM window_entry
+GROUP BY unit_node_uuid, bucket_datetime;
+
+
+CREATE TABLE aggregation_entry_rollup_1d
+(
+    unit_node_uuid UUID,
+    aggregation_type Enum8('Avg' = 1, 'Min' = 2, 'Max' = 3, 'Sum' = 4),
+    time_window_size UInt32,
+    bucket_datetime DateTime,
+    state_avg AggregateFunction(avg, Float64),
+    state_min SimpleAggregateFunction(min, Float64),
+    state_max SimpleAggregateFunction(max, Float64),
+    state_last AggregateFunction(argMax, Float64, DateTime64(3)),
+    state_count SimpleAggregateFunction(sum, UInt64)
+)
+ENGINE = AggregatingMergeTree()
+ORDER BY (unit_node_uuid, aggregation_type, time_window_size, bucket_datetime)
+SETTINGS
+    index_granularity = 128;
+
+CREATE MATERIALIZED VIEW aggregation_entry_rollup_1d_mv TO aggregation_entry_rollup_1d AS
+SELECT
+    unit_node_uuid,
+    aggregation_type,
+    time_window_size,
+    toStartOfDay(end_window_datetime) AS bucket_datetime,
+    avgState(state) AS state_avg,
+    min(state) AS state_min,
+    max(state) AS state_max,
+    argMaxState(state, end_window_datetime) AS state_last,
+    count() AS state_count
+FROM aggregation_entry
+GROUP BY unit_node_uuid, aggregation_type, time_window_size, bucket_datetime;
+
+INSERT INTO aggregation_entry_rollup_1d
+SELECT
+    unit_node_uuid,
+    aggregation_type,
+    time_window_size,
+    toStartOfDay(end_window_datetime) AS bucket_datetime,
+    avgState(state) AS state_avg,
+    min(state) AS state_min,
+    max(state) AS state_max,
+    argMaxState(state, end_window_datetime) AS state_last,
+    count() AS state_count
+FROM aggregation_entry
+GROUP BY unit_node_uuid, aggregation_type, time_window_size, bucket_datetime;
\ No newline at end of file
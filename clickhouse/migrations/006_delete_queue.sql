@@ -0,0 +1,25 @@
+ALTER TABLE n_last_entry ADD COLUMN insert_datetime DateTime64(3) DEFAULT toDateTime64(0, 3);
+ALTER TABLE n_last_entry MATERIALIZE COLUMN insert_datetime SETTINGS mutations_sync = 1;
+ALTER TABLE n_last_entry MODIFY COLUMN insert_datetime DateTime64(3) DEFAULT now64(3);
+
+ALTER TABLE window_entry ADD COLUMN insert_datetime DateTime64(3) DEFAULT toDateTime64(0, 3);
+ALTER TABLE window_entry MATERIALIZE COLUMN insert_datetime SETTINGS mutations_sync = 1;
+ALTER TABLE window_entry MODIFY COLUMN insert_datetime DateTime64(3) DEFAULT now64(3);
+
+ALTER TABLE aggregation_entry ADD COLUMN insert_datetime DateTime64(3) DEFAULT toDateTime64(0, 3);
+ALTER TABLE aggregation_entry MATERIALIZE COLUMN insert_datetime SETTINGS mutations_sync = 1;
+ALTER TABLE aggregation_entry MODIFY COLUMN insert_datetime DateTime64(3) DEFAULT now64(3);
+
+ALTER TABLE unit_logs ADD COLUMN insert_datetime DateTime64(3) DEFAULT toDateTime64(0, 3);
+ALTER TABLE unit_logs MATERIALIZE COLUMN insert_datetime SETTINGS mutations_sync = 1;
+ALTER TABLE unit_logs MODIFY COLUMN insert_datetime DateTime64(3) DEFAULT now64(3);
+
+
+CREATE TABLE delete_queue
+(
+    entity Enum8('DataPipe' = 1, 'UnitLog' = 2),
+    uuid UUID,
+    queued_datetime DateTime64(3) DEFAULT now64(3)
+)
+ENGINE = MergeTree()
+ORDER BY (entity, uuid, queued_datetime);
@@ -0,0 +1,112 @@
+CREATE TABLE unit_logs_new
+(
+    uuid UUID CODEC(ZSTD(1)),
+    level Enum8('Debug' = 1, 'Info' = 2, 'Warning' = 3, 'Error' = 4, 'Critical' = 5),
+    unit_uuid UUID CODEC(ZSTD(1)),
+    text String CODEC(ZSTD(3)),
+    create_datetime DateTime64(3) CODEC(Delta, ZSTD(1)),
+    expiration_datetime DateTime CODEC(Delta, ZSTD(1)),
+    insert_datetime DateTime64(3) DEFAULT now64(3) CODEC(Delta, ZSTD(1)),
+    INDEX level_idx level TYPE set(5) GRANULARITY 1
+)
+ENGINE = MergeTree()
+PARTITION BY toYYYYMMDD(expiration_datetime)
+ORDER BY (unit_uuid, create_datetime)
+TTL expiration_datetime
+SETTINGS
+    merge_with_ttl_timeout = 600,
+    ttl_only_drop_parts = 1;
+
+INSERT INTO unit_logs_new
+SELECT
+    uuid,
+    level,
+    unit_uuid,
+    text,
+    create_datetime,
+    expiration_datetime,
+    insert_datetime
+FROM unit_logs;
+
+RENAME TABLE unit_logs TO unit_logs_old, unit_logs_new TO unit_logs;
+
+DROP TABLE unit_logs_old;
+
+
+DROP VIEW window_entry_rollup_1m_mv;
+DROP VIEW window_entry_rollup_1h_mv;
+DROP VIEW window_entry_rollup_1d_mv;
+
+CREATE TABLE window_entry_new
+(
+    unit_node_uuid UUID CODEC(ZSTD(1)),
+    state String CODEC(ZSTD(3)),
+    state_type Enum8('Number' = 1, 'Text' = 2),
+    create_datetime DateTime64(3) CODEC(Delta, ZSTD(1)),
+    expiration_datetime DateTime CODEC(Delta, ZSTD(1)),
+    size UInt32 CODEC(T64, ZSTD(1)),
+    insert_datetime DateTime64(3) DEFAULT now64(3) CODEC(Delta, ZSTD(1))
+)
+ENGINE = MergeTree()
+PARTITION BY toYYYYMMDD(expiration_datetime)
+ORDER BY (unit_node_uuid, create_datetime)
+PRIMARY KEY (unit_node_uuid, create_datetime)
+TTL expiration_datetime
+SETTINGS
+    merge_with_ttl_timeout = 600,
+    ttl_only_drop_parts = 1,
+    index_granularity = 128;
+
+INSERT INTO window_entry_new
+SELECT
+    unit_node_uuid,
+    state,
+    state_type,
+    create_datetime,
+    expiration_datetime,
+    size,
+    insert_datetime
+FROM window_entry;
+
+RENAME TABLE window_entry TO window_entry_old, window_entry_new TO window_entry;
+
+DROP TABLE window_entry_old;
+
+CREATE MATERIALIZED VIEW window_entry_rollup_1m_mv TO window_entry_rollup_1m AS
+SELECT
+    unit_node_uuid,
+    toStartOfMinute(create_datetime) AS bucket_datetime,
+    avgState(toFloat64OrNull(state)) AS state_avg,
+    min(toFloat64OrNull(state)) AS state_min,
+    max(toFloat64OrNull(state)) AS state_max,
+    argMaxState(state, create_datetime) AS state_last,
+    count() AS state_count,
+    max(expiration_datetime) AS expiration_datetime
+FROM window_entry
+GROUP BY unit_node_uuid, bucket_datetime;
+
+CREATE MATERIALIZED VIEW window_entry_rollup_1h_mv TO window_entry_rollup_1h AS
+SELECT
+    unit_node_uuid,
+    toStartOfHour(create_datetime) AS bucket_datetime,
+    avgState(toFloat64OrNull(state)) AS state_avg,
+    min(toFloat64OrNull(state)) AS state_min,
+    max(toFloat64OrNull(state)) AS state_max,
+    argMaxState(state, create_datetime) AS state_last,
+    count() AS state_count,
+    max(expiration_datetime) AS expiration_datetime
+FROM window_entry
+GROUP BY unit_node_uuid, bucket_datetime;
+
+CREATE MATERIALIZED VIEW window_entry_rollup_1d_mv TO window_entry_rollup_1d AS
+SELECT
+    unit_node_uuid,
+    toStartOfDay(create_datetime) AS bucket_datetime,
+    avgState(toFloat64OrNull(state)) AS state_avg,
+    min(toFloat64OrNull(state)) AS state_min,
+    max(toFloat64OrNull(state)) AS state_max,
+    argMaxState(state, create_datetime) AS state_last,
+    count() AS state_count,
+    max(expiration_datetime) AS expiration_datetime
+FROM window_entry
+GROUP BY unit_node_uuid, bucket_datetime;
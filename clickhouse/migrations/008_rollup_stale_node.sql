@@ -0,0 +1,7 @@
+CREATE TABLE rollup_stale_node
+(
+    unit_node_uuid UUID,
+    stale_datetime DateTime64(3) DEFAULT now64(3)
+)
+ENGINE = MergeTree()
+ORDER BY (unit_node_uuid, stale_datetime);
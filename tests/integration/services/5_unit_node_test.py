@@ -538,4 +538,4 @@ async def test_delete_data_pipe_data(database, cc) -> None:
             UnitNodeFilter(unit_uuid=target_unit.uuid, type=[UnitNodeTypeEnum.OUTPUT])
         )
 
-        unit_node_service.delete_data_pipe_data(output_unit_node[0].uuid)
+        await unit_node_service.delete_data_pipe_data(output_unit_node[0].uuid)
@@ -0,0 +1,235 @@
+"""
+Storage size and query cost of unit_logs and window_entry before and after
+clickhouse/migrations/007 on synthetic data.
+
+python -m tests.load.benchmark_clickhouse_storage --units 200 --rows 5000
+"""
+
+import argparse
+import random
+import statistics
+import time
+import uuid as uuid_pkg
+from datetime import UTC, datetime, timedelta
+
+from app.configs.clickhouse import get_hand_clickhouse_client
+
+# schemas before 007, see migrations 002, 004 and 006
+BEFORE_SCHEMAS = {
+    "unit_logs": """
+        (
+            uuid UUID,
+            level Enum8('Debug' = 1, 'Info' = 2, 'Warning' = 3, 'Error' = 4, 'Critical' = 5),
+            unit_uuid UUID,
+            text String,
+            create_datetime DateTime64(3),
+            expiration_datetime DateTime,
+            insert_datetime DateTime64(3) DEFAULT now64(3)
+        )
+        ENGINE = MergeTree()
+        ORDER BY (unit_uuid, create_datetime)
+        TTL expiration_datetime
+    """,
+    "window_entry": """
+        (
+            unit_node_uuid UUID,
+            state String,
+            state_type Enum8('Number' = 1, 'Text' = 2),
+            create_datetime DateTime64(3),
+            expiration_datetime DateTime,
+            size UInt32,
+            insert_datetime DateTime64(3) DEFAULT now64(3)
+        )
+        ENGINE = MergeTree()
+        ORDER BY (unit_node_uuid, create_datetime)
+        TTL expiration_datetime
+        SETTINGS index_granularity = 128
+    """,
+}
+
+LOG_TEXTS = [
+    "Connected to MQTT broker {}",
+    "Wifi RSSI {} dBm",
+    "Free heap {} bytes",
+    "Sensor read failed, retry {}",
+    "Firmware update check, current version {}",
+]
+LOG_LEVELS = ["Debug", "Info", "Warning", "Error", "Critical"]
+
+# rows never expire during the run and still span several daily partitions
+ROW_STEP = timedelta(seconds=50)
+EXPIRATION = timedelta(days=3)
+
+
+def make_unit_logs(units: list[uuid_pkg.UUID], rows: int) -> dict[str, list]:
+    start = datetime.now(UTC) - ROW_STEP * rows
+    data = {
+        "uuid": [],
+        "level": [],
+        "unit_uuid": [],
+        "text": [],
+        "create_datetime": [],
+        "expiration_datetime": [],
+    }
+    for unit_uuid in units:
+        for i in range(rows):
+            create_datetime = start + ROW_STEP * i
+            data["uuid"].append(uuid_pkg.uuid4())
+            data["level"].append(
+                random.choices(LOG_LEVELS, weights=[20, 70, 7, 2, 1])[0]
+            )
+            data["unit_uuid"].append(unit_uuid)
+            data["text"].append(
+                random.choice(LOG_TEXTS).format(random.randint(0, 100_000))
+            )
+            data["create_datetime"].append(create_datetime)
+            data["expiration_datetime"].append(create_datetime + EXPIRATION)
+    return data
+
+
+def make_window_entry(
+    units: list[uuid_pkg.UUID], rows: int
+) -> dict[str, list]:
+    start = datetime.now(UTC) - ROW_STEP * rows
+    data = {
+        "unit_node_uuid": [],
+        "state": [],
+        "state_type": [],
+        "create_datetime": [],
+        "expiration_datetime": [],
+        "size": [],
+    }
+    for unit_node_uuid in units:
+        for i in range(rows):
+            create_datetime = start + ROW_STEP * i
+            state = f"{20 + random.gauss(0, 2):.2f}"
+            data["unit_node_uuid"].append(unit_node_uuid)
+            data["state"].append(state)
+            data["state_type"].append("Number")
+            data["create_datetime"].append(create_datetime)
+            data["expiration_datetime"].append(create_datetime + EXPIRATION)
+            data["size"].append(len(state))
+    return data
+
+
+def measure(client, query: str, params: dict, repeats: int) -> tuple:
+    timings = []
+    rows_read = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        client.execute(query, params)
+        timings.append(time.perf_counter() - started)
+        rows_read = client.last_query.progress.rows
+
+    return statistics.median(timings) * 1000, rows_read
+
+
+def run(client, table_name: str, data: dict, queries: list, repeats: int):
+    for variant in ("before", "after"):
+        bench_table = f"benchmark_{table_name}_{variant}"
+        client.execute(f"DROP TABLE IF EXISTS {bench_table}")
+        if variant == "before":
+            client.execute(
+                f"CREATE TABLE {bench_table} {BEFORE_SCHEMAS[table_name]}"
+            )
+        else:
+            client.execute(f"CREATE TABLE {bench_table} AS {table_name}")
+
+        try:
+            client.execute(
+                f"INSERT INTO {bench_table} ({', '.join(data)}) VALUES",
+                list(data.values()),
+                columnar=True,
+            )
+            client.execute(f"OPTIMIZE TABLE {bench_table} FINAL")
+
+            compressed, uncompressed, parts = client.execute(
+                """
+                    SELECT
+                        sum(data_compressed_bytes),
+                        sum(data_uncompressed_bytes),
+                        count()
+                    FROM system.parts
+                    WHERE
+                        database = currentDatabase()
+                        AND table = %(table)s
+                        AND active
+                """,
+                {"table": bench_table},
+            )[0]
+            print(
+                f"{bench_table:<32} {compressed / 2**20:9.2f} MiB "
+                f"(x{uncompressed / max(compressed, 1):.1f}), {parts} parts"
+            )
+
+            for name, query, params in queries:
+                elapsed, rows_read = measure(
+                    client,
+                    query.format(table=bench_table),
+                    params,
+                    repeats,
+                )
+                print(
+                    f"    {name:<28} {elapsed:8.2f} ms {rows_read:10} rows read"
+                )
+        finally:
+            client.execute(f"DROP TABLE IF EXISTS {bench_table}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--units", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    random.seed(1)
+    units = [uuid_pkg.uuid4() for _ in range(args.units)]
+    unit_uuid = units[len(units) // 2]
+
+    with get_hand_clickhouse_client() as client:
+        run(
+            client,
+            "unit_logs",
+            make_unit_logs(units, args.rows),
+            [
+                (
+                    "count by level",
+                    "SELECT count() FROM {table} WHERE unit_uuid = %(uuid)s AND level in ('Error', 'Critical')",
+                    {"uuid": unit_uuid},
+                ),
+                (
+                    "page by level",
+                    "SELECT * FROM {table} WHERE unit_uuid = %(uuid)s AND level in ('Error', 'Critical') ORDER BY create_datetime DESC LIMIT 100",
+                    {"uuid": unit_uuid},
+                ),
+                (
+                    "errors of all units",
+                    "SELECT unit_uuid, count() FROM {table} WHERE level = 'Critical' GROUP BY unit_uuid",
+                    {},
+                ),
+            ],
+            args.repeats,
+        )
+        run(
+            client,
+            "window_entry",
+            make_window_entry(units, args.rows),
+            [
+                (
+                    "node window",
+                    "SELECT create_datetime, state FROM {table} WHERE unit_node_uuid = %(uuid)s ORDER BY create_datetime",
+                    {"uuid": unit_uuid},
+                ),
+                (
+                    "node last hour",
+                    "SELECT avg(toFloat64OrNull(state)) FROM {table} WHERE unit_node_uuid = %(uuid)s AND create_datetime >= now() - INTERVAL 1 HOUR",
+                    {"uuid": unit_uuid},
+                ),
+            ],
+            args.repeats,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Rows/sec of the row-wise and columnar data pipe CSV validators.
+
+python -m tests.load.benchmark_data_pipe_csv --rows 200000
+python -m tests.load.benchmark_data_pipe_csv --rows 200000 --clickhouse
+"""
+
+import argparse
+import asyncio
+import time
+import uuid as uuid_pkg
+from datetime import UTC, datetime, timedelta
+
+from app.dto.enum import ActivePeriodType, ProcessingPolicyType, TypeInputValue
+from app.utils.utils import async_chunked
+from app.validators.data_pipe import DataPipeConfig
+from app.validators.data_pipe_user_csv import StreamingCSVValidator
+from app.validators.data_pipe_user_csv_batch import BatchCSVValidator
+
+
+class UploadFile:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    async def read(self) -> bytes:
+        return self.content
+
+
+def make_config() -> DataPipeConfig:
+    return DataPipeConfig(
+        active_period={"type": ActivePeriodType.PERMANENT},
+        filters={
+            "type_input_value": TypeInputValue.NUMBER,
+            "type_value_threshold": "Range",
+            "threshold_min": -1,
+            "threshold_max": 1_000_000,
+            "max_rate": 0,
+            "last_unique_check": True,
+            "max_size": 32,
+        },
+        processing_policy={
+            "policy_type": ProcessingPolicyType.TIME_WINDOW,
+            "time_window_size": 86400,
+        },
+    )
+
+
+def make_csv(rows: int) -> bytes:
+    # all rows have to fit into the 1 day time window
+    step = timedelta(seconds=min(1.0, 80_000 / rows))
+    start = datetime.now(UTC) - step * rows - timedelta(seconds=60)
+    lines = ["create_datetime,state"]
+    lines.extend(
+        f"{(start + step * i).strftime('%Y-%m-%d %H:%M:%S.%f')},{i}"
+        for i in range(rows)
+    )
+    return "\n".join(lines).encode("utf-8")
+
+
+async def run_streaming(config, content, bulk_create) -> None:
+    async for batch in async_chunked(
+        StreamingCSVValidator(config).iter_validated_streaming(
+            uuid_pkg.uuid4(), UploadFile(content)
+        ),
+        5000,
+    ):
+        bulk_create(batch)
+
+
+async def run_batch(config, content, bulk_create) -> None:
+    async for columns in BatchCSVValidator(config).iter_validated_columns(
+        uuid_pkg.uuid4(), UploadFile(content)
+    ):
+        bulk_create(columns)
+
+
+def measure(name: str, rows: int, coroutine) -> float:
+    started = time.perf_counter()
+    asyncio.run(coroutine)
+    elapsed = time.perf_counter() - started
+
+    print(f"{name:<10} {elapsed:8.3f} s {rows / elapsed:12.0f} rows/sec")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument(
+        "--clickhouse",
+        action="store_true",
+        help="insert into window_entry of the configured ClickHouse",
+    )
+    args = parser.parse_args()
+
+    config = make_config()
+    content = make_csv(args.rows)
+
+    if args.clickhouse:
+        from app.configs.clickhouse import get_hand_clickhouse_client
+        from app.dto.clickhouse.orm import ClickhouseOrm
+
+        with get_hand_clickhouse_client() as client:
+            orm = ClickhouseOrm(client)
+            streaming = measure(
+                "streaming",
+                args.rows,
+                run_streaming(
+                    config,
+                    content,
+                    lambda data: orm.insert("window_entry", data),
+                ),
+            )
+            batch = measure(
+                "batch",
+                args.rows,
+                run_batch(
+                    config,
+                    content,
+                    lambda data: orm.insert_columnar("window_entry", data),
+                ),
+            )
+    else:
+        streaming = measure(
+            "streaming",
+            args.rows,
+            run_streaming(
+                config,
+                content,
+                lambda data: [item.to_dict() for item in data],
+            ),
+        )
+        batch = measure(
+            "batch", args.rows, run_batch(config, content, lambda _: None)
+        )
+
+    print(f"speedup    {streaming / batch:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
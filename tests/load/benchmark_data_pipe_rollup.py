@@ -0,0 +1,111 @@
+"""
+Query latency of raw vs rollup downsampling on synthetic multi-month data.
+
+python -m tests.load.benchmark_data_pipe_rollup --months 6
+"""
+
+import argparse
+import statistics
+import time
+import uuid as uuid_pkg
+from datetime import UTC, datetime, timedelta
+
+from app import settings
+from app.configs.clickhouse import get_hand_clickhouse_client
+from app.dto.enum import (
+    AggregationFunctions,
+    DatasourceDownsampling,
+    OrderByDate,
+    ProcessingPolicyType,
+)
+from app.repositories.data_pipe_repository import DataPipeRepository
+from app.schemas.pydantic.unit_node import DataPipeFilter
+
+
+def fill_aggregation_entry(
+    repository: DataPipeRepository, unit_node_uuid: uuid_pkg.UUID, months: int
+) -> int:
+    end = datetime.now(UTC).replace(second=0, microsecond=0)
+    start = end - timedelta(days=30 * months)
+    count = int((end - start).total_seconds() // 60)
+
+    batch_size = 100_000
+    for offset in range(0, count, batch_size):
+        size = min(batch_size, count - offset)
+        ends = [
+            start + timedelta(minutes=offset + i + 1) for i in range(size)
+        ]
+        repository.bulk_create_columnar(
+            ProcessingPolicyType.AGGREGATION,
+            {
+                "unit_node_uuid": [unit_node_uuid] * size,
+                "state": [float((offset + i) % 1440) for i in range(size)],
+                "aggregation_type": [AggregationFunctions.AVG.value] * size,
+                "time_window_size": [60] * size,
+                "create_datetime": ends,
+                "start_window_datetime": [
+                    item - timedelta(minutes=1) for item in ends
+                ],
+                "end_window_datetime": ends,
+            },
+        )
+
+    return count
+
+
+def measure(
+    repository: DataPipeRepository,
+    unit_node_uuid: uuid_pkg.UUID,
+    relative_time: str,
+    repeats: int,
+) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        repository.list_downsampled(
+            DataPipeFilter(
+                uuid=unit_node_uuid,
+                type=ProcessingPolicyType.AGGREGATION,
+                aggregation_type=[AggregationFunctions.AVG.value],
+                relative_time=relative_time,
+                order_by_create_date=OrderByDate.asc,
+            ),
+            DatasourceDownsampling.AVG,
+            settings.pu_grafana_max_data_points,
+        )
+        timings.append(time.perf_counter() - started)
+
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    unit_node_uuid = uuid_pkg.uuid4()
+    with get_hand_clickhouse_client() as client:
+        repository = DataPipeRepository(client=client, db=None)
+
+        rows = fill_aggregation_entry(repository, unit_node_uuid, args.months)
+        print(f"inserted {rows} rows for {unit_node_uuid}")
+
+        print(f"{'range':<8} {'raw, ms':>10} {'rollup, ms':>12}")
+        try:
+            for relative_time in ("1d", "7d", "30d", f"{30 * args.months}d"):
+                settings.pu_ff_datapipe_rollup_enable = False
+                raw = measure(
+                    repository, unit_node_uuid, relative_time, args.repeats
+                )
+                settings.pu_ff_datapipe_rollup_enable = True
+                rollup = measure(
+                    repository, unit_node_uuid, relative_time, args.repeats
+                )
+                print(f"{relative_time:<8} {raw:>10.1f} {rollup:>12.1f}")
+        finally:
+            repository.bulk_delete([str(unit_node_uuid)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Gzip of a firmware tar: single threaded zlib, as DeflateWriter did before,
+against the block parallel ParallelDeflate for a few levels, block sizes
+and worker counts, on synthetic source files.
+
+python -m tests.load.benchmark_firmware_compress --size 32 --workers 1 2 4
+"""
+
+import argparse
+import random
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.parallel_deflate import ParallelDeflate
+
+WBITS = 31
+
+
+def make_payload(size: int) -> bytes:
+    words = [f"value_{i}".encode() for i in range(500)]
+    lines = []
+    total = 0
+    while total < size:
+        line = b" = ".join(random.choices(words, k=4)) + b"\n"
+        lines.append(line)
+        total += len(line)
+    return b"".join(lines)[:size]
+
+
+def compress_serial(payload: bytes, level: int) -> bytes:
+    producer = zlib.compressobj(level=level, wbits=WBITS)
+    return producer.compress(payload) + producer.flush()
+
+
+def compress_parallel(
+    payload: bytes, level: int, block_size: int, executor
+) -> bytes:
+    producer = ParallelDeflate(WBITS, level, block_size, executor)
+    return producer.compress(payload) + producer.flush()
+
+
+def run(name: str, fn, payload: bytes, repeat: int) -> None:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        data = fn()
+    elapsed = (time.perf_counter() - started) / repeat
+
+    assert zlib.decompress(data, WBITS) == payload
+    print(
+        f"{name:<28} {len(payload) / elapsed / 2**20:8.1f} MiB/s"
+        f" {len(data) / len(payload):6.3f} ratio"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=32, help="MiB")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--levels", type=int, nargs="+", default=[6, 9])
+    parser.add_argument(
+        "--block-sizes", type=int, nargs="+", default=[65_536, 131_072]
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    random.seed(1)
+    payload = make_payload(args.size * 2**20)
+
+    for level in args.levels:
+        run(
+            f"serial l{level}",
+            lambda level=level: compress_serial(payload, level),
+            payload,
+            args.repeat,
+        )
+        for workers in args.workers:
+            with ThreadPoolExecutor(workers) as executor:
+                for block_size in args.block_sizes:
+                    run(
+                        f"parallel l{level} w{workers} b{block_size}",
+                        lambda level=level, block_size=block_size: (
+                            compress_parallel(
+                                payload, level, block_size, executor
+                            )
+                        ),
+                        payload,
+                        args.repeat,
+                    )
+
+
+if __name__ == "__main__":
+    main()
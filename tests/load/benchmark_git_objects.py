@@ -0,0 +1,91 @@
+"""
+File reads from a physic repository: a Repo and git processes per call, as
+GitRepoRepository.get_file did before, against the long-lived cat-file
+reader, on a synthetic repository.
+
+python -m tests.load.benchmark_git_objects --commits 200 --threads 8
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from git import Repo as GitRepo
+
+from app.repositories.git_object_reader import GitObjectReader
+
+FILES = ["schema_example.json", "env_example.json"]
+
+
+def make_repo(path: str, commits: int) -> list[str]:
+    repo = GitRepo.init(path)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "benchmark")
+        config.set_value("user", "email", "benchmark@example.com")
+
+    hexshas = []
+    for i in range(commits):
+        for name in FILES:
+            with open(f"{path}/{name}", "w") as f:
+                json.dump({f"topic_{j}": [f"{i}/{j}"] for j in range(20)}, f)
+        repo.index.add(FILES)
+        hexshas.append(repo.index.commit(f"commit {i}").hexsha)
+    return hexshas
+
+
+def read_per_call(path: str, commit: str, name: str) -> bytes:
+    repo = GitRepo(path)
+    try:
+        return (repo.commit(commit).tree / name).data_stream.read()
+    finally:
+        repo.close()
+
+
+def run(name: str, fn, requests: list, threads: int) -> None:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(lambda item: fn(*item), requests))
+    elapsed = time.perf_counter() - started
+    print(f"{name:<12} {len(requests) / elapsed:10.1f} calls/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commits", type=int, default=200)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    random.seed(1)
+    with tempfile.TemporaryDirectory() as path:
+        hexshas = make_repo(path, args.commits)
+        requests = [
+            (random.choice(hexshas), random.choice(FILES))
+            for _ in range(args.calls)
+        ]
+
+        reader = GitObjectReader(path)
+        assert reader.read(f"{requests[0][0]}:{requests[0][1]}") == (
+            read_per_call(path, *requests[0])
+        )
+
+        run(
+            "per call",
+            lambda commit, name: read_per_call(path, commit, name),
+            requests,
+            args.threads,
+        )
+        run(
+            "cat-file",
+            lambda commit, name: reader.read(f"{commit}:{name}"),
+            requests,
+            args.threads,
+        )
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()